@@ -0,0 +1,166 @@
+# app_logging.py
+"""
+Logging setup for the app.
+
+application.log     free-form text log (as before), now size-rotated
+performance.jsonl   one JSON object per operation: op, path, duration, outcome
+
+Both files are written by a single QueueListener thread; the GUI thread only
+puts records on an in-memory queue, so a slow disk never stalls the UI.
+
+Summarize the performance log from the command line:
+    python app_logging.py ~/EirekesManagerLogs
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from perf_trace import tracer
+
+APP_LOG = "application.log"
+PERF_LOG = "performance.jsonl"
+MAX_BYTES = 2 * 1024 * 1024
+BACKUP_COUNT = 5
+PERF_LOGGER = "eirekes.perf"
+
+perf_logger = logging.getLogger(PERF_LOGGER)
+_listener = None
+_span_hooked = False
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created)),
+            "level": record.levelname,
+            "op": record.getMessage(),
+        }
+        data.update(getattr(record, "perf", {}))
+        return json.dumps(data, ensure_ascii=False)
+
+
+def setup_logging(log_dir):
+    """Routes the root logger and the perf logger through one background queue."""
+    global _listener, _span_hooked
+    if _listener:
+        _listener.stop()
+
+    root = logging.getLogger()
+    # Reset handlers to avoid duplicate logs if app restarts
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in perf_logger.handlers[:]:
+        perf_logger.removeHandler(handler)
+
+    app_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, APP_LOG), maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8')
+    app_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    app_handler.addFilter(lambda record: not record.name.startswith(PERF_LOGGER))
+
+    perf_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, PERF_LOG), maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding='utf-8')
+    perf_handler.setFormatter(JsonLinesFormatter())
+    perf_handler.addFilter(logging.Filter(PERF_LOGGER))
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    perf_logger.setLevel(logging.INFO)
+
+    _listener = logging.handlers.QueueListener(log_queue, app_handler, perf_handler, respect_handler_level=True)
+    _listener.start()
+
+    if not _span_hooked:
+        tracer.add_listener(log_span)
+        _span_hooked = True
+    return _listener
+
+
+@atexit.register
+def shutdown_logging():
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+# =========================================================
+# STRUCTURED EVENTS
+# =========================================================
+def log_operation(op, path=None, duration_ms=None, outcome="ok", **extra):
+    data = {"path": path, "duration_ms": round(duration_ms, 3) if duration_ms is not None else None,
+            "outcome": outcome}
+    data.update(extra)
+    level = logging.INFO if outcome == "ok" else logging.WARNING
+    perf_logger.log(level, op, extra={"perf": data})
+
+
+def log_span(name, duration_ms, ok, attrs):
+    """perf_trace listener: every finished span becomes one JSON line."""
+    extra = {k: v for k, v in attrs.items() if k not in ("path", "url")}
+    log_operation(name, attrs.get("path") or attrs.get("url"), duration_ms,
+                  "ok" if ok else "error", **extra)
+
+
+# =========================================================
+# SUMMARY
+# =========================================================
+def read_perf_records(log_dir):
+    base = os.path.join(log_dir, PERF_LOG)
+    # Oldest rotated file first
+    files = [f"{base}.{i}" for i in range(BACKUP_COUNT, 0, -1)] + [base]
+    for path in files:
+        if not os.path.exists(path): continue
+        with open(path, 'r', encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def percentile(sorted_values, p):
+    if not sorted_values: return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(log_dir):
+    durations = {}
+    errors = {}
+    for record in read_perf_records(log_dir):
+        op = record.get("op")
+        if not op: continue
+        if record.get("outcome") != "ok":
+            errors[op] = errors.get(op, 0) + 1
+        if record.get("duration_ms") is not None:
+            durations.setdefault(op, []).append(record["duration_ms"])
+
+    summary = {}
+    for op in sorted(set(durations) | set(errors)):
+        values = sorted(durations.get(op, []))
+        summary[op] = {
+            "count": len(values),
+            "errors": errors.get(op, 0),
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.expanduser("~"), "EirekesManagerLogs")
+    result = summarize(target)
+    if not result:
+        print(f"No performance records in {target}")
+    else:
+        print(f"{'operation':28} {'count':>7} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10}")
+        for op, stats in result.items():
+            print(f"{op:28} {stats['count']:7d} {stats['errors']:7d} {stats['p50_ms']:10.1f} {stats['p95_ms']:10.1f}")
@@ -9,6 +9,7 @@ TRANSLATIONS = {
         "import_csv": "Importeer CSV",
         "matches_hint": "Veranderingen zijn gekoleird in CYAAN. Ctrl+S om op te slaan.",
         "local_files": "Lokale Bestanden",
+        "search_placeholder": "🔍 Zoeken (bestand, titel, artiest, album, commentaar)...",
         "open_folder": "Open Map",
         "metadata_editor": "Metadata Editor",
         "no_art": "Giejne Cover",
@@ -18,6 +19,9 @@ TRANSLATIONS = {
         "save_error": "Fouten bij {} bestanden.",
         "staged_count": "{} bestanden klaargezet. Druk Ctrl+S.",
         "no_changes": "Geen wijzigingen om op te slaan.",
+        "chk_replaygain": "Volume Meten (ReplayGain)",
+        "rg_unavailable": "ReplayGain overgeslagen: numpy of ffmpeg ontbreekt.",
+        "rg_analyzing": "Volume meten... {}/{}",
         "processing_error": "Faat boi 't verweirken {}: {}",
         "renamed_log": "Hernoemd naar {}",
         "lyrics_log": "Lyrics bestand aangemaakt: {}",
@@ -40,6 +44,21 @@ TRANSLATIONS = {
         "apply_btn": "✅ Veranderingen Toepassen",
         "cancel_btn": "Annuleren",
         "fetching_wait": "Ophalen... ressekes geduld",
+        "fetching_lyrics": "Lyrics ophalen... ressekes geduld",
+        "lyrics_selected_btn": "🎵 Lyrics voor Selectie",
+        "chk_cover": "Hoes Toevoegen",
+        "art_title": "Hoezen Overzicht",
+        "art_hint": "Mappen waar een hoes ontbreekt of waar niet alle nummers dezelfde hoes hebben.",
+        "art_scan": "Map Scannen...",
+        "art_scanning": "Scannen... {}/{}",
+        "art_apply": "Hoes Toepassen op Album",
+        "art_applied": "Hoes klaargezet voor {} bestanden.",
+        "art_col_folder": "Map",
+        "art_col_files": "Bestanden",
+        "art_col_missing": "Zonder Hoes",
+        "art_col_covers": "Hoezen",
+        "art_col_fix": "Aan te Passen",
+        "art_switch_prompt": "Er staan nog {} niet opgeslagen wijzigingen klaar in de huidige map.\nDie gaan verloren als naar {} wordt overgeschakeld. Doorgaan?",
         "unknown_album": "Onbekend Album",
         "csv_title": "CSV Data Matcher",
         "load_group": "1. Data Laden",
@@ -65,7 +84,30 @@ TRANSLATIONS = {
         "lbl_albumartist": "Album Artiest",
         "lbl_composer": "Componist",
         "lbl_discnumber": "Discnummer",
-        "lbl_comment": "Commentaar"
+        "lbl_comment": "Commentaar",
+        "journal_title": "Onafgewerkte Opslag",
+        "journal_prompt": "Vorige opslag is onderbroken: {} van {} bestanden zijn nog niet klaar.\nVerder doen, terugdraaien of vergeten?",
+        "journal_resume": "Verder Doen",
+        "journal_rollback": "Terugdraaien",
+        "journal_discard": "Vergeten",
+        "journal_undo_prompt": "Laatste opslag ({} bestanden) terugdraaien?",
+        "journal_nothing": "Geen opslag om terug te draaien.",
+        "journal_rolled_back": "{} bestanden teruggedraaid.",
+        "perf_title": "Performantie",
+        "perf_hint": "Gemeten tijden per operatie sinds het opstarten (p50/p95 zijn benaderingen per bucket).",
+        "perf_refresh": "Vernieuwen",
+        "perf_reset": "Wissen",
+        "perf_export": "Exporteer JSON",
+        "perf_col_operation": "Operatie",
+        "perf_col_count": "Aantal",
+        "perf_col_errors": "Fouten",
+        "perf_col_mean": "Gemiddeld (ms)",
+        "perf_col_p50": "p50 (ms)",
+        "perf_col_p95": "p95 (ms)",
+        "perf_col_max": "Max (ms)",
+        "perf_col_total": "Totaal (ms)",
+        "profile_armed": "Profiler staat klaar voor de volgende actie.",
+        "profile_written": "Profiel opgeslagen: {} (zie Logs map)"
     }
 }
 
@@ -0,0 +1,163 @@
+# artwork_index.py
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+
+CACHE_FILE = os.path.join(os.path.expanduser("~"), "EirekesManagerCache", "artwork_index.json")
+
+# Stored digest for files without embedded art
+MISSING = ""
+
+
+def cover_digest(img_data):
+    return hashlib.sha1(img_data).hexdigest() if img_data else MISSING
+
+
+class ArtworkIndex:
+    """
+    Content hash of the embedded cover of every file seen, library-wide.
+
+    Entries are kept with the file's size and mtime, so a changed file is
+    simply unknown again until it is rescanned. Files are grouped by folder
+    (one folder = one album): a folder whose files do not all share one
+    cover is reported with the missing files and the cover groups, and the
+    most common cover is suggested for the rest of the album.
+    """
+
+    def __init__(self, cache_file=CACHE_FILE):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._entries = None           # path -> [size, mtime_ns, digest]
+        self._dirty = False
+
+    # =========================================================
+    # ENTRIES
+    # =========================================================
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as fh:
+                    self._entries = json.load(fh)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def lookup(self, path):
+        """Digest (MISSING for no art) if the entry is still current, else None."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._load().get(path)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def update(self, path, digest):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        with self._lock:
+            self._load()[path] = [st.st_size, st.st_mtime_ns, digest]
+            self._dirty = True
+
+    def remove(self, path):
+        with self._lock:
+            if self._load().pop(path, None) is not None:
+                self._dirty = True
+
+    def forget_saved(self, final_paths):
+        """Drops the entries of files a save rewrote, under their old and new names."""
+        for old_path, new_path in final_paths.items():
+            self.remove(old_path)
+            self.remove(new_path)
+
+    def prune(self, root, found):
+        """Drops entries under root that a walk of root did not find."""
+        prefix = os.path.join(root, "")
+        found = set(found)
+        with self._lock:
+            gone = [p for p in self._load() if p.startswith(prefix) and p not in found]
+            for path in gone:
+                del self._entries[path]
+            if gone: self._dirty = True
+        return len(gone)
+
+    def _current_items(self, items):
+        # Files deleted or changed since they were indexed do not count until rescanned
+        current = []
+        for path, entry in items:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                current.append((path, entry[2]))
+        return current
+
+    def save(self):
+        with self._lock:
+            if not self._dirty: return
+            try:
+                os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+                tmp_path = self.cache_file + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as fh:
+                    json.dump(self._entries, fh)
+                os.replace(tmp_path, self.cache_file)
+                self._dirty = False
+            except OSError:
+                pass
+
+    # =========================================================
+    # QUERIES
+    # =========================================================
+    def files_with(self, digest):
+        with self._lock:
+            items = [(p, e) for p, e in self._load().items() if e[2] == digest]
+        return sorted(p for p, _ in self._current_items(items))
+
+    def folder_report(self, folder):
+        with self._lock:
+            items = [(p, e) for p, e in self._load().items() if os.path.dirname(p) == folder]
+        return self._report(folder, self._current_items(items))
+
+    def problem_folders(self):
+        """Reports for every folder with missing art or more than one cover."""
+        with self._lock:
+            items = list(self._load().items())
+        by_folder = {}
+        for path, digest in self._current_items(items):
+            by_folder.setdefault(os.path.dirname(path), []).append((path, digest))
+        reports = [self._report(folder, items) for folder, items in sorted(by_folder.items())]
+        return [r for r in reports if r["missing"] or len(r["groups"]) > 1]
+
+    def _report(self, folder, items):
+        groups = {}
+        missing = []
+        for path, digest in sorted(items):
+            if digest == MISSING:
+                missing.append(path)
+            else:
+                groups.setdefault(digest, []).append(path)
+
+        dominant = None
+        if groups:
+            dominant = Counter({d: len(paths) for d, paths in groups.items()}).most_common(1)[0][0]
+        # Every file that would change if the dominant cover were applied
+        outliers = missing + [p for d, paths in groups.items() if d != dominant for p in paths]
+        return {
+            "folder": folder,
+            "files": len(items),
+            "missing": missing,
+            "groups": groups,
+            "dominant": dominant,
+            "outliers": sorted(outliers)
+        }
+
+
+# One index for the whole app
+artwork_index = ArtworkIndex()
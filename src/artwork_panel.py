@@ -0,0 +1,124 @@
+import os
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QLabel,
+                             QAbstractItemView)
+from PyQt6.QtCore import Qt
+from artwork_index import artwork_index
+from job_scheduler import CancelToken, INDEX
+from app_translations import tr
+
+COLUMNS = ["art_col_folder", "art_col_files", "art_col_missing", "art_col_covers", "art_col_fix"]
+AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.flac', '.wav')
+
+
+class ArtworkPanel(QDialog):
+    """
+    Folders whose files are missing a cover or do not share one, straight
+    from the artwork index. "Scan Folder" walks a library root in the
+    background; "Apply" stages the most common cover of the selected
+    folder on the files that differ.
+    """
+
+    def __init__(self, app_window, parent=None):
+        super().__init__(parent or app_window)
+        self.setWindowTitle(tr("art_title"))
+        self.resize(900, 450)
+        self.app_window = app_window
+        self.reports = []
+        self.scan_token = None
+        self.scan_total = 0
+        self.scan_done = 0
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.lbl_info = QLabel(tr("art_hint"))
+        layout.addWidget(self.lbl_info)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([tr(key) for key in COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for col in range(1, len(COLUMNS)):
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.table, 1)
+
+        btn_box = QHBoxLayout()
+        btn_scan = QPushButton(tr("art_scan"))
+        btn_scan.clicked.connect(self.choose_scan_root)
+        btn_refresh = QPushButton(tr("perf_refresh"))
+        btn_refresh.clicked.connect(self.refresh)
+        self.btn_apply = QPushButton(tr("art_apply"))
+        self.btn_apply.clicked.connect(self.apply_selected)
+        btn_close = QPushButton(tr("close_btn"))
+        btn_close.clicked.connect(self.accept)
+
+        btn_box.addWidget(btn_scan)
+        btn_box.addWidget(btn_refresh)
+        btn_box.addStretch()
+        btn_box.addWidget(self.btn_apply)
+        btn_box.addWidget(btn_close)
+        layout.addLayout(btn_box)
+
+    def refresh(self):
+        self.reports = artwork_index.problem_folders()
+        self.table.setRowCount(len(self.reports))
+        for row, report in enumerate(self.reports):
+            values = [report["folder"], report["files"], len(report["missing"]),
+                      len(report["groups"]), len(report["outliers"])]
+            for col, val in enumerate(values):
+                item = QTableWidgetItem(str(val))
+                if col > 0:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, col, item)
+
+    # --- SCAN ---
+    def choose_scan_root(self):
+        start_dir = self.app_window.settings.value("last_folder", os.path.expanduser("~"))
+        root = QFileDialog.getExistingDirectory(self, tr("art_scan"), start_dir)
+        if root:
+            self.scan(root)
+
+    def scan(self, root):
+        if self.scan_token: self.scan_token.cancel()
+        self.scan_token = CancelToken()
+        paths = [os.path.join(folder, name)
+                 for folder, _, names in os.walk(root)
+                 for name in names if name.lower().endswith(AUDIO_EXTENSIONS)]
+        # Files moved or deleted since the last scan leave the index
+        artwork_index.prune(root, paths)
+        self.scan_total = len(paths)
+        self.scan_done = 0
+        self.lbl_info.setText(tr("art_scanning").format(0, self.scan_total))
+        self.app_window.jobs.submit_batch(INDEX, self.app_window.index_cover, paths,
+                                          on_done=self.on_scanned, token=self.scan_token)
+
+    def on_scanned(self, _path):
+        self.scan_done += 1
+        if self.scan_done % 50 == 0 or self.scan_done == self.scan_total:
+            self.lbl_info.setText(tr("art_scanning").format(self.scan_done, self.scan_total))
+        if self.scan_done == self.scan_total:
+            artwork_index.save()
+            self.refresh()
+
+    # --- APPLY ---
+    def apply_selected(self):
+        row = self.table.currentRow()
+        if row < 0 or row >= len(self.reports): return
+        report = self.reports[row]
+        if not report["dominant"] or not report["outliers"]: return
+        self.app_window.apply_cover_to_album(report)
+        self.accept()
+
+    def done(self, result):
+        # Stop a running scan when the dialog goes away
+        if self.scan_token: self.scan_token.cancel()
+        artwork_index.save()
+        super().done(result)
@@ -0,0 +1,155 @@
+# bench_fixtures.py
+"""
+Synthetic audio files for the benchmarks.
+
+WAV is written with the standard library; MP3, M4A and FLAC are encoded
+from it with ffmpeg (skipped with a note when ffmpeg is not on PATH).
+Every file gets a realistic set of tags, and optionally a cover.
+
+    python bench_fixtures.py --out /tmp/eirekes-fixtures --seconds 30 240
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import struct
+import subprocess
+import wave
+
+FORMATS = {
+    "wav": None,
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "192k"],
+    "m4a": ["-c:a", "aac", "-b:a", "192k"],
+    "flac": ["-c:a", "flac"],
+}
+RATE = 44100
+
+
+def write_wav(path, seconds, freq=440.0):
+    """Stereo 16-bit tone; one period is built once and repeated."""
+    period = int(RATE / freq)
+    frames = b"".join(struct.pack("<hh", v, v) for v in
+                      (int(12000 * math.sin(2 * math.pi * i / period)) for i in range(period)))
+    total = int(seconds * RATE)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        chunk = frames * (RATE // period)
+        written = 0
+        while written < total:
+            n = min(len(chunk) // 4, total - written)
+            wav.writeframes(chunk[:n * 4])
+            written += n
+
+
+def cover_jpeg(size=1000):
+    """A gradient cover, big enough to be a realistic embed (needs a QGuiApplication)."""
+    from PyQt6.QtCore import QBuffer, QIODevice, QByteArray
+    from PyQt6.QtGui import QImage, QColor, QPainter, QLinearGradient
+    image = QImage(size, size, QImage.Format.Format_RGB32)
+    gradient = QLinearGradient(0, 0, size, size)
+    gradient.setColorAt(0, QColor("#96CBD0"))
+    gradient.setColorAt(1, QColor("#28a745"))
+    painter = QPainter(image)
+    painter.fillRect(image.rect(), gradient)
+    painter.end()
+
+    ba = QByteArray()
+    buf = QBuffer(ba)
+    buf.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buf, "JPEG", quality=90)
+    return bytes(ba)
+
+
+def tag_file(path, index, cover=None):
+    import music_tag
+    f = music_tag.load_file(path)
+    f['title'] = f"Bench Track {index}"
+    f['artist'] = "Den Bench"
+    f['album'] = "Oilsjt Benchmark"
+    f['year'] = 2024
+    f['tracknumber'] = index
+    f['genre'] = "Carnaval"
+    f['comment'] = "Origineel: Some Song"
+    f.save()
+
+    if cover:
+        if path.endswith(".m4a"):
+            from mutagen.mp4 import MP4, MP4Cover
+            m4a = MP4(path)
+            m4a['covr'] = [MP4Cover(cover, imageformat=MP4Cover.FORMAT_JPEG)]
+            m4a.save()
+        else:
+            f = music_tag.load_file(path)
+            f['artwork'] = cover
+            f.save()
+
+
+def make_fixtures(out_dir, seconds=(30, 240), formats=tuple(FORMATS), artwork=(False, True), copies=3):
+    """
+    One folder per (format, artwork) case with `copies` files per duration.
+    Returns the manifest; an existing manifest with the same settings is reused.
+    """
+    settings = {"seconds": list(seconds), "formats": list(formats), "artwork": list(artwork), "copies": copies}
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as fh:
+            manifest = json.load(fh)
+        if manifest.get("settings") == settings:
+            return manifest
+
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    if not has_ffmpeg:
+        print("ffmpeg not found: only WAV fixtures are generated")
+    cover = cover_jpeg() if any(artwork) else None
+
+    os.makedirs(out_dir, exist_ok=True)
+    sources = {}
+    for sec in seconds:
+        sources[sec] = os.path.join(out_dir, f"source-{sec}s.wav")
+        if not os.path.exists(sources[sec]):
+            write_wav(sources[sec], sec)
+
+    cases = []
+    for fmt in formats:
+        if FORMATS[fmt] is not None and not has_ffmpeg: continue
+        for with_art in artwork:
+            folder = os.path.join(out_dir, f"{fmt}-{'art' if with_art else 'noart'}")
+            if os.path.isdir(folder): shutil.rmtree(folder)
+            os.makedirs(folder)
+            files = []
+            index = 1
+            for sec in seconds:
+                for _ in range(copies):
+                    path = os.path.join(folder, f"{index:02d} - Den Bench - Track {index}.{fmt}")
+                    if FORMATS[fmt] is None:
+                        shutil.copyfile(sources[sec], path)
+                    else:
+                        subprocess.run(["ffmpeg", "-v", "error", "-y", "-i", sources[sec]] + FORMATS[fmt] + [path],
+                                       check=True)
+                    tag_file(path, index, cover if with_art else None)
+                    files.append({"path": path, "seconds": sec, "bytes": os.path.getsize(path)})
+                    index += 1
+            cases.append({"format": fmt, "artwork": with_art, "folder": folder, "files": files})
+
+    manifest = {"settings": settings, "cases": cases}
+    with open(manifest_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate benchmark audio fixtures")
+    parser.add_argument("--out", default=os.path.join(os.path.expanduser("~"), "EirekesManagerCache", "bench-fixtures"))
+    parser.add_argument("--seconds", type=int, nargs="+", default=[30, 240])
+    parser.add_argument("--copies", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication
+    app = QGuiApplication([])
+    manifest = make_fixtures(args.out, args.seconds, copies=args.copies)
+    for case in manifest["cases"]:
+        print(f"{case['format']:5} {'art' if case['artwork'] else 'no art':7} {len(case['files'])} files in {case['folder']}")
@@ -0,0 +1,161 @@
+# bench_startup.py
+"""
+Time-to-first-window benchmark.
+
+Starts the app in a fresh interpreter several times and reports how long it
+takes until the main window has painted once, plus which heavy modules were
+already imported at that point (they should all load lazily). Every run gets
+its own settings and log dir with a fixture library of --files tracks as the
+last folder, and also reports when restoring that folder has finished (it
+must start after the first paint).
+
+    python bench_startup.py --runs 5 --files 200 --json startup.json
+"""
+import time
+T_START = time.perf_counter()
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ["music_tag", "mutagen", "requests", "bs4", "unidecode",
+                 "matcher", "csv_matcher", "scraper", "lyrics_scraper"]
+
+
+# =========================================================
+# CHILD: one cold start
+# =========================================================
+def run_child(scratch, folder):
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QObject, QEvent, QTimer, QSettings
+
+    app = QApplication(sys.argv[:1])
+    t_qt = time.perf_counter()
+
+    from mainwindow import MusicTaggerApp
+    from artwork_index import artwork_index
+    t_import = time.perf_counter()
+
+    # Nothing of the user's profile: scratch settings with the fixture as last folder
+    settings = QSettings(os.path.join(scratch, "settings.ini"), QSettings.Format.IniFormat)
+    settings.setValue("last_folder", folder)
+    artwork_index.cache_file = os.path.join(scratch, "artwork_index.json")
+    window = MusicTaggerApp(settings=settings, log_dir=os.path.join(scratch, "logs"))
+    t_built = time.perf_counter()
+
+    result = {}
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and "first_paint" not in result:
+                result["first_paint"] = time.perf_counter()
+                result["loaded"] = [m for m in HEAVY_MODULES if m in sys.modules]
+            return False
+
+    restore_session = window.restore_session
+    def timed_restore():
+        result["restore_start"] = time.perf_counter()
+        restore_session()
+        result["restored"] = time.perf_counter()
+        result["files"] = window.file_model.rowCount()
+        QTimer.singleShot(0, app.quit)
+    window.restore_session = timed_restore
+
+    paint_filter = FirstPaint()
+    window.installEventFilter(paint_filter)
+    window.show()
+    QTimer.singleShot(10000, app.quit)
+    app.exec()
+    window.close()
+
+    if "first_paint" not in result:
+        print(json.dumps({"error": "window never painted"}))
+        return
+    if "restored" not in result:
+        print(json.dumps({"error": "last folder was never restored"}))
+        return
+
+    print(json.dumps({
+        "qt_init_ms": (t_qt - T_START) * 1000,
+        "import_ms": (t_import - t_qt) * 1000,
+        "construct_ms": (t_built - t_import) * 1000,
+        "first_window_ms": (result["first_paint"] - T_START) * 1000,
+        "restored_ms": (result["restored"] - T_START) * 1000,
+        "restore_after_paint": result["restore_start"] >= result["first_paint"],
+        "files": result["files"],
+        "heavy_loaded": result["loaded"]
+    }))
+
+
+# =========================================================
+# PARENT: repeat and summarize
+# =========================================================
+def run_benchmark(runs, files):
+    from bench_workflow import build_library
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    samples = []
+
+    root = tempfile.mkdtemp(prefix="eirekes-startup-")
+    folder = os.path.join(root, "library")
+    build_library(folder, files, "wav")
+
+    for run in range(runs):
+        scratch = os.path.join(root, f"run{run}")
+        os.makedirs(scratch)
+        t0 = time.perf_counter()
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", scratch, folder],
+                             cwd=os.path.dirname(os.path.abspath(__file__)),
+                             env=env, capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - t0) * 1000
+
+        lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+        if not lines:
+            print(out.stderr)
+            raise SystemExit("Startup run produced no result")
+        sample = json.loads(lines[-1])
+        if "error" in sample:
+            raise SystemExit(sample["error"])
+        sample["process_wall_ms"] = wall_ms
+        samples.append(sample)
+
+    shutil.rmtree(root, ignore_errors=True)
+
+    summary = {}
+    for key in ["qt_init_ms", "import_ms", "construct_ms", "first_window_ms", "restored_ms", "process_wall_ms"]:
+        values = [s[key] for s in samples]
+        summary[key] = {"median": statistics.median(values), "min": min(values), "max": max(values)}
+    summary["heavy_loaded"] = sorted({m for s in samples for m in s["heavy_loaded"]})
+    summary["restore_after_paint"] = all(s["restore_after_paint"] for s in samples)
+    summary["files"] = files
+    summary["runs"] = runs
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure time-to-first-window")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="Write the summary to this file")
+    parser.add_argument("--files", type=int, default=200, help="Tracks in the restored fixture folder")
+    parser.add_argument("--child", nargs=2, metavar=("SCRATCH", "FOLDER"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        sys.exit(0)
+
+    summary = run_benchmark(args.runs, args.files)
+    for key, stats in summary.items():
+        if isinstance(stats, dict):
+            print(f"{key:18} median {stats['median']:8.1f}  min {stats['min']:8.1f}  max {stats['max']:8.1f}")
+    print(f"heavy modules at first paint: {', '.join(summary['heavy_loaded']) or 'none'}")
+    print(f"restore started after first paint: {summary['restore_after_paint']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(summary, fh, indent=2)
@@ -0,0 +1,127 @@
+# bench_tags.py
+"""
+Tag read/write benchmark per audio format.
+
+Generates (or reuses) fixtures with bench_fixtures.py, one folder per
+format with and without a cover, then drives the real MusicTaggerApp code
+paths headless and reports the median per file:
+
+    read   session.get_effective_metadata with a cold disk_meta cache
+           (header-only fast_tags reader where it applies)
+    full   the same tags through a full music_tag.load_file
+    cover  load_cover_from_file
+    save   save_all_changes for the whole folder (tags + cover), per file
+
+plus the tags.read_fast / tags.read / tags.write / artwork.encode spans
+from perf_trace.
+
+    python bench_tags.py --reps 5 --json tags.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_fixtures import make_fixtures
+
+SPANS = ["tags.read_fast", "tags.read", "tags.write", "artwork.encode"]
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - t0) * 1000
+
+
+def bench_case(window, case, reps, cover_path):
+    import music_tag
+    from perf_trace import tracer
+    paths = [f["path"] for f in case["files"]]
+    window.reload_file_list(case["folder"])
+
+    read_ms, full_ms, cover_ms, save_ms = [], [], [], []
+    tracer.reset()
+    for rep in range(reps):
+        for path in paths:
+            window.disk_meta.clear()
+            read_ms.append(timed(window.session.get_effective_metadata, path))
+            full_ms.append(timed(lambda: window.session.read_tags(path, music_tag.load_file(path))))
+            cover_ms.append(timed(window.load_cover_from_file, path))
+
+        # Different values every rep so each save really writes
+        pending = window.pending_changes
+        pending.set_many(paths, 'comment', f"bench rep {rep}")
+        pending.set_many(paths, 'album', f"Oilsjt Benchmark {rep}")
+        if case["artwork"]:
+            pending.set_many(paths, '_artwork_path', cover_path)
+        save_ms.append(timed(window.save_all_changes) / len(paths))
+
+    spans = tracer.snapshot()
+    return {
+        "format": case["format"],
+        "artwork": case["artwork"],
+        "files": len(paths),
+        "mean_bytes": int(statistics.mean(f["bytes"] for f in case["files"])),
+        "read_ms": statistics.median(read_ms),
+        "full_read_ms": statistics.median(full_ms),
+        "cover_ms": statistics.median(cover_ms),
+        "save_ms_per_file": statistics.median(save_ms),
+        "spans": {name: {"count": spans[name]["count"], "p50_ms": spans[name]["p50_ms"]}
+                  for name in SPANS if name in spans}
+    }
+
+
+def run_benchmark(fixtures_dir, reps, seconds, copies):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+
+    manifest = make_fixtures(fixtures_dir, seconds, copies=copies)
+
+    from PyQt6.QtCore import QSettings
+    from bench_fixtures import cover_jpeg
+    from mainwindow import MusicTaggerApp
+    from artwork_index import artwork_index
+    # Settings, logs, undo journal and artwork index all live in the scratch dir,
+    # so the benchmark leaves the user's profile alone
+    scratch = tempfile.mkdtemp(prefix="eirekes-bench-")
+    settings = QSettings(os.path.join(scratch, "settings.ini"), QSettings.Format.IniFormat)
+    artwork_index.cache_file = os.path.join(scratch, "artwork_index.json")
+    window = MusicTaggerApp(settings=settings, log_dir=os.path.join(scratch, "logs"))
+    window.chk_replaygain.setChecked(False)
+
+    cover_path = os.path.join(scratch, "cover.jpg")
+    with open(cover_path, 'wb') as fh:
+        fh.write(cover_jpeg())
+
+    try:
+        results = [bench_case(window, case, reps, cover_path) for case in manifest["cases"]]
+    finally:
+        window.close()
+        app.quit()
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark tag reads/writes per format")
+    parser.add_argument("--fixtures", default=os.path.join(os.path.expanduser("~"), "EirekesManagerCache", "bench-fixtures"))
+    parser.add_argument("--seconds", type=int, nargs="+", default=[30, 240])
+    parser.add_argument("--copies", type=int, default=3)
+    parser.add_argument("--reps", type=int, default=5)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.fixtures, args.reps, args.seconds, args.copies)
+    print(f"{'format':6} {'cover':6} {'files':>5} {'size KB':>8} {'read ms':>8} {'full ms':>8} {'cover ms':>9} {'save ms/f':>10}")
+    for r in results:
+        print(f"{r['format']:6} {'yes' if r['artwork'] else 'no':6} {r['files']:5} {r['mean_bytes'] / 1024:8.0f} "
+              f"{r['read_ms']:8.2f} {r['full_read_ms']:8.2f} {r['cover_ms']:9.2f} {r['save_ms_per_file']:10.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
@@ -0,0 +1,141 @@
+# bench_workflow.py
+"""
+End-to-end workflow benchmark at library scale.
+
+Builds a folder of N tagged files (copies of one small fixture), then drives
+MusicTaggerApp headless through a full season's workflow and reports wall
+time and peak traced memory per step:
+
+    open        reload_file_list
+    stage       stage_matches with a web-matcher sized track list
+    select      multi-select of --select rows (on_selection_changed)
+    select_all  select every row
+    edit        typing into the Artist field + flush_manual_edits
+    save        save_all_changes (tags + rename of every staged file)
+
+    python bench_workflow.py --files 100 1000 --select 300 --json workflow.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench_fixtures import write_wav, tag_file, FORMATS
+
+
+def build_library(folder, count, fmt):
+    """count copies of one tagged fixture; returns the sorted paths."""
+    os.makedirs(folder, exist_ok=True)
+    template = os.path.join(folder, f"template.{fmt}")
+    wav_path = os.path.join(folder, "template-source.wav")
+    write_wav(wav_path, 0.25)
+    if FORMATS[fmt] is None:
+        os.replace(wav_path, template)
+    else:
+        import subprocess
+        subprocess.run(["ffmpeg", "-v", "error", "-y", "-i", wav_path] + FORMATS[fmt] + [template], check=True)
+        os.remove(wav_path)
+    tag_file(template, 1)
+
+    paths = []
+    for i in range(1, count + 1):
+        path = os.path.join(folder, f"track {i:05d}.{fmt}")
+        shutil.copyfile(template, path)
+        paths.append(path)
+    os.remove(template)
+    return paths
+
+
+class StepTimer:
+    def __init__(self, app):
+        self.app = app
+        self.results = []
+
+    def run(self, name, func, *args):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        t0 = time.perf_counter()
+        func(*args)
+        # Let queued signals and repaints land inside the step that caused them
+        self.app.processEvents()
+        wall_ms = (time.perf_counter() - t0) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        self.results.append({"step": name, "wall_ms": wall_ms, "peak_mib": (peak - base) / (1024 * 1024)})
+
+
+def select_rows(window, first, last):
+    from PyQt6.QtCore import QItemSelection, QItemSelectionModel
+    view = window.file_list_view
+    model = view.model()
+    selection = QItemSelection(model.index(first, 0), model.index(last, 0))
+    flags = QItemSelectionModel.SelectionFlag.ClearAndSelect | QItemSelectionModel.SelectionFlag.Rows
+    view.selectionModel().select(selection, flags)
+
+
+def type_text(line_edit, text):
+    # What the user typing does: textEdited per keystroke
+    for i in range(1, len(text) + 1):
+        line_edit.setText(text[:i])
+        line_edit.textEdited.emit(text[:i])
+
+
+def run_size(app, count, select, fmt):
+    from PyQt6.QtCore import QSettings
+    from mainwindow import MusicTaggerApp
+    from artwork_index import artwork_index
+    scratch = tempfile.mkdtemp(prefix="eirekes-workflow-")
+    folder = os.path.join(scratch, "library")
+    paths = build_library(folder, count, fmt)
+
+    # Settings, logs, undo journal and artwork index all stay in the scratch dir
+    settings = QSettings(os.path.join(scratch, "settings.ini"), QSettings.Format.IniFormat)
+    artwork_index.cache_file = os.path.join(scratch, "artwork_index.json")
+    window = MusicTaggerApp(settings=settings, log_dir=os.path.join(scratch, "logs"))
+    window.chk_replaygain.setChecked(False)
+
+    track_data = [[str(i), f"Liedje {i}", f"Groep {i % 40}", "", f"Origineel {i}"] for i in range(1, count + 1)]
+    album_data = ["Oilsjt Benchmark", "", "2025", "", ""]
+    options = {'title': True, 'artist': True, 'track': True, 'rename': True, 'lyrics': False}
+
+    timer = StepTimer(app)
+    tracemalloc.start()
+    timer.run("open", window.reload_file_list, folder)
+    timer.run("stage", window.stage_matches, paths, track_data, album_data, options)
+    timer.run("select", select_rows, window, 0, min(select, count) - 1)
+    timer.run("select_all", select_rows, window, 0, count - 1)
+    timer.run("edit", lambda: (type_text(window.meta_fields["Artist"], "De Kaaiman"), window.flush_manual_edits()))
+    timer.run("save", window.save_all_changes)
+    tracemalloc.stop()
+
+    window.close()
+    shutil.rmtree(scratch, ignore_errors=True)
+    return {"files": count, "steps": timer.results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless workflow benchmark")
+    parser.add_argument("--files", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--select", type=int, default=300, help="Rows in the partial multi-select")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="wav")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+
+    results = []
+    for count in args.files:
+        result = run_size(app, count, args.select, args.format)
+        results.append(result)
+        print(f"--- {count} files ---")
+        for step in result["steps"]:
+            print(f"{step['step']:11} {step['wall_ms']:10.1f} ms   peak {step['peak_mib']:8.2f} MiB")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
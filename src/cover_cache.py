@@ -0,0 +1,105 @@
+# cover_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+from PyQt6.QtCore import Qt, QBuffer, QIODevice, QByteArray
+from PyQt6.QtGui import QImage
+from perf_trace import span
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), "EirekesManagerCache", "covers")
+MAX_SIZE = 600
+
+
+class CoverCache:
+    """
+    Album covers on disk, keyed by the hash of the downloaded bytes.
+
+    Each cover is resized to at most MAX_SIZE px and stored as JPEG once;
+    the same picture behind several URLs ends up as one file. The returned
+    path is what gets staged as _artwork_path.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._url_index = None
+
+    def fetch(self, url, session):
+        """Downloads (or reuses) the cover behind url; returns a local path or None."""
+        if not url: return None
+        cached = self._lookup(url)
+        if cached: return cached
+
+        try:
+            with span("scrape.request", url=url):
+                response = session.get(url, timeout=15)
+                response.raise_for_status()
+            path = self.store_bytes(response.content)
+        except Exception as e:
+            logging.error(f"Cover Error: {e}")
+            return None
+
+        if path:
+            self._remember(url, path)
+        return path
+
+    def store_bytes(self, data, max_size=MAX_SIZE):
+        """Stores image bytes (JPEG, resized unless max_size is None) under their content hash."""
+        if not data: return None
+        digest = hashlib.sha1(data).hexdigest()
+        path = os.path.join(self.cache_dir, f"{digest}.jpg" if max_size else f"{digest}-full.jpg")
+        if os.path.exists(path): return path
+
+        with span("artwork.encode"):
+            image = QImage.fromData(data)
+            if image.isNull(): return None
+            if max_size and (image.width() > max_size or image.height() > max_size):
+                image = image.scaled(max_size, max_size, Qt.AspectRatioMode.KeepAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation)
+            ba = QByteArray()
+            buf = QBuffer(ba)
+            buf.open(QIODevice.OpenModeFlag.WriteOnly)
+            image.save(buf, "JPEG", quality=90)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(bytes(ba))
+        os.replace(tmp_path, path)
+        return path
+
+    # =========================================================
+    # URL INDEX
+    # =========================================================
+    def _load_index(self):
+        if self._url_index is None:
+            try:
+                with open(self._index_path, 'r', encoding='utf-8') as fh:
+                    self._url_index = json.load(fh)
+            except (OSError, ValueError):
+                self._url_index = {}
+        return self._url_index
+
+    def _lookup(self, url):
+        with self._lock:
+            path = self._load_index().get(url)
+        if path and os.path.exists(path): return path
+        return None
+
+    def _remember(self, url, path):
+        with self._lock:
+            index = self._load_index()
+            index[url] = path
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(self._index_path, 'w', encoding='utf-8') as fh:
+                    json.dump(index, fh)
+            except OSError:
+                pass
+
+
+# One cache for the whole app
+cover_cache = CoverCache()
@@ -1,12 +1,12 @@
-import csv
 import os
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QListWidget, QAbstractItemView, QGroupBox, 
                              QSplitter, QWidget, QListWidgetItem, QApplication,
                              QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox)
 from PyQt6.QtCore import Qt, pyqtSignal
-from styles import DARK_THEME
 # FIX: Import from the renamed file 'app_translations'
+from profiler_capture import profiler
+from parade_csv import parse_parade_csv
 from app_translations import tr
 
 class CsvMatcherDialog(QDialog):
@@ -17,9 +17,9 @@ class CsvMatcherDialog(QDialog):
         self.setWindowTitle(tr("csv_title"))
         self.resize(1100, 750)
         
-        self.local_files = current_files 
+        self.local_files = []
         self.init_ui()
-        self.setStyleSheet(DARK_THEME)
+        self.set_files(current_files)
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -49,11 +49,6 @@ class CsvMatcherDialog(QDialog):
         self.file_list = QListWidget()
         self.file_list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
         self.file_list.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
-        
-        for f_path in self.local_files:
-            item = QListWidgetItem(os.path.basename(f_path))
-            item.setData(Qt.ItemDataRole.UserRole, f_path)
-            self.file_list.addItem(item)
         left_box.addWidget(self.file_list)
         
         # Remove Button for Files
@@ -124,57 +119,35 @@ class CsvMatcherDialog(QDialog):
         self.file_list.verticalScrollBar().valueChanged.connect(self.csv_table.verticalScrollBar().setValue)
         self.csv_table.verticalScrollBar().valueChanged.connect(self.file_list.verticalScrollBar().setValue)
 
+    def set_files(self, current_files):
+        self.local_files = current_files
+        self.file_list.clear()
+        for f_path in self.local_files:
+            item = QListWidgetItem(os.path.basename(f_path))
+            item.setData(Qt.ItemDataRole.UserRole, f_path)
+            self.file_list.addItem(item)
+
     def load_csv(self):
         f_name, _ = QFileDialog.getOpenFileName(self, "Open CSV", "", "CSV Files (*.csv);;Text Files (*.txt)")
         if not f_name: return
-        
+
+        with profiler.capture("load_csv"):
+            self.populate_from_csv(f_name)
+
+    def populate_from_csv(self, f_name):
         self.lbl_status.setText(os.path.basename(f_name))
         self.csv_table.setRowCount(0)
         
         try:
-            with open(f_name, mode='r', encoding='utf-8-sig') as f:
-                dialect = csv.Sniffer().sniff(f.read(1024))
-                f.seek(0)
-                reader = csv.reader(f, dialect)
-                rows = list(reader)
-                
-                header_idx = -1
-                col_map = {"track": -1, "artist": -1, "title": -1}
-                
-                for i, row in enumerate(rows):
-                    row_lower = [c.lower().strip() for c in row]
-                    if "stoetnummer" in row_lower and "akv" in row_lower:
-                        header_idx = i
-                        try:
-                            col_map["track"] = row_lower.index("stoetnummer")
-                            col_map["artist"] = row_lower.index("akv")
-                            col_map["title"] = row_lower.index("thema")
-                        except ValueError:
-                            pass
-                        break
-                
-                if header_idx == -1:
-                    header_idx = 0
-                    if len(rows[0]) >= 3:
-                        col_map = {"track": 0, "artist": 1, "title": 4} 
-                    else:
-                        QMessageBox.warning(self, tr("csv_warning"), tr("csv_guess_warning"))
-                        col_map = {"track": 0, "artist": 1, "title": 2}
-
-                data_rows = rows[header_idx+1:]
-                self.csv_table.setRowCount(len(data_rows))
-                
-                for i, row in enumerate(data_rows):
-                    def get_col(idx):
-                        return row[idx] if idx >= 0 and idx < len(row) else ""
+            parade_rows, guessed = parse_parade_csv(f_name)
+            if guessed:
+                QMessageBox.warning(self, tr("csv_warning"), tr("csv_guess_warning"))
 
-                    track_val = get_col(col_map["track"])
-                    artist_val = get_col(col_map["artist"])
-                    title_val = get_col(col_map["title"])
-                    
-                    self.csv_table.setItem(i, 0, QTableWidgetItem(str(track_val)))
-                    self.csv_table.setItem(i, 1, QTableWidgetItem(str(title_val)))
-                    self.csv_table.setItem(i, 2, QTableWidgetItem(str(artist_val)))
+            self.csv_table.setRowCount(len(parade_rows))
+            for i, (track_val, title_val, artist_val) in enumerate(parade_rows):
+                self.csv_table.setItem(i, 0, QTableWidgetItem(track_val))
+                self.csv_table.setItem(i, 1, QTableWidgetItem(title_val))
+                self.csv_table.setItem(i, 2, QTableWidgetItem(artist_val))
             
             self.btn_apply.setEnabled(True)
             self.btn_link.setEnabled(True)
@@ -0,0 +1,304 @@
+# fast_tags.py
+"""
+Header-only tag reader for the file list.
+
+Reads just the tag structures with small bounded reads (seek + read): the
+ID3v2 frames of MP3/WAV, the moov/udta/meta/ilst atoms of MP4 and the
+VORBIS_COMMENT block of FLAC. Artwork (APIC, covr, PICTURE) and the audio
+data are seeked over, never read. Returns the same fields and string
+forms as reading through music_tag, or None for anything it cannot read
+exactly the same way (ID3v1, numeric genres, compressed frames,
+multi-value fields, ...) so the caller falls back to the full reader.
+"""
+import os
+import re
+import struct
+
+FIELDS = ("title", "artist", "album", "year", "tracknumber", "genre",
+          "albumartist", "composer", "discnumber", "comment")
+MAX_TEXT = 1024 * 1024      # bigger than any tag text; guards the bounded reads
+
+ID3_FRAMES = {
+    "TIT2": "title", "TPE1": "artist", "TALB": "album", "TDRC": "year", "TYER": "year",
+    "TRCK": "tracknumber", "TCON": "genre", "TPE2": "albumartist", "TCOM": "composer",
+    "TPOS": "discnumber", "COMM": "comment"
+}
+ID3_FRAMES_V22 = {
+    "TT2": "title", "TP1": "artist", "TAL": "album", "TYE": "year",
+    "TRK": "tracknumber", "TCO": "genre", "TP2": "albumartist", "TCM": "composer",
+    "TPA": "discnumber", "COM": "comment"
+}
+ID3_ENCODINGS = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}
+MP4_ATOMS = {
+    b"\xa9nam": "title", b"\xa9ART": "artist", b"\xa9alb": "album", b"\xa9day": "year",
+    b"trkn": "tracknumber", b"\xa9gen": "genre", b"aART": "albumartist", b"\xa9wrt": "composer",
+    b"disk": "discnumber", b"\xa9cmt": "comment"
+}
+VORBIS_KEYS = {
+    "TITLE": "title", "ARTIST": "artist", "ALBUM": "album", "DATE": "year", "YEAR": "year",
+    "TRACKNUMBER": "tracknumber", "GENRE": "genre", "ALBUMARTIST": "albumartist",
+    "COMPOSER": "composer", "DISCNUMBER": "discnumber", "COMMENT": "comment"
+}
+
+
+class Unsupported(Exception):
+    """Something only the full reader handles the same way."""
+
+
+def read_fast_tags(path):
+    """{tag key: str} for FIELDS, or None when the full reader is needed."""
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None: return None
+    try:
+        with open(path, 'rb') as fh:
+            raw = reader(fh)
+        return normalize(raw)
+    except (OSError, struct.error, ValueError, IndexError, Unsupported):
+        # UnicodeDecodeError is a ValueError
+        return None
+
+
+def normalize(raw):
+    data = {}
+    for key in FIELDS:
+        val = raw.get(key) or ""
+        if key in ("tracknumber", "discnumber"):
+            # "3/12" and "03" are the number 3, as music_tag reports it
+            num = val.split("/")[0].strip()
+            if num and not num.isdigit(): raise Unsupported(f"{key} {val!r}")
+            val = str(int(num)) if num and int(num) > 0 else ""
+        elif key == "year":
+            m = re.match(r"\s*(\d{4})", val)
+            if val and not m: raise Unsupported(f"year {val!r}")
+            val = m.group(1) if m else ""
+        data[key] = val
+    return data
+
+
+def file_size(fh):
+    fh.seek(0, os.SEEK_END)
+    return fh.tell()
+
+
+# =========================================================
+# ID3v2 (MP3, WAV)
+# =========================================================
+def syncsafe(b):
+    return (b[0] & 0x7f) << 21 | (b[1] & 0x7f) << 14 | (b[2] & 0x7f) << 7 | (b[3] & 0x7f)
+
+
+def read_id3(fh, start=0):
+    """Frames of the ID3v2 tag at start, or None if there is no tag there."""
+    fh.seek(start)
+    header = fh.read(10)
+    if len(header) < 10 or header[:3] != b"ID3": return None
+    major, flags = header[3], header[5]
+    if major not in (2, 3, 4): raise Unsupported(f"ID3v2.{major}")
+    if flags & 0x80: raise Unsupported("unsynchronised tag")
+    pos = start + 10
+    end = pos + syncsafe(header[6:10])
+
+    if flags & 0x40:
+        if major == 2: raise Unsupported("compressed ID3v2.2")
+        fh.seek(pos)
+        ext = fh.read(4)
+        pos += syncsafe(ext) if major == 4 else struct.unpack(">I", ext)[0] + 4
+
+    frames, head_len = (ID3_FRAMES_V22, 6) if major == 2 else (ID3_FRAMES, 10)
+    raw = {}
+    comments = []
+    while pos + head_len <= end:
+        fh.seek(pos)
+        head = fh.read(head_len)
+        if len(head) < head_len or head[0] == 0: break      # padding
+        if major == 2:
+            frame_id, size, frame_flags = head[:3], int.from_bytes(head[3:6], "big"), 0
+        else:
+            frame_id = head[:4]
+            size = syncsafe(head[4:8]) if major == 4 else struct.unpack(">I", head[4:8])[0]
+            frame_flags = struct.unpack(">H", head[8:10])[0]
+        pos += head_len + size
+
+        key = frames.get(frame_id.decode('latin-1'))
+        if key is None or (key in raw and key != "comment"):
+            continue            # APIC and everything else: seeked over, never read
+        if size > MAX_TEXT: raise Unsupported(f"{frame_id!r} frame of {size} bytes")
+        payload = fh.read(size)
+        if major == 3 and frame_flags & 0x00C0: raise Unsupported("compressed/encrypted frame")
+        if major == 4:
+            if frame_flags & 0x000E: raise Unsupported("compressed/encrypted/unsynchronised frame")
+            if frame_flags & 0x0001: payload = payload[4:]      # data length indicator
+
+        if key == "comment":
+            comments.append(decode_comment(payload))
+        else:
+            raw[key] = decode_text(payload)
+
+    if raw.get("genre") and re.match(r"\(?\d+\)?", raw["genre"]):
+        # ID3v1 genre numbers are translated by the full reader
+        raise Unsupported(f"genre {raw['genre']!r}")
+    if len(comments) > 1:
+        # music_tag joins every COMM frame (iTunNORM included)
+        raise Unsupported(f"{len(comments)} COMM frames")
+    raw["comment"] = comments[0][1] if comments else ""
+    return raw
+
+
+def decode_text(payload, single=True):
+    if not payload: return ""
+    encoding = ID3_ENCODINGS.get(payload[0])
+    if encoding is None: raise Unsupported(f"text encoding {payload[0]}")
+    values = [v for v in payload[1:].decode(encoding).split("\x00") if v]
+    if single and len(values) > 1: raise Unsupported("multi-value frame")
+    return values[0] if values else ""
+
+
+def decode_comment(payload):
+    """(description, text) of a COMM frame."""
+    if len(payload) < 4: return "", ""
+    enc = payload[0]
+    body = payload[4:]              # skip the language code
+    if enc in (1, 2):
+        idx = next((i for i in range(0, len(body) - 1, 2) if body[i:i + 2] == b"\x00\x00"), -1)
+        term = 2
+    else:
+        idx, term = body.find(b"\x00"), 1
+    if idx < 0:
+        return decode_text(bytes([enc]) + body), ""
+    return decode_text(bytes([enc]) + body[:idx]), decode_text(bytes([enc]) + body[idx + term:])
+
+
+def read_mp3(fh):
+    raw = read_id3(fh)
+    size = file_size(fh)
+    if size >= 128:
+        fh.seek(size - 128)
+        if fh.read(3) == b"TAG":
+            raise Unsupported("ID3v1 tag")
+    return raw if raw is not None else {}
+
+
+def read_wav(fh):
+    header = fh.read(12)
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE": raise Unsupported("not RIFF/WAVE")
+    end = file_size(fh)
+    pos = 12
+    while pos + 8 <= end:
+        fh.seek(pos)
+        chunk_id, size = struct.unpack("<4sI", fh.read(8))
+        if chunk_id.lower() == b"id3 ":
+            return read_id3(fh, pos + 8) or {}
+        pos += 8 + size + (size & 1)    # the audio chunk is skipped, not read
+    return {}
+
+
+# =========================================================
+# MP4 (M4A)
+# =========================================================
+def iter_atoms(fh, start, end):
+    pos = start
+    while pos + 8 <= end:
+        fh.seek(pos)
+        size, kind = struct.unpack(">I4s", fh.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", fh.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header: raise Unsupported("bad atom size")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def find_atom(fh, start, end, kind):
+    for atom_kind, body, atom_end in iter_atoms(fh, start, end):
+        if atom_kind == kind: return body, atom_end
+    return None
+
+
+def read_mp4(fh):
+    found = find_atom(fh, 0, file_size(fh), b"moov")
+    if not found: raise Unsupported("no moov atom")
+    for kind in (b"udta", b"meta"):
+        found = find_atom(fh, found[0], found[1], kind)
+        if not found: return {}
+    body, end = found
+    # iTunes' meta is a full atom (version + flags before the children)
+    fh.seek(body)
+    if fh.read(4) == b"\x00\x00\x00\x00": body += 4
+    found = find_atom(fh, body, end, b"ilst")
+    if not found: return {}
+
+    raw = {}
+    numeric_genre = False
+    for kind, item_start, item_end in iter_atoms(fh, *found):
+        if kind == b"gnre":
+            numeric_genre = True
+            continue
+        key = MP4_ATOMS.get(kind)
+        if key is None or key in raw:
+            continue            # covr and the rest: seeked over, never read
+        if item_end - item_start > MAX_TEXT: raise Unsupported(f"{kind!r} atom too big")
+        data = find_atom(fh, item_start, item_end, b"data")
+        if not data: continue
+        fh.seek(data[0])
+        value = fh.read(data[1] - data[0])[8:]       # skip type + locale
+        if key in ("tracknumber", "discnumber"):
+            if len(value) >= 4: raw[key] = str(struct.unpack(">H", value[2:4])[0])
+        else:
+            raw[key] = value.decode('utf-8')
+    if numeric_genre and not raw.get("genre"):
+        raise Unsupported("gnre atom")
+    return raw
+
+
+# =========================================================
+# FLAC
+# =========================================================
+def read_flac(fh):
+    marker = fh.read(4)
+    if marker[:3] == b"ID3":
+        # Some taggers put an ID3v2 tag in front of the stream
+        fh.seek(6)
+        fh.seek(10 + syncsafe(fh.read(4)))
+        marker = fh.read(4)
+    if marker != b"fLaC": raise Unsupported("no fLaC marker")
+
+    while True:
+        block = fh.read(4)
+        if len(block) < 4: return {}
+        is_last, kind = block[0] & 0x80, block[0] & 0x7f
+        length = int.from_bytes(block[1:4], "big")
+        if kind == 4:
+            if length > MAX_TEXT: raise Unsupported("huge VORBIS_COMMENT")
+            return parse_vorbis_comment(fh.read(length))
+        fh.seek(length, os.SEEK_CUR)        # STREAMINFO, SEEKTABLE, PICTURE, ...
+        if is_last: return {}
+
+
+def parse_vorbis_comment(data):
+    pos = 4 + struct.unpack_from("<I", data, 0)[0]      # vendor string
+    count = struct.unpack_from("<I", data, pos)[0]
+    pos += 4
+    values = {}
+    for _ in range(count):
+        length = struct.unpack_from("<I", data, pos)[0]
+        pos += 4
+        name, sep, value = data[pos:pos + length].decode('utf-8').partition("=")
+        pos += length
+        if sep and name.upper() in VORBIS_KEYS:
+            values.setdefault(name.upper(), []).append(value)
+
+    if "YEAR" in values and "DATE" not in values:
+        # music_tag only reads the year from DATE
+        raise Unsupported("YEAR without DATE")
+    raw = {}
+    for name in ("DATE", "YEAR") + tuple(n for n in VORBIS_KEYS if n not in ("DATE", "YEAR")):
+        if name not in values: continue
+        if len(values[name]) > 1: raise Unsupported(f"multiple {name}")
+        raw.setdefault(VORBIS_KEYS[name], values[name][0])
+    return raw
+
+
+READERS = {".mp3": read_mp3, ".wav": read_wav, ".m4a": read_mp4, ".mp4": read_mp4, ".flac": read_flac}
@@ -0,0 +1,112 @@
+# file_list_model.py
+import os
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+from PyQt6.QtGui import QBrush, QColor
+
+
+class FileListModel(QAbstractListModel):
+    """
+    Flat list model for the left pane. Rows are plain Python lists instead of
+    one QListWidgetItem per file, and a path -> row dict makes lookups O(1).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._paths = []
+        self._names = []
+        self._staged = []
+        self._row_of = {}
+        self._staged_brush = QBrush(QColor("#00ffff"))
+
+    # =========================================================
+    # QT MODEL API
+    # =========================================================
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid(): return 0
+        return len(self._paths)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid(): return None
+        row = index.row()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            name = self._names[row]
+            return f"* {name}" if self._staged[row] else name
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self._staged_brush if self._staged[row] else None
+        if role == Qt.ItemDataRole.UserRole:
+            return self._paths[row]
+        return None
+
+    # =========================================================
+    # CONTENT
+    # =========================================================
+    def set_files(self, paths):
+        self.beginResetModel()
+        self._paths = list(paths)
+        self._names = [os.path.basename(p) for p in self._paths]
+        self._staged = [False] * len(self._paths)
+        self._row_of = {p: row for row, p in enumerate(self._paths)}
+        self.endResetModel()
+
+    def clear(self):
+        self.set_files([])
+
+    def paths(self):
+        return list(self._paths)
+
+    def path_at(self, row):
+        return self._paths[row]
+
+    def row_for_path(self, path):
+        return self._row_of.get(path, -1)
+
+    def index_for_path(self, path):
+        row = self._row_of.get(path, -1)
+        if row < 0: return QModelIndex()
+        return self.index(row, 0)
+
+    # =========================================================
+    # STAGING
+    # =========================================================
+    def mark_staged(self, paths, names=None):
+        """
+        Flags files as changed, optionally with a predicted display name.
+        Emits a single dataChanged for the whole batch.
+        """
+        first, last = None, None
+        for path in paths:
+            row = self._row_of.get(path)
+            if row is None: continue
+            self._staged[row] = True
+            if names and path in names:
+                self._names[row] = names[path]
+            if first is None or row < first: first = row
+            if last is None or row > last: last = row
+
+        if first is not None:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, 0),
+                                  [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ForegroundRole])
+
+
+class FileFilterProxy(QSortFilterProxyModel):
+    """
+    Shows only the rows whose path is in the allowed set (None = all rows).
+    The set comes from the search index, so filtering never looks at the
+    row texts itself.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._allowed = None
+
+    def set_allowed(self, paths):
+        self._allowed = paths
+        self.invalidateFilter()
+
+    def is_filtered(self):
+        return self._allowed is not None
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._allowed is None: return True
+        return self.sourceModel().path_at(source_row) in self._allowed
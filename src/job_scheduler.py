@@ -0,0 +1,194 @@
+# job_scheduler.py
+import logging
+import threading
+import time
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from perf_trace import tracer
+
+# Priority classes, most urgent first
+SELECTION = 0      # what the user is looking at right now
+USER = 1           # work the user started (fetch, save helpers)
+PREFETCH = 2       # likely needed soon
+INDEX = 3          # background indexing
+
+CLASS_NAMES = {SELECTION: "selection", USER: "user", PREFETCH: "prefetch", INDEX: "index"}
+QUEUE_LIMITS = {SELECTION: 32, USER: 64, PREFETCH: 128, INDEX: 128}
+
+
+class CancelToken:
+    """Shared flag; jobs holding a cancelled token are skipped and never delivered."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class Job:
+    __slots__ = ("priority", "fn", "args", "token", "on_done", "on_error",
+                 "queued_at", "result", "error", "skipped")
+
+    def __init__(self, priority, fn, args, token, on_done, on_error):
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.token = token
+        self.on_done = on_done
+        self.on_error = on_error
+        self.queued_at = time.perf_counter()
+        self.result = None
+        self.error = None
+        self.skipped = False
+
+
+class _Feeder:
+    """Lazily submits fn(item) for a long list without flooding the queue."""
+
+    def __init__(self, priority, fn, items, on_done, token):
+        self.priority = priority
+        self.fn = fn
+        self.items = items
+        self.on_done = on_done
+        self.token = token
+        self.exhausted = False
+
+
+class _Runnable(QRunnable):
+    def __init__(self, scheduler, job):
+        super().__init__()
+        self.scheduler = scheduler
+        self.job = job
+
+    def run(self):
+        self.scheduler._run(self.job)
+
+
+class JobScheduler(QObject):
+    """
+    One pool for all background work.
+
+    Jobs run on a QThreadPool in priority order; results and errors are
+    handed back on the GUI thread through a queued signal. Every class has
+    a bounded queue: submit() returns None when it is full, and
+    submit_batch() tops the queue up as jobs finish. Jobs carry a
+    CancelToken (by default the current folder's token, which new_folder()
+    cancels). Queue wait and run time go to the tracer as
+    job.<class>.wait / job.<class>.run, with the queue depth as attribute.
+    """
+
+    _finished = pyqtSignal(object)
+
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self.folder_token = CancelToken()
+        self._lock = threading.Lock()
+        self._queued = {c: 0 for c in CLASS_NAMES}
+        self._running = 0
+        self._counts = {c: {"done": 0, "errors": 0, "cancelled": 0, "dropped": 0} for c in CLASS_NAMES}
+        self._feeders = []
+        self._finished.connect(self._deliver)
+
+    # =========================================================
+    # SUBMIT / CANCEL
+    # =========================================================
+    def submit(self, priority, fn, *args, on_done=None, on_error=None, token=None):
+        with self._lock:
+            if self._queued[priority] >= QUEUE_LIMITS[priority]:
+                self._counts[priority]["dropped"] += 1
+                return None
+            self._queued[priority] += 1
+
+        job = Job(priority, fn, args, token or self.folder_token, on_done, on_error)
+        # QThreadPool starts higher numbers first
+        self.pool.start(_Runnable(self, job), len(CLASS_NAMES) - priority)
+        return job
+
+    def submit_batch(self, priority, fn, items, on_done=None, token=None):
+        """Runs fn(item) for every item; at most half the class queue is used at a time."""
+        feeder = _Feeder(priority, fn, iter(items), on_done, token or self.folder_token)
+        self._feeders.append(feeder)
+        self._top_up()
+        return feeder
+
+    def new_folder(self):
+        """Cancels everything tied to the previous folder; returns the new token."""
+        self.folder_token.cancel()
+        self.folder_token = CancelToken()
+        self._feeders = [f for f in self._feeders if not f.token.cancelled]
+        return self.folder_token
+
+    def shutdown(self, timeout_ms=2000):
+        self.folder_token.cancel()
+        self._feeders = []
+        self.pool.clear()
+        self.pool.waitForDone(timeout_ms)
+        logging.info(f"Job scheduler stats: {self.stats()}")
+
+    def stats(self):
+        with self._lock:
+            return {CLASS_NAMES[c]: dict(self._counts[c], queued=self._queued[c]) for c in CLASS_NAMES}
+
+    # =========================================================
+    # WORKER THREADS
+    # =========================================================
+    def _run(self, job):
+        name = CLASS_NAMES[job.priority]
+        with self._lock:
+            self._queued[job.priority] -= 1
+            self._running += 1
+            depth = self._queued[job.priority]
+        started = time.perf_counter()
+        tracer.record(f"job.{name}.wait", (started - job.queued_at) * 1000, True, {"depth": depth})
+
+        if job.token.cancelled:
+            job.skipped = True
+        else:
+            try:
+                job.result = job.fn(*job.args)
+            except Exception as e:
+                job.error = e
+            tracer.record(f"job.{name}.run", (time.perf_counter() - started) * 1000, job.error is None)
+
+        with self._lock:
+            self._running -= 1
+        self._finished.emit(job)
+
+    # =========================================================
+    # GUI THREAD
+    # =========================================================
+    def _deliver(self, job):
+        counts = self._counts[job.priority]
+        if job.skipped or job.token.cancelled:
+            counts["cancelled"] += 1
+        elif job.error is not None:
+            counts["errors"] += 1
+            if job.on_error:
+                job.on_error(job.error)
+            else:
+                logging.warning(f"Background job {getattr(job.fn, '__name__', job.fn)} failed: {job.error}")
+        else:
+            counts["done"] += 1
+            if job.on_done:
+                job.on_done(job.result)
+        self._top_up()
+
+    def _top_up(self):
+        for feeder in self._feeders:
+            if feeder.token.cancelled: continue
+            limit = QUEUE_LIMITS[feeder.priority] // 2
+            while self._queued[feeder.priority] < limit:
+                try:
+                    item = next(feeder.items)
+                except StopIteration:
+                    feeder.exhausted = True
+                    break
+                self.submit(feeder.priority, feeder.fn, item, on_done=feeder.on_done, token=feeder.token)
+        self._feeders = [f for f in self._feeders if not f.exhausted and not f.token.cancelled]
@@ -0,0 +1,267 @@
+# loudness.py
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CACHE_FILE = os.path.join(os.path.expanduser("~"), "EirekesManagerCache", "loudness.json")
+
+RATE = 48000
+BLOCK = RATE // 10             # 100 ms segments, 4 make one 400 ms gating block
+ABSOLUTE_GATE = -70.0          # LUFS
+RELATIVE_GATE = -10.0          # LU below the ungated mean
+REFERENCE_LUFS = -18.0         # ReplayGain 2.0 reference level
+TAPS = 1 << 14                 # K-weighting impulse response, long decayed after 0.34 s
+FFT_SIZE = 1 << 20
+
+
+def available():
+    """Loudness analysis needs numpy and an ffmpeg binary on PATH."""
+    return np is not None and shutil.which("ffmpeg") is not None
+
+
+# =========================================================
+# ANALYSIS (runs in worker processes)
+# =========================================================
+def decode_pcm(path, frames):
+    """
+    Decodes any format ffmpeg understands to float32 stereo at 48 kHz and
+    yields it in chunks of up to `frames` frames, shape (m, 2), while
+    ffmpeg is still decoding: a whole file is never held in memory.
+    """
+    cmd = ["ffmpeg", "-v", "error", "-nostdin", "-i", path,
+           "-map", "0:a:0", "-f", "f32le", "-ac", "2", "-ar", str(RATE), "-"]
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err)
+        try:
+            while True:
+                data = proc.stdout.read(frames * 8)     # blocks until full or EOF
+                usable = len(data) - len(data) % 8
+                if usable:
+                    yield np.frombuffer(data[:usable], dtype=np.float32).reshape(-1, 2)
+                if len(data) < frames * 8:
+                    break
+            proc.stdout.close()
+            if proc.wait() != 0:
+                err.seek(0)
+                raise RuntimeError(err.read().decode('utf-8', 'replace').strip() or "ffmpeg failed")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+
+def k_weighting_response(n_fft):
+    """Frequency response of the BS.1770 pre-filter (shelf) followed by the RLB high-pass."""
+    # Coefficients as published for 48 kHz
+    shelf_b = [1.53512485958697, -2.69169618940638, 1.19839281085285]
+    shelf_a = [1.0, -1.69065929318241, 0.73248077421585]
+    hp_b = [1.0, -2.0, 1.0]
+    hp_a = [1.0, -1.99004745483398, 0.99007225036621]
+
+    z = np.exp(-1j * np.pi * np.arange(n_fft // 2 + 1) / (n_fft // 2))
+    def biquad(b, a):
+        return (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+    return biquad(shelf_b, shelf_a) * biquad(hp_b, hp_a)
+
+
+class KWeighting:
+    """
+    The K-weighting filter as FFT overlap-add over a stream of chunks of at
+    most STEP frames, instead of a per-sample IIR loop. The filter tail of
+    each chunk is carried into the next, so the output is the same as
+    filtering the whole signal at once.
+    """
+    STEP = FFT_SIZE - TAPS + 1
+
+    def __init__(self, channels=2):
+        impulse = np.fft.irfft(k_weighting_response(4 * TAPS), n=4 * TAPS)[:TAPS]
+        self.response = np.fft.rfft(impulse, n=FFT_SIZE)[:, None]
+        self.tail = np.zeros((TAPS - 1, channels), dtype=np.float64)
+
+    def process(self, chunk):
+        n = len(chunk)
+        filtered = np.fft.irfft(np.fft.rfft(chunk, n=FFT_SIZE, axis=0) * self.response, n=FFT_SIZE, axis=0)
+        filtered = filtered[:n + TAPS - 1]
+        filtered[:TAPS - 1] += self.tail
+        self.tail = filtered[n:].copy()
+        return filtered[:n]
+
+
+def block_powers(seg_power):
+    """Mean square of every 400 ms block (75 % overlap) from the 100 ms segment powers."""
+    if len(seg_power) < 4:
+        return np.zeros(0)
+    return (seg_power[:-3] + seg_power[1:-2] + seg_power[2:-1] + seg_power[3:]) / 4.0
+
+
+def gated_loudness(powers):
+    """Integrated loudness (LUFS) of a set of block powers, with both gates applied."""
+    powers = np.asarray(powers, dtype=np.float64)
+    if not len(powers):
+        return None
+    loudness = -0.691 + 10 * np.log10(np.maximum(powers, 1e-12))
+    powers = powers[loudness > ABSOLUTE_GATE]
+    if not len(powers):
+        return None
+
+    threshold = -0.691 + 10 * np.log10(powers.mean()) + RELATIVE_GATE
+    loudness = -0.691 + 10 * np.log10(powers)
+    powers = powers[loudness > threshold]
+    return float(-0.691 + 10 * np.log10(powers.mean()))
+
+
+def analyze_file(path):
+    """Worker entry point: integrated loudness, sample peak and the gating blocks."""
+    weighting = KWeighting()
+    segments = []
+    residue = np.zeros(0)           # filtered power of a 100 ms segment still incomplete
+    peak = 0.0
+    for chunk in decode_pcm(path, KWeighting.STEP):
+        peak = max(peak, float(np.abs(chunk).max()))
+        # Mean square per 100 ms segment, summed over the channels
+        power = np.concatenate([residue, (weighting.process(chunk) ** 2).sum(axis=1)])
+        full = len(power) // BLOCK
+        segments.append(power[:full * BLOCK].reshape(full, BLOCK).mean(axis=1))
+        residue = power[full * BLOCK:]
+
+    powers = block_powers(np.concatenate(segments) if segments else np.zeros(0))
+    return {
+        "lufs": gated_loudness(powers),
+        "peak": peak,
+        # Kept so album loudness can be gated over all tracks together
+        "blocks": [round(float(p), 9) for p in powers]
+    }
+
+
+# =========================================================
+# MAIN PROCESS
+# =========================================================
+def replaygain_values(track, album_lufs=None, album_peak=None):
+    """ReplayGain 2.0 tag values (strings as written in the file)."""
+    if track.get("lufs") is None:
+        return None
+    values = {
+        "replaygain_track_gain": f"{REFERENCE_LUFS - track['lufs']:.2f} dB",
+        "replaygain_track_peak": f"{track['peak']:.6f}",
+    }
+    if album_lufs is not None:
+        values["replaygain_album_gain"] = f"{REFERENCE_LUFS - album_lufs:.2f} dB"
+        values["replaygain_album_peak"] = f"{album_peak:.6f}"
+    return values
+
+
+class LoudnessAnalyzer:
+    """
+    Track/album loudness for a batch of files.
+
+    Decoding and filtering run in a process pool; results are cached on
+    disk keyed by (path, size, mtime) so files whose audio did not change
+    are not analysed again.
+    """
+
+    def __init__(self, cache_file=CACHE_FILE):
+        self.cache_file = cache_file
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def analyze(self, paths, max_workers=None, progress=None):
+        """{path: result} for every path that could be analysed."""
+        results = {}
+        todo = []
+        for path in dict.fromkeys(paths):
+            cached = self.cached(path)
+            if cached is not None:
+                results[path] = cached
+            else:
+                todo.append(path)
+
+        if todo:
+            workers = max_workers or min(len(todo), os.cpu_count() or 2)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(analyze_file, path): path for path in todo}
+                for done, future in enumerate(as_completed(futures), 1):
+                    path = futures[future]
+                    try:
+                        results[path] = future.result()
+                        self.store(path, results[path])
+                    except Exception as e:
+                        logging.error(f"Loudness Error ({os.path.basename(path)}): {e}")
+                    if progress:
+                        progress(done, len(todo))
+            self.save()
+        return results
+
+    def album_values(self, results):
+        """(album lufs, album peak) over a group of track results."""
+        blocks = [p for r in results for p in r.get("blocks", [])]
+        if not blocks:
+            return None, None
+        return gated_loudness(blocks), max(r["peak"] for r in results)
+
+    # =========================================================
+    # CACHE
+    # =========================================================
+    def _load(self):
+        if self._cache is None:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as fh:
+                    self._cache = json.load(fh)
+            except (OSError, ValueError):
+                self._cache = {}
+        return self._cache
+
+    def _stat_key(self, path):
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+
+    def cached(self, path):
+        try:
+            key = self._stat_key(path)
+        except OSError:
+            return None
+        with self._lock:
+            record = self._load().get(path)
+        if record and record.get("stat") == key:
+            return record["result"]
+        return None
+
+    def store(self, path, result):
+        try:
+            key = self._stat_key(path)
+        except OSError:
+            return
+        with self._lock:
+            self._load()[path] = {"stat": key, "result": result}
+
+    def rekey(self, old_path, new_path):
+        """After a save rewrote tags (and maybe renamed), the audio is unchanged."""
+        with self._lock:
+            record = self._load().pop(old_path, None)
+        if record:
+            self.store(new_path, record["result"])
+
+    def save(self):
+        with self._lock:
+            if self._cache is None: return
+            try:
+                os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+                tmp_path = self.cache_file + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as fh:
+                    json.dump(self._cache, fh)
+                os.replace(tmp_path, self.cache_file)
+            except OSError:
+                pass
+
+
+# One analyzer for the whole app
+loudness_analyzer = LoudnessAnalyzer()
@@ -3,78 +3,128 @@ import re
 from bs4 import BeautifulSoup
 from unidecode import unidecode
 import html
+import threading
+from urllib.parse import urlsplit
+from perf_trace import span
 
 BASE_URL = "https://oilsjterseliekes.be"
 
+
+def site_origin(url):
+    """scheme://host of a page; links on it are resolved against this."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}" if parts.netloc else BASE_URL
+
+
 class LyricsScraper:
+    def __init__(self, session=None):
+        # A shared Session keeps the connection to the site alive between requests
+        self.session = session or requests.Session()
+        self._album_maps = {}
+        self._album_lock = threading.Lock()
+
     # =========================================================
     # Get all /tracks/... links from an album page
     # =========================================================
     def get_track_links_from_album(self, album_url):
         try:
-            response = requests.get(album_url, timeout=15)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, "html.parser")
-            links = []
-
-            # Find ALL links
-            for a in soup.find_all("a", href=True):
-                href = a["href"]
-
-                # FIX: Check if '/tracks/' is anywhere in the link (not just at the start)
-                if "/tracks/" in href:
-                    # Handle full URLs (https://...)
-                    if href.startswith("http"):
-                        full_url = href
-                    # Handle relative URLs starting with / (/tracks/...)
-                    elif href.startswith("/"):
-                        full_url = BASE_URL + href
-                    # Handle relative URLs without slash (tracks/...)
-                    else:
-                        full_url = BASE_URL + "/" + href
-
-                    # Ensure we only keep links for this site
-                    if BASE_URL in full_url:
-                        if full_url not in links:
-                            links.append(full_url)
-            
-            return links
+            with span("scrape.request", url=album_url):
+                response = self.session.get(album_url, timeout=15)
+                response.raise_for_status()
+
+            return [url for url, _ in self.extract_track_links(response.text, site_origin(album_url))]
 
         except Exception as e:
             print(f"Error extracting links: {e}")
             return []
 
+    def extract_track_links(self, html_text, base_url=BASE_URL):
+        """[(url, link text)] for every /tracks/ link on an already downloaded album page."""
+        with span("scrape.parse"):
+            soup = BeautifulSoup(html_text, "html.parser")
+        links = []
+        seen = set()
+
+        # Find ALL links
+        for a in soup.find_all("a", href=True):
+            href = a["href"]
+
+            # FIX: Check if '/tracks/' is anywhere in the link (not just at the start)
+            if "/tracks/" in href:
+                # Handle full URLs (https://...)
+                if href.startswith("http"):
+                    full_url = href
+                # Handle relative URLs starting with / (/tracks/...)
+                elif href.startswith("/"):
+                    full_url = base_url + href
+                # Handle relative URLs without slash (tracks/...)
+                else:
+                    full_url = base_url + "/" + href
+
+                # Ensure we only keep links for this site
+                if base_url in full_url:
+                    if full_url not in seen:
+                        seen.add(full_url)
+                        links.append((full_url, a.get_text(" ", strip=True)))
+
+        return links
+
+    def build_track_index(self, html_text, base_url=BASE_URL):
+        """{normalized title: track url}, keyed on both the link text and the URL slug."""
+        index = {}
+        for url, text in self.extract_track_links(html_text, base_url):
+            slug = url.rstrip("/").rsplit("/", 1)[-1]
+            for key in (self.normalize_title(text), self.normalize_title(slug.replace("-", " "))):
+                if key and key not in index:
+                    index[key] = url
+        return index
+
     # =========================================================
-    # Extract lyrics from a single track page
+    # Extract title + lyrics from a single track page
     # =========================================================
-    def get_lyrics_from_track(self, track_url):
+    def get_track_page(self, track_url):
+        """(normalized title, lyrics) from one request; either may be None."""
         try:
-            response = requests.get(track_url, timeout=15)
-            response.raise_for_status()
+            with span("scrape.request", url=track_url):
+                response = self.session.get(track_url, timeout=15)
+                response.raise_for_status()
 
-            soup = BeautifulSoup(response.text, "html.parser")
+            with span("scrape.parse", url=track_url):
+                soup = BeautifulSoup(response.text, "html.parser")
+
+            title_tag = soup.find("h1")
+            title = self.normalize_title(title_tag.get_text()) if title_tag else None
 
             # Lyrics live here
             body = soup.find("div", class_="tekst")
             if not body:
-                return None
+                return title, None
 
             lyrics = body.get_text("\n", strip=True)
             lyrics = lyrics.strip()
 
             # Reject pages that are too small to be lyrics
             if len(lyrics.splitlines()) < 5:
-                return None
+                return title, None
 
-            return lyrics
+            return title, lyrics
         except:
-            return None
+            return None, None
+
+    def get_lyrics_from_track(self, track_url):
+        return self.get_track_page(track_url)[1]
 
     # =========================================================
     # Build {normalized_title: lyrics} map for an album
     # =========================================================
     def get_lyrics_map_from_album(self, album_url):
+        # Prefetch threads asking for the same album wait for one build
+        with self._album_lock:
+            if album_url not in self._album_maps:
+                self._album_maps[album_url] = self.build_lyrics_map(album_url)
+            return self._album_maps[album_url]
+
+    def build_lyrics_map(self, album_url):
         track_links = self.get_track_links_from_album(album_url)
         lyrics_map = {}
 
@@ -83,29 +133,30 @@ class LyricsScraper:
 
         for url in track_links:
             try:
-                # 1. Get Lyrics
-                lyrics = self.get_lyrics_from_track(url)
-                if not lyrics:
+                # Title comes from the track page itself to map it correctly
+                title, lyrics = self.get_track_page(url)
+                if not lyrics or not title:
                     continue
-
-                # 2. Get Title from the track page itself to map it correctly
-                response = requests.get(url, timeout=15)
-                soup = BeautifulSoup(response.text, "html.parser")
-
-                title_tag = soup.find("h1")
-                if not title_tag:
-                    continue
-
-                # Normalize title so it matches the album tracklist
-                title = self.normalize_title(title_tag.get_text())
                 lyrics_map[title] = lyrics
-                
+
             except Exception as e:
                 print(f"Error processing track {url}: {e}")
                 continue
 
         return lyrics_map
 
+    def lyrics_loader(self, album_url, title_key, track_url=None):
+        """
+        Deferred lookup for one track. With a known track URL that is a single
+        request; otherwise fall back to mapping every track page of the album
+        by its <h1> (done once per album).
+        """
+        def load():
+            if track_url:
+                return self.get_lyrics_from_track(track_url)
+            return self.get_lyrics_map_from_album(album_url).get(title_key)
+        return load
+
     # =========================================================
     # Helpers
     # =========================================================
@@ -116,4 +167,4 @@ class LyricsScraper:
         title = re.sub(r"[’'\"`]", "", title)
         title = re.sub(r"[^a-z0-9 ]+", " ", title)
         title = re.sub(r"\s+", " ", title)
-        return title.strip()
\ No newline at end of file
+        return title.strip()
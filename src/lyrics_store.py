@@ -0,0 +1,75 @@
+# lyrics_store.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LyricsStore:
+    """
+    Single shared home for scraped lyrics text.
+
+    The scraper registers one ref per track, either with the text or with a
+    loader that fetches the track page on first use. The matcher table,
+    stage_matches and pending_changes only pass that ref around; the text is
+    looked up when the save writes the .txt sidecar (or prefetched when the
+    user asks for lyrics in the matcher).
+    """
+
+    def __init__(self):
+        self._texts = {}
+        self._loaders = {}
+        self._lock = threading.Lock()
+
+    def put(self, key, text):
+        if not text: return ""
+        with self._lock:
+            self._texts[key] = text
+            self._loaders.pop(key, None)
+        return key
+
+    def register(self, key, loader):
+        """Lazy entry: loader() returns the text (or None) when first needed."""
+        with self._lock:
+            if key not in self._texts:
+                self._loaders[key] = loader
+        return key
+
+    def is_loaded(self, ref):
+        with self._lock:
+            return ref in self._texts
+
+    def get(self, ref, default=""):
+        if not ref: return default
+        with self._lock:
+            if ref in self._texts: return self._texts[ref] or default
+            loader = self._loaders.get(ref)
+        if loader is None: return default
+
+        # Network call happens outside the lock so prefetch can run in parallel
+        try:
+            text = loader() or ""
+        except Exception:
+            return default
+        with self._lock:
+            self._texts[ref] = text
+            self._loaders.pop(ref, None)
+        return text or default
+
+    def prefetch(self, refs, max_workers=6):
+        """Resolves lazy refs concurrently; returns how many have lyrics."""
+        todo = [ref for ref in dict.fromkeys(refs) if ref and not self.is_loaded(ref)]
+        if todo:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                list(pool.map(self.get, todo))
+        return sum(1 for ref in refs if ref and self.get(ref))
+
+    def __contains__(self, ref):
+        with self._lock:
+            return ref in self._texts or ref in self._loaders
+
+    def __len__(self):
+        with self._lock:
+            return len(self._texts)
+
+
+# One store for the whole app
+lyrics_store = LyricsStore()
@@ -1,10 +1,28 @@
 # main.py
 import sys
-from PyQt6.QtWidgets import QApplication
-from mainwindow import MusicTaggerApp
+import argparse
+import multiprocessing
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # Loudness analysis uses a process pool, which a frozen build needs this for
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="Eirekes Manager")
+    parser.add_argument("--serve", action="store_true", help="Run the local JSON-RPC automation API instead of the window")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve (127.0.0.1 only)")
+    parser.add_argument("--watch", metavar="CONFIG", help="Run the watch-folder daemon with this JSON config")
+    args, qt_args = parser.parse_known_args()
+
+    if args.serve:
+        from rpc_server import serve
+        sys.exit(serve(args.port))
+    if args.watch:
+        from watch_daemon import run_daemon
+        sys.exit(run_daemon(args.watch))
+
+    from PyQt6.QtWidgets import QApplication
+    from mainwindow import MusicTaggerApp
+    app = QApplication(sys.argv[:1] + qt_args)
     window = MusicTaggerApp()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -1,29 +1,39 @@
 import os
-import re
 import logging
-from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QLineEdit, QPushButton, QFileDialog, 
-                             QListWidget, QAbstractItemView, QGroupBox, 
+                             QListView, QAbstractItemView, QGroupBox, 
                              QMessageBox, QSplitter, QFormLayout, QScrollArea, 
-                             QListWidgetItem, QGraphicsDropShadowEffect, QMenuBar, QMenu)
-from PyQt6.QtCore import Qt, QTimer, QSettings, QUrl, QBuffer, QIODevice, QByteArray
-from PyQt6.QtGui import QPixmap, QKeySequence, QShortcut, QColor, QBrush, QAction, QDesktopServices, QImage
+                             QGraphicsDropShadowEffect, QMenuBar, QMenu, QCheckBox)
+from PyQt6.QtCore import Qt, QTimer, QSettings, QUrl, QEvent
+from PyQt6.QtGui import QPixmap, QKeySequence, QShortcut, QColor, QAction, QDesktopServices, QImage
 
-import music_tag
-# Voeg deze regels toe:
-from mutagen.mp4 import MP4, MP4Cover
-from mutagen.id3 import ID3, APIC
-
-
-from matcher import WebMatcherDialog
-from csv_matcher import CsvMatcherDialog
+# music_tag, mutagen and the matcher dialogs (which pull in requests/bs4)
+# are imported where they are first used, so the window can show before
+# those modules have been loaded.
 from styles import DARK_THEME
+from file_list_model import FileListModel, FileFilterProxy
+from selection_aggregate import SelectionAggregate
+from save_journal import SaveJournal
+from search_index import SearchIndex
+from job_scheduler import JobScheduler, SELECTION, USER, INDEX
+from artwork_index import artwork_index, cover_digest
+from fast_tags import read_fast_tags
+from rename_planner import DEFAULT_TEMPLATE
+from tagging_core import TaggingSession, TAG_MAP
+from perf_trace import span
+from profiler_capture import profiler
+from app_logging import setup_logging
 from app_translations import tr, set_language, get_current_language
 
 class MusicTaggerApp(QMainWindow):
-    def __init__(self):
+    restore_pending = False     # set on first show, cleared once the session is restored
+    saving = False              # a batch save is running (its progress pumps the event loop)
+
+    def __init__(self, settings=None, log_dir=None):
         super().__init__()
-        self.settings = QSettings("OilsjterseLiekes", "MetadataMaster")
+        # The benchmarks pass their own settings and log dir so they never touch the user's
+        self.settings = settings or QSettings("OilsjterseLiekes", "MetadataMaster")
         
         # Load Language Preference
         saved_lang = self.settings.value("language", "en")
@@ -32,38 +42,53 @@ class MusicTaggerApp(QMainWindow):
         self.setWindowTitle(tr("app_title"))
         self.resize(1200, 800)
         
-        self.pending_changes = {} 
+        self.web_dialog = None
+        self.csv_dialog = None
 
         # --- LOGGING SETUP ---
-        self.log_dir = os.path.join(os.path.expanduser("~"), "EirekesManagerLogs")
+        self.log_dir = log_dir or os.path.join(os.path.expanduser("~"), "EirekesManagerLogs")
         os.makedirs(self.log_dir, exist_ok=True)
         self.log_file = os.path.join(self.log_dir, "application.log")
 
-        # Reset handlers to avoid duplicate logs if app restarts
-        for handler in logging.root.handlers[:]:
-            logging.root.removeHandler(handler)
-
-        logging.basicConfig(
-            filename=self.log_file, 
-            level=logging.INFO, 
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            filemode='a'
-        )
+        # Rotating text + JSON-lines logs, written from a background thread
+        setup_logging(self.log_dir)
         logging.info("Application Started")
 
-        self.tag_map = {
-            "Title": "title", "Artist": "artist", "Album": "album",
-            "Year": "year", "Track": "tracknumber", "Genre": "genre",
-            "Album Artist": "albumartist", "Composer": "composer",
-            "Discnumber": "discnumber", "Comment": "comment"
-        }
+        self.tag_map = TAG_MAP
+
+        # Staged changes, the disk tag cache and the save pipeline live in a
+        # widget-free session (shared with the automation server)
+        self.session = TaggingSession(os.path.join(self.log_dir, "save_journal.jsonl"),
+                                      os.path.join(self.log_dir, "last_save.jsonl"),
+                                      self.settings.value("rename_template", DEFAULT_TEMPLATE))
+        self.session.on_disk_read = lambda path: self.index_files([path])
+        self.pending_changes = self.session.pending_changes
+        self.disk_meta = self.session.disk_meta
+        self.search_index = SearchIndex()
+        # All background work (tag prefetch, cover thumbnails) goes through one pool
+        self.jobs = JobScheduler(parent=self)
+        self.current_folder = None
+        # Running common-values state of the current selection
+        self.selection_aggregate = SelectionAggregate(self.tag_map.values())
+
+        # Manual edits are debounced and applied to the selection in one go
+        self.queued_edits = {}
+        self.edit_targets = []
+        self.edit_timer = QTimer(self)
+        self.edit_timer.setSingleShot(True)
+        self.edit_timer.setInterval(150)
+        self.edit_timer.timeout.connect(self.flush_manual_edits)
 
         self.init_ui()
         self.init_notification_system()
         self.setup_shortcuts()
-        self.setStyleSheet(DARK_THEME)
+        # Theme once for the whole application, so dialogs don't re-polish it
+        app = QApplication.instance()
+        if app and not app.styleSheet():
+            app.setStyleSheet(DARK_THEME)
         
-        self.load_last_folder_on_startup()
+        # Crash recovery and folder restore run after the first paint
+        self.startup_done = False
 
     def init_ui(self):
         main_widget = QWidget()
@@ -89,6 +114,20 @@ class MusicTaggerApp(QMainWindow):
         action_logs = QAction("📂 Open Logs Folder", self)
         action_logs.triggered.connect(self.open_log_folder)
         help_menu.addAction(action_logs)
+        action_undo = QAction("↩ Undo Last Save", self)
+        action_undo.triggered.connect(self.undo_last_save)
+        help_menu.addAction(action_undo)
+        action_perf = QAction("⏱ Performance", self)
+        action_perf.triggered.connect(self.open_performance_panel)
+        help_menu.addAction(action_perf)
+        action_art = QAction("🖼 Artwork Report", self)
+        action_art.triggered.connect(self.open_artwork_panel)
+        help_menu.addAction(action_art)
+        self.action_profile = QAction("🔬 Profile Next Operation", self)
+        self.action_profile.setCheckable(True)
+        self.action_profile.toggled.connect(self.toggle_profiler)
+        help_menu.addAction(self.action_profile)
+        profiler.on_finished = self.on_profile_written
 
         # --- TOP TOOLBAR ---
         toolbar = QHBoxLayout()
@@ -121,12 +160,23 @@ class MusicTaggerApp(QMainWindow):
         self.btn_load_folder = QPushButton()
         self.btn_load_folder.clicked.connect(self.open_folder_dialog)
         
-        self.file_list_widget = QListWidget()
-        self.file_list_widget.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
-        self.file_list_widget.itemSelectionChanged.connect(self.on_selection_changed)
+        # Filter bar: every keystroke is answered from the search index
+        self.search_input = QLineEdit()
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(lambda _: self.apply_filter())
+
+        self.file_model = FileListModel(self)
+        self.file_proxy = FileFilterProxy(self)
+        self.file_proxy.setSourceModel(self.file_model)
+        self.file_list_view = QListView()
+        self.file_list_view.setModel(self.file_proxy)
+        self.file_list_view.setUniformItemSizes(True)
+        self.file_list_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.file_list_view.selectionModel().selectionChanged.connect(lambda *_: self.on_selection_changed())
         
         left_layout.addWidget(self.btn_load_folder)
-        left_layout.addWidget(self.file_list_widget)
+        left_layout.addWidget(self.search_input)
+        left_layout.addWidget(self.file_list_view)
         self.left_group.setLayout(left_layout)
         
         # 2. RIGHT: Manual Edit
@@ -146,12 +196,14 @@ class MusicTaggerApp(QMainWindow):
         self.form_layout.setFieldGrowthPolicy(QFormLayout.FieldGrowthPolicy.AllNonFixedFieldsGrow) 
         
         self.meta_fields = {}
+        self.editor_tags = {}
         self.field_labels = {} 
         
         for label, tag_key in self.tag_map.items():
             le = QLineEdit()
             le.setMinimumHeight(30)
-            le.textEdited.connect(self.on_manual_edit) 
+            le.textEdited.connect(self.on_manual_edit)
+            self.editor_tags[le] = tag_key 
             self.meta_fields[label] = le
             
             lbl_widget = QLabel()
@@ -182,6 +234,12 @@ class MusicTaggerApp(QMainWindow):
         cover_container.addWidget(self.btn_select_cover)
         right_layout.addLayout(cover_container)
 
+        # Loudness analysis runs as part of the save
+        self.chk_replaygain = QCheckBox()
+        self.chk_replaygain.setChecked(self.settings.value("replaygain", False, type=bool))
+        self.chk_replaygain.toggled.connect(lambda checked: self.settings.setValue("replaygain", checked))
+        right_layout.addWidget(self.chk_replaygain)
+
         # Save Button
         self.btn_save_all = QPushButton()
         self.btn_save_all.setStyleSheet("background-color: #28a745; color: white; font-weight: bold; padding: 12px; border-radius: 6px;")
@@ -211,9 +269,11 @@ class MusicTaggerApp(QMainWindow):
         self.lbl_hint.setText(tr("matches_hint"))
         self.left_group.setTitle(tr("local_files"))
         self.btn_load_folder.setText(tr("open_folder"))
+        self.search_input.setPlaceholderText(tr("search_placeholder"))
         self.right_group.setTitle(tr("metadata_editor"))
         self.btn_select_cover.setText(tr("choose_art"))
         self.btn_save_all.setText(tr("save_all"))
+        self.chk_replaygain.setText(tr("chk_replaygain"))
 
         self.lbl_hint.setStyleSheet("color: #96CBD0;")
         if self.lbl_cover_image.text() in ["No Art", "Geen Cover"]:
@@ -227,322 +287,314 @@ class MusicTaggerApp(QMainWindow):
     def open_log_folder(self):
         QDesktopServices.openUrl(QUrl.fromLocalFile(self.log_dir))
 
+    def toggle_profiler(self, checked):
+        if checked:
+            profiler.arm(self.log_dir)
+            self.show_banner(tr("profile_armed"))
+        else:
+            profiler.disarm()
+
+    def on_profile_written(self, name, base_path):
+        self.action_profile.blockSignals(True)
+        self.action_profile.setChecked(False)
+        self.action_profile.blockSignals(False)
+        self.show_banner(tr("profile_written").format(os.path.basename(base_path)))
+
+    def open_performance_panel(self):
+        from perf_panel import PerformancePanel
+        PerformancePanel(self.log_dir, self).exec()
+
+    def open_artwork_panel(self):
+        from artwork_panel import ArtworkPanel
+        ArtworkPanel(self).exec()
+
+    def apply_cover_to_album(self, report):
+        """Stages the folder's most common cover on every file that lacks it or differs."""
+        from cover_cache import cover_cache
+        source = report["groups"][report["dominant"]][0]
+        try:
+            img_data = self.session.read_cover_bytes(source)
+        except Exception as e:
+            logging.error(f"Could not read cover from {source}: {e}")
+            img_data = None
+        if report["folder"] != self.current_folder:
+            # Switching folders throws away what is staged here
+            self.flush_manual_edits()
+            if self.pending_changes:
+                reply = QMessageBox.question(self, tr("art_title"), tr("art_switch_prompt").format(
+                    len(self.pending_changes), os.path.basename(report["folder"])))
+                if reply != QMessageBox.StandardButton.Yes: return
+
+        cover_path = cover_cache.store_bytes(img_data, max_size=None)
+        if not cover_path:
+            self.show_banner(tr("no_art"), is_error=True)
+            return
+
+        if report["folder"] != self.current_folder:
+            self.reload_file_list(report["folder"])
+        targets = [p for p in report["outliers"] if self.file_model.row_for_path(p) >= 0]
+        self.pending_changes.set_many(targets, '_artwork_path', cover_path)
+        self.file_model.mark_staged(targets)
+        self.show_banner(tr("art_applied").format(len(targets)))
+
     # --- MATCHERS ---
     def open_matcher_dialog(self):
         current_files = self.get_current_files()
         if not current_files: return
-        dialog = WebMatcherDialog(current_files, self)
-        dialog.matches_confirmed.connect(self.stage_matches)
-        dialog.exec()
+        if self.web_dialog is None:
+            from matcher import WebMatcherDialog
+            self.web_dialog = WebMatcherDialog(current_files, self)
+            self.web_dialog.matches_confirmed.connect(self.stage_matches)
+        else:
+            self.web_dialog.set_files(current_files)
+        self.web_dialog.exec()
 
     def open_csv_dialog(self):
         current_files = self.get_current_files()
         if not current_files: return
-        dialog = CsvMatcherDialog(current_files, self)
-        dialog.matches_confirmed.connect(self.stage_matches_csv)
-        dialog.exec()
+        if self.csv_dialog is None:
+            from csv_matcher import CsvMatcherDialog
+            self.csv_dialog = CsvMatcherDialog(current_files, self)
+            self.csv_dialog.matches_confirmed.connect(self.stage_matches_csv)
+        else:
+            self.csv_dialog.set_files(current_files)
+        self.csv_dialog.exec()
         
+    def stage_cover_when_ready(self, files, album_url):
+        """Stages the album cover on files once its download (started by the fetch) is done."""
+        from scraper import get_album_scraper
+        scraper = get_album_scraper()
+
+        def staged(cover_path):
+            targets = [p for p in files if self.file_model.row_for_path(p) >= 0]
+            if not cover_path or not targets:
+                logging.warning(f"No cover staged for {album_url}")
+                return
+            self.pending_changes.set_many(targets, '_artwork_path', cover_path)
+            self.file_model.mark_staged(targets)
+            self.show_banner(tr("art_applied").format(len(targets)))
+
+        # Waits on a worker; a folder change before it is done drops the result
+        if self.jobs.submit(USER, scraper.get_cover, album_url, on_done=staged) is None:
+            staged(scraper.get_cover(album_url))
+
     def stage_matches_csv(self, files, data, album, append):
         default_opts = {'title': True, 'artist': True, 'track': True, 'rename': True, 'lyrics': False}
         self.stage_matches(files, data, album, default_opts, append)
 
     def stage_matches(self, reordered_files, track_data, album_data, options, append=False):
-        logging.info(f"Staging matches (Append={append})...")
-        
-        if not append:
-            self.pending_changes.clear()
+        self.flush_manual_edits()
+        cover_album_url = options.pop('cover_album_url', None)
+        staged_names = self.session.stage_matches(reordered_files, track_data, album_data, options, append)
+        if cover_album_url:
+            self.stage_cover_when_ready(reordered_files, cover_album_url)
+        self.index_files(reordered_files)
 
-        album_common = {}
-        if album_data:
-            album_common['album'] = album_data[0]
-            album_common['year'] = album_data[2]
-
-        for i, file_path in enumerate(reordered_files):
-            file_data = self.pending_changes.get(file_path, {}) if append else {}
-            
-            if 'album' in album_common: file_data['album'] = album_common['album']
-            if 'year' in album_common: file_data['year'] = album_common['year']
-            file_data['genre'] = "Carnaval"
-            
-            web_comment = ""
-            if i < len(track_data) and len(track_data[i]) > 4:
-                web_comment = track_data[i][4] 
-            
-            if web_comment:
-                file_data['comment'] = web_comment
-            else:
-                file_data['comment'] = "" 
-            
-            if options.get('rename'): file_data['_rename'] = True
-            
-            if i < len(track_data):
-                track_info = track_data[i]
-                if options.get('track'):
-                     t_num = track_info[0] if len(track_info) > 0 and track_info[0] else str(i+1)
-                     file_data['tracknumber'] = t_num
-                if options.get('title') and len(track_info) > 1: 
-                    file_data['title'] = track_info[1]
-                if options.get('artist') and len(track_info) > 2: 
-                    file_data['artist'] = track_info[2]
-                if options.get('lyrics') and len(track_info) > 3:
-                    file_data['_lyrics'] = track_info[3]
-            else:
-                if options.get('track'):
-                    file_data['tracknumber'] = str(i+1)
-            
-            self.pending_changes[file_path] = file_data
-            
-            for j in range(self.file_list_widget.count()):
-                item = self.file_list_widget.item(j)
-                if item.data(Qt.ItemDataRole.UserRole) == file_path:
-                    if options.get('rename'):
-                        clean_title = self.sanitize_filename(file_data.get('title', 'Unknown'))
-                        clean_artist = self.sanitize_filename(file_data.get('artist', 'Unknown'))
-                        if not clean_title: clean_title = "Track"
-                        try:
-                            t_int = int(file_data.get('tracknumber', 0))
-                            t_str = f"{t_int:02d}"
-                        except: t_str = "00"
-                        
-                        ext = os.path.splitext(file_path)[1]
-                        predicted_name = f"{t_str} - {clean_artist} - {clean_title}{ext}"
-                        item.setText(f"* {predicted_name}")
-                    else:
-                        if not item.text().startswith("*"):
-                            item.setText(f"* {item.text()}")
-                            
-                    item.setForeground(QBrush(QColor("#00ffff")))
-                    break
+        # One dataChanged for the whole batch instead of a row scan per file
+        self.file_model.mark_staged(reordered_files, staged_names)
 
         self.show_banner(tr("staged_count").format(len(self.pending_changes)))
+        # Effective values changed for the staged files, recount the selection
+        self.selection_aggregate.clear()
         self.on_selection_changed()
 
     # --- SAVING (FIXED IMAGE & LYRICS) ---
     def save_all_changes(self):
+        with profiler.capture("save_all_changes"):
+            self.run_batch_save()
+
+    def run_batch_save(self):
+        if self.saving: return
+        self.flush_manual_edits()
         if not self.pending_changes:
             self.show_banner(tr("no_changes"), is_error=True)
             return
 
-        logging.info("Starting Batch Save...")
-        count = 0
-        errors = []
-        paths_to_process = list(self.pending_changes.keys())
+        def progress(done, total):
+            self.btn_save_all.setText(tr("rg_analyzing").format(done, total))
+            QApplication.processEvents()
 
-        for file_path in paths_to_process:
-            if not os.path.exists(file_path): continue
-            
-            if not os.access(file_path, os.W_OK):
-                err_msg = f"Locked/Read-only: {os.path.basename(file_path)}"
-                logging.error(err_msg)
-                errors.append(err_msg)
-                continue
-
-            changes = self.pending_changes[file_path]
-            current_path = file_path
-            file_ext = os.path.splitext(current_path)[1].lower()
-            
-            # --- 1. SAVE TAGS (Metadata & Artwork) ---
-            try:
-                # A. Eerst tekst tags opslaan met music_tag (werkt goed voor alles)
-                f = music_tag.load_file(current_path)
-                file_dirty = False
-                
-                for tag, new_val in changes.items():
-                    if tag.startswith('_'): continue 
-                    if tag in ['tracknumber', 'year', 'discnumber', 'comment']:
-                        if new_val == "": 
-                            if f[tag] is not None and str(f[tag]) != "":
-                                f[tag] = None
-                                file_dirty = True
-                            continue
-                    
-                    current_val = str(f[tag]) if f[tag] else ""
-                    if current_val != new_val:
-                        f[tag] = new_val
-                        file_dirty = True
-                
-                if file_dirty:
-                    f.save()
-
-                # B. Artwork Specifieke Afhandeling
-                if '_artwork_path' in changes:
-                    art_path = changes['_artwork_path']
-                    if art_path and os.path.exists(art_path):
-                        
-                        # 1. Converteer afbeelding naar cleane JPEG bytes
-                        image = QImage(art_path)
-                        if not image.isNull():
-                            ba = QByteArray()
-                            buf = QBuffer(ba)
-                            buf.open(QIODevice.OpenModeFlag.WriteOnly)
-                            image.save(buf, "JPEG", quality=85)
-                            img_data = bytes(ba)
-
-                            # 2. Opslaan afhankelijk van bestandsformaat
-                            if file_ext in ['.m4a', '.mp4']:
-                                # FIX: Gebruik DIRECT Mutagen voor M4A om 'atom' error te voorkomen
-                                m4a_file = MP4(current_path)
-                                # Verwijder oude cover(s) en zet nieuwe met expliciete JPEG vlag
-                                m4a_file['covr'] = [MP4Cover(img_data, imageformat=MP4Cover.FORMAT_JPEG)]
-                                m4a_file.save()
-                            
-                            else:
-                                # Voor MP3/FLAC werkt music_tag meestal wel prima, 
-                                # maar we herladen het bestand om zeker te zijn na de vorige save
-                                f_art = music_tag.load_file(current_path)
-                                try: del f_art['artwork']
-                                except: pass
-                                f_art['artwork'] = img_data
-                                f_art.save()
-                                
-                    logging.info(tr("saved_log").format(os.path.basename(current_path)))
-
-            except Exception as e:
-                err_msg = f"Tag/Art Error ({os.path.basename(current_path)}): {str(e)}"
-                logging.error(err_msg)
-                errors.append(err_msg)
-
-            # --- 2. RENAME ---
-            try:
-                # Metadata opnieuw laden voor correcte bestandsnaam
-                f_ren = music_tag.load_file(current_path)
-                
-                # Gebruik nieuwe waardes uit changes als die er zijn, anders fallback naar bestand
-                new_title = changes.get('title', str(f_ren['title']))
-                new_artist = changes.get('artist', str(f_ren['artist']))
-                track_num = changes.get('tracknumber', str(f_ren['tracknumber']))
-                
-                try: 
-                    t_int = int(track_num) 
-                    t_str = f"{t_int:02d}"
-                except: t_str = "00"
-                
-                clean_title = self.sanitize_filename(new_title)
-                clean_artist = self.sanitize_filename(new_artist)
-                
-                if not clean_title: clean_title = "Unknown"
-                if not clean_artist: clean_artist = "Unknown"
-                
-                folder = os.path.dirname(current_path)
-                ext = os.path.splitext(current_path)[1]
-                new_filename = f"{t_str} - {clean_artist} - {clean_title}{ext}"
-                new_full_path = os.path.join(folder, new_filename)
-                
-                if changes.get('_rename'):
-                    if current_path != new_full_path:
-                        os.rename(current_path, new_full_path)
-                        logging.info(tr("renamed_log").format(new_filename))
-                        current_path = new_full_path 
-
-            except Exception as e:
-                err_msg = f"Rename Error ({os.path.basename(current_path)}): {str(e)}"
-                logging.error(err_msg)
-                errors.append(err_msg)
-
-            # --- 3. LYRICS ---
-            try:
-                if '_lyrics' in changes and changes['_lyrics']:
-                    lrc_path = os.path.splitext(current_path)[0] + ".txt"
-                    with open(lrc_path, 'w', encoding='utf-8') as lrc_file:
-                        lrc_file.write(changes['_lyrics'])
-                    logging.info(tr("lyrics_log").format(lrc_path))
-            
-            except Exception as e:
-                err_msg = f"Lyrics Error ({os.path.basename(current_path)}): {str(e)}"
-                logging.error(err_msg)
-                errors.append(err_msg)
+        # The ReplayGain pass keeps the window painting; while it runs nothing
+        # may edit, save again or open another folder under the batch
+        self.saving = True
+        self.setEnabled(False)
+        try:
+            result = self.session.save(self.chk_replaygain.isChecked(), progress)
+        finally:
+            self.setEnabled(True)
+            self.saving = False
+        self.btn_save_all.setText(tr("save_all"))
+        if result["replaygain_skipped"]:
+            self.show_banner(tr("rg_unavailable"), is_error=True)
+
+        # Rewritten (and maybe renamed) files get indexed again by the reload
+        artwork_index.forget_saved(result["final_paths"])
+        if result["paths"]:
+            self.reload_file_list(os.path.dirname(result["paths"][0]))
+
+        if result["saved"] > 0:
+            self.show_banner(tr("save_success").format(result["saved"]))
+        if result["errors"]:
+            self.show_banner(f"Errors: {len(result['errors'])}. Check Log!", is_error=True)
+
+    # --- JOURNAL RECOVERY ---
+    def check_unfinished_save(self):
+        journal = SaveJournal.load(self.session.journal_file)
+        if not journal: return
+
+        remaining = journal.unfinished_count()
+        if journal.finished or remaining == 0:
+            journal.finish(self.session.last_journal_file)
+            return
 
-            count += 1
+        logging.warning(f"Unfinished batch save found ({remaining} files left)")
+        box = QMessageBox(self)
+        box.setWindowTitle(tr("journal_title"))
+        box.setText(tr("journal_prompt").format(remaining, len(journal.entries)))
+        btn_resume = box.addButton(tr("journal_resume"), QMessageBox.ButtonRole.AcceptRole)
+        btn_rollback = box.addButton(tr("journal_rollback"), QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton(tr("journal_discard"), QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+
+        clicked = box.clickedButton()
+        if clicked == btn_resume:
+            count, errors = self.session.resume_journal(journal)
+            self.show_banner(tr("save_success").format(count), is_error=bool(errors))
+        elif clicked == btn_rollback:
+            self.rollback_journal(journal)
+        else:
+            logging.info("Unfinished batch save discarded")
+            journal.discard()
 
-        self.pending_changes.clear()
-        
-        if paths_to_process:
-            self.reload_file_list(os.path.dirname(paths_to_process[0]))
+    def undo_last_save(self):
+        journal = SaveJournal.load(self.session.last_journal_file)
+        if not journal or not journal.entries:
+            self.show_banner(tr("journal_nothing"), is_error=True)
+            return
+
+        reply = QMessageBox.question(self, tr("journal_title"), tr("journal_undo_prompt").format(len(journal.entries)))
+        if reply != QMessageBox.StandardButton.Yes: return
 
-        if count > 0:
-            self.show_banner(tr("save_success").format(count))
+        self.rollback_journal(journal)
+        self.reload_file_list(os.path.dirname(journal.entries[0]['path']))
+
+    def rollback_journal(self, journal):
+        errors = self.session.rollback_journal(journal)
         if errors:
             self.show_banner(f"Errors: {len(errors)}. Check Log!", is_error=True)
+        else:
+            self.show_banner(tr("journal_rolled_back").format(len(journal.entries)))
+
     # --- HELPERS ---
     def get_current_files(self):
-        current_files = []
-        for i in range(self.file_list_widget.count()):
-            item = self.file_list_widget.item(i)
-            current_files.append(item.data(Qt.ItemDataRole.UserRole))
+        current_files = self.file_model.paths()
         if not current_files:
             self.show_banner(tr("please_load"), is_error=True)
             return None
         return current_files
     
+    def selected_paths(self):
+        rows = sorted(self.file_proxy.mapToSource(index).row() for index in self.file_list_view.selectionModel().selectedRows())
+        return [self.file_model.path_at(row) for row in rows]
+
     def on_selection_changed(self):
-        selected_items = self.file_list_widget.selectedItems()
+        # Edits typed for the previous selection must land there first
+        self.flush_manual_edits()
+        selected_paths = self.selected_paths()
+        self.sync_selection_aggregate(selected_paths)
         for le in self.meta_fields.values(): le.blockSignals(True)
         
-        if len(selected_items) == 0:
+        if len(selected_paths) == 0:
             self.clear_fields()
-        elif len(selected_items) == 1:
-            path = selected_items[0].data(Qt.ItemDataRole.UserRole)
-            data = self.get_effective_metadata(path)
-            for label, tag_key in self.tag_map.items():
-                self.meta_fields[label].setText(data.get(tag_key, ""))
-            self.load_cover_from_file(path)
         else:
-            self.lbl_cover_image.setText(tr("multiple_selected"))
-            self.lbl_cover_image.setPixmap(QPixmap())
-            first_path = selected_items[0].data(Qt.ItemDataRole.UserRole)
-            common_values = self.get_effective_metadata(first_path)
-            for i in range(1, len(selected_items)):
-                path = selected_items[i].data(Qt.ItemDataRole.UserRole)
-                next_values = self.get_effective_metadata(path)
-                for key in list(common_values.keys()):
-                    if common_values[key] != next_values.get(key, ""):
-                        common_values[key] = None 
+            if len(selected_paths) == 1:
+                self.request_cover(selected_paths[0])
+            else:
+                self.lbl_cover_image.setText(tr("multiple_selected"))
+                self.lbl_cover_image.setPixmap(QPixmap())
             for label, tag_key in self.tag_map.items():
-                val = common_values.get(tag_key, "")
+                val = self.selection_aggregate.common_value(tag_key)
                 if val is None:
                     self.meta_fields[label].setText("")
                     self.meta_fields[label].setPlaceholderText("<Multiple Values>")
                 else:
                     self.meta_fields[label].setText(val)
+                    self.meta_fields[label].setPlaceholderText("")
             
         for le in self.meta_fields.values(): le.blockSignals(False)
 
-    def get_effective_metadata(self, path):
-        disk_data = {}
+    def sync_selection_aggregate(self, selected_paths):
+        """Only files entering or leaving the selection are (re)counted."""
+        current = set(selected_paths)
+        aggregate = self.selection_aggregate
+        for path in aggregate.paths():
+            if path not in current: aggregate.remove(path)
+        for path in selected_paths:
+            if path not in aggregate: aggregate.add(path, self.session.get_effective_metadata(path))
+
+    def prefetch_tags(self, path):
+        # Header-only read for the list; the full load only when the artwork
+        # index has no current entry (or the fast reader declined the file)
+        data = read_fast_tags(path)
+        if data is not None and artwork_index.lookup(path) is not None:
+            return path, data, None
+
+        # One load feeds both the tag cache and the artwork index
+        import music_tag
         try:
-            f = music_tag.load_file(path)
-            for _, tag_key in self.tag_map.items():
-                val = f[tag_key]
-                disk_data[tag_key] = str(val) if val else ""
-        except: pass 
-        if path in self.pending_changes:
-            pending = self.pending_changes[path]
-            for key, val in pending.items():
-                if not key.startswith('_'): disk_data[key] = val
-        return disk_data
+            with span("tags.read", path=path):
+                f = music_tag.load_file(path)
+        except Exception:
+            return path, data or {}, None
+        try: digest = cover_digest(self.session.read_cover_bytes(path, f))
+        except Exception: digest = None
+        return path, data if data is not None else self.session.read_tags(path, f), digest
+
+    def index_cover(self, path):
+        # Worker side of the library scan; fresh entries are not read again
+        if artwork_index.lookup(path) is None:
+            try: artwork_index.update(path, cover_digest(self.session.read_cover_bytes(path)))
+            except Exception: pass
+        return path
+
+    def on_tags_prefetched(self, result):
+        path, data, digest = result
+        if digest is not None:
+            artwork_index.update(path, digest)
+        # A synchronous read (selection) may have been first
+        if path in self.disk_meta or self.file_model.row_for_path(path) < 0: return
+        self.disk_meta[path] = data
+        self.index_files([path])
 
     def on_manual_edit(self, text):
-        sender = self.sender()
-        target_label = None
-        for label, le in self.meta_fields.items():
-            if le == sender: target_label = label; break
-        if not target_label: return
-        tag_key = self.tag_map[target_label]
-        
-        selected_items = self.file_list_widget.selectedItems()
-        for item in selected_items:
-            path = item.data(Qt.ItemDataRole.UserRole)
-            if path not in self.pending_changes: self.pending_changes[path] = {}
-            self.pending_changes[path][tag_key] = text
-            item.setForeground(QBrush(QColor("#00ffff")))
-            if not item.text().startswith("*"): item.setText(f"* {item.text()}")
+        tag_key = self.editor_tags.get(self.sender())
+        if not tag_key: return
+
+        # Keystrokes are only queued here; flush_manual_edits applies them
+        # once typing pauses (or before anything that depends on them).
+        if not self.queued_edits:
+            self.edit_targets = self.selected_paths()
+        self.queued_edits[tag_key] = text
+        self.edit_timer.start()
+
+    def flush_manual_edits(self):
+        self.edit_timer.stop()
+        if not self.queued_edits: return
+
+        targets = self.edit_targets
+        for tag_key, text in self.queued_edits.items():
+            self.pending_changes.set_many(targets, tag_key, text)
+            self.selection_aggregate.set_field(tag_key, text)
+        self.file_model.mark_staged(targets)
+        self.index_files(targets)
+
+        self.queued_edits = {}
+        self.edit_targets = []
 
     def load_cover_from_file(self, path, f=None):
         try:
-            if not f: f = music_tag.load_file(path)
-            art = f['artwork']
-            if art:
-                img_data = art.first.data
+            img_data = self.session.read_cover_bytes(path, f)
+            if img_data:
                 pixmap = QPixmap()
                 pixmap.loadFromData(img_data)
                 self.lbl_cover_image.setPixmap(pixmap.scaled(180, 180, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
@@ -551,9 +603,31 @@ class MusicTaggerApp(QMainWindow):
                 self.lbl_cover_image.setPixmap(QPixmap())
         except: self.lbl_cover_image.setText(tr("no_art"))
 
+    def read_cover_thumbnail(self, path):
+        # Decoding and scaling happen on the worker, the GUI thread only wraps a QPixmap
+        img_data = self.session.read_cover_bytes(path)
+        if not img_data: return None
+        image = QImage.fromData(img_data)
+        if image.isNull(): return None
+        return image.scaled(180, 180, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+    def request_cover(self, path):
+        def show(image):
+            # The selection may have moved on while the cover was read
+            if self.selected_paths() != [path]: return
+            if image is None:
+                self.lbl_cover_image.setText(tr("no_art"))
+                self.lbl_cover_image.setPixmap(QPixmap())
+            else:
+                self.lbl_cover_image.setPixmap(QPixmap.fromImage(image))
+
+        job = self.jobs.submit(SELECTION, self.read_cover_thumbnail, path, on_done=show, on_error=lambda e: show(None))
+        if job is None:
+            self.load_cover_from_file(path)
+
     def select_cover(self):
-        selected_items = self.file_list_widget.selectedItems()
-        if not selected_items:
+        selected_paths = self.selected_paths()
+        if not selected_paths:
             self.show_banner(tr("please_load"), is_error=True)
             return
 
@@ -564,15 +638,8 @@ class MusicTaggerApp(QMainWindow):
             pixmap = QPixmap(path)
             self.lbl_cover_image.setPixmap(pixmap.scaled(180, 180, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
 
-            for item in selected_items:
-                f_path = item.data(Qt.ItemDataRole.UserRole)
-                if f_path not in self.pending_changes:
-                    self.pending_changes[f_path] = {}
-                self.pending_changes[f_path]['_artwork_path'] = path
-                
-                item.setForeground(QBrush(QColor("#00ffff")))
-                if not item.text().startswith("*"): 
-                    item.setText(f"* {item.text()}")
+            self.pending_changes.set_many(selected_paths, '_artwork_path', path)
+            self.file_model.mark_staged(selected_paths)
             
             self.show_banner(tr("staged_count").format(len(self.pending_changes)))
 
@@ -580,9 +647,46 @@ class MusicTaggerApp(QMainWindow):
         for le in self.meta_fields.values(): le.clear(); le.setPlaceholderText("")
         self.lbl_cover_image.setText(tr("no_art")); self.lbl_cover_image.setPixmap(QPixmap())
         
-    def sanitize_filename(self, name):
-        return re.sub(r'[<>:"/\\|?*]', '', name).strip()
-    
+    def closeEvent(self, event):
+        self.jobs.shutdown()
+        artwork_index.save()
+        super().closeEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.startup_done:
+            self.startup_done = True
+            self.start_watchdog()
+            # Restored after the first paint (see event), or after a second
+            # if the window never paints (e.g. started minimized)
+            self.restore_pending = True
+            QTimer.singleShot(1000, self.start_restore)
+
+    def event(self, event):
+        handled = super().event(event)
+        # The backing store is flushed while the UpdateRequest is handled, so
+        # the restore queued here runs with the window already on screen
+        if self.restore_pending and event.type() in (QEvent.Type.UpdateRequest, QEvent.Type.Paint):
+            QTimer.singleShot(0, self.start_restore)
+        return handled
+
+    def start_restore(self):
+        if not self.restore_pending: return
+        self.restore_pending = False
+        self.restore_session()
+
+    def start_watchdog(self):
+        # Set stall_threshold_ms to 0 in the settings to switch it off
+        threshold = int(self.settings.value("stall_threshold_ms", 500))
+        if threshold <= 0: return
+        from stall_watchdog import StallWatchdog
+        self.watchdog = StallWatchdog(threshold, parent=self)
+        self.watchdog.start()
+
+    def restore_session(self):
+        self.check_unfinished_save()
+        self.load_last_folder_on_startup()
+
     def load_last_folder_on_startup(self):
         last_folder = self.settings.value("last_folder", "")
         if last_folder and os.path.exists(last_folder):
@@ -594,19 +698,39 @@ class MusicTaggerApp(QMainWindow):
         folder = QFileDialog.getExistingDirectory(self, "Select Music Folder", start_dir)
         if folder:
             self.settings.setValue("last_folder", folder)
-            self.reload_file_list(folder)
+            with profiler.capture("open_folder"):
+                self.reload_file_list(folder)
 
     def reload_file_list(self, folder):
-        self.file_list_widget.clear()
-        self.pending_changes.clear()
-        try:
-            files = sorted([f for f in os.listdir(folder) if f.lower().endswith(('.mp3', '.m4a', '.flac', '.wav'))])
-            for f in files:
-                full_path = os.path.join(folder, f)
-                item = QListWidgetItem(f)
-                item.setData(Qt.ItemDataRole.UserRole, full_path)
-                self.file_list_widget.addItem(item)
-        except OSError: pass
+        # Background work for the previous folder is pointless now
+        self.jobs.new_folder()
+        self.current_folder = folder
+        self.selection_aggregate.clear()
+        self.search_index.clear()
+        files = self.session.load_folder(folder)
+        if files:
+            self.file_model.set_files(files)
+        else:
+            self.file_model.clear()
+        # File names are searchable right away, tags once they have been read
+        self.index_files(self.file_model.paths())
+        self.apply_filter()
+        self.jobs.submit_batch(INDEX, self.prefetch_tags, self.file_model.paths(), on_done=self.on_tags_prefetched)
+
+    # --- SEARCH / FILTER ---
+    def index_files(self, paths):
+        # Only values already in memory; never reads a file. The visible rows
+        # are not refiltered here, so editing never pulls a file from under the selection.
+        for path in paths:
+            values = self.session.known_metadata(path)
+            fields = [os.path.basename(path)] + [values.get(k, "") for k in ('title', 'artist', 'album', 'comment')]
+            self.search_index.update(path, fields)
+
+    def apply_filter(self):
+        with span("ui.filter"):
+            self.file_proxy.set_allowed(self.search_index.search(self.search_input.text()))
+        # Rows filtered away drop out of the selection without a selectionChanged
+        self.on_selection_changed()
     
     def init_notification_system(self):
         self.notification = QLabel(self)
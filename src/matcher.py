@@ -1,13 +1,19 @@
 import os
+import logging
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
                              QPushButton, QListWidget, QAbstractItemView, QGroupBox, 
                              QSplitter, QWidget, QListWidgetItem, QApplication,
                              QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox)
 from PyQt6.QtCore import Qt, pyqtSignal
-from scraper import AlbumScraper
-from styles import DARK_THEME
+from scraper import get_album_scraper
+from profiler_capture import profiler
+from lyrics_store import lyrics_store
+from job_scheduler import CancelToken, USER
 from app_translations import tr
 
+# Set on the # cell of rows whose lyrics were requested one by one
+LYRICS_REQUESTED_ROLE = Qt.ItemDataRole.UserRole + 1
+
 class WebMatcherDialog(QDialog):
     # Signal: (List of file paths, List of track data, Album Info, OptionsDict)
     matches_confirmed = pyqtSignal(list, list, list, dict)
@@ -16,13 +22,16 @@ class WebMatcherDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle(tr("matcher_title"))
         self.resize(1100, 800)
-        self.scraper = AlbumScraper()
+        self.scraper = get_album_scraper()
         
-        self.local_files = current_files 
+        self.local_files = []
         self.scraped_album = []
+        self.album_url = ""
         
+        # The theme comes from the application-wide stylesheet; the dialog is
+        # kept by the main window and reused, so earlier results stay loaded.
         self.init_ui()
-        self.setStyleSheet(DARK_THEME)
+        self.set_files(current_files)
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -53,12 +62,16 @@ class WebMatcherDialog(QDialog):
         self.chk_rename.setChecked(True)
         self.chk_lyrics = QCheckBox(tr("chk_lyrics"))
         self.chk_lyrics.setChecked(True)
+        self.chk_lyrics.toggled.connect(self.on_lyrics_toggled)
+        self.chk_cover = QCheckBox(tr("chk_cover"))
+        self.chk_cover.setChecked(True)
         
         opt_layout.addWidget(self.chk_title)
         opt_layout.addWidget(self.chk_artist)
         opt_layout.addWidget(self.chk_track)
         opt_layout.addWidget(self.chk_rename)
         opt_layout.addWidget(self.chk_lyrics)
+        opt_layout.addWidget(self.chk_cover)
         opt_group.setLayout(opt_layout)
         
         layout.addWidget(top_group)
@@ -74,10 +87,6 @@ class WebMatcherDialog(QDialog):
         left_box.addWidget(QLabel(tr("your_files")))
         self.file_list = QListWidget()
         self.file_list.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
-        for f_path in self.local_files:
-            item = QListWidgetItem(os.path.basename(f_path))
-            item.setData(Qt.ItemDataRole.UserRole, f_path)
-            self.file_list.addItem(item)
         left_box.addWidget(self.file_list)
         
         right_container = QWidget()
@@ -85,17 +94,17 @@ class WebMatcherDialog(QDialog):
         self.lbl_web_info = QLabel(tr("web_tracks"))
         right_box.addWidget(self.lbl_web_info)
         
-        # TABLE COLUMNS: [#, Title, Artist, Lyrics (Hidden), Comment/Original]
+        # TABLE COLUMNS: [#, Title, Artist, Comment/Original]
+        # The lyrics ref (see lyrics_store) rides along as UserRole data on the # cell
         self.web_table = QTableWidget()
-        self.web_table.setColumnCount(5) 
-        self.web_table.setHorizontalHeaderLabels(["#", tr("lbl_title"), tr("lbl_artist"), "Lyrics", tr("lbl_comment")])
-        self.web_table.setColumnHidden(3, True) # Hide Lyrics
+        self.web_table.setColumnCount(4) 
+        self.web_table.setHorizontalHeaderLabels(["#", tr("lbl_title"), tr("lbl_artist"), tr("lbl_comment")])
         
         header = self.web_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(4, QHeaderView.ResizeMode.Stretch) # Comment Column
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch) # Comment Column
         
         self.web_table.verticalHeader().setVisible(False)
         self.web_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
@@ -118,7 +127,11 @@ class WebMatcherDialog(QDialog):
         
         btn_cancel = QPushButton(tr("cancel_btn"))
         btn_cancel.clicked.connect(self.reject)
+
+        self.btn_row_lyrics = QPushButton(tr("lyrics_selected_btn"))
+        self.btn_row_lyrics.clicked.connect(self.fetch_selected_lyrics)
         
+        btn_box.addWidget(self.btn_row_lyrics)
         btn_box.addStretch()
         btn_box.addWidget(btn_cancel)
         btn_box.addWidget(self.btn_apply)
@@ -126,31 +139,45 @@ class WebMatcherDialog(QDialog):
         layout.addWidget(match_group, 1) # Stretch = 1
         layout.addLayout(btn_box)
 
+    def set_files(self, current_files):
+        self.local_files = current_files
+        self.file_list.clear()
+        for f_path in self.local_files:
+            item = QListWidgetItem(os.path.basename(f_path))
+            item.setData(Qt.ItemDataRole.UserRole, f_path)
+            self.file_list.addItem(item)
+
     def run_fetch(self):
         url = self.url_input.text().strip()
         if not url: return
 
+        with profiler.capture("run_fetch"):
+            self.fetch_into_table(url)
+
+    def fetch_into_table(self, url):
         self.web_table.setRowCount(0)
         self.btn_apply.setText(tr("fetching_wait"))
         self.btn_apply.setEnabled(False)
         QApplication.processEvents()
         
-        # Scraper returns: [Num, Title, Artist, Lyrics, Comment]
+        # Scraper returns: [Num, Title, Artist, LyricsRef, Comment]
         array_1d, array_2d = self.scraper.fetch_data(url)
         
         self.btn_apply.setText(tr("apply_btn"))
         if not array_1d: return
         
         self.scraped_album = array_1d
+        self.album_url = url
         info = f"{array_1d[0]} ({array_1d[2]})" if len(array_1d) > 2 else tr("unknown_album")
         self.lbl_web_info.setText(f"{tr('web_tracks')} {info}")
         
         self.web_table.setRowCount(len(array_2d))
         for i, track in enumerate(array_2d):
             print("TRACK DATA:", track)
-            # 0: Num
+            # 0: Num (+ Lyrics ref)
             item_num = QTableWidgetItem(str(track[0]))
             item_num.setFlags(item_num.flags() ^ Qt.ItemFlag.ItemIsEditable)
+            item_num.setData(Qt.ItemDataRole.UserRole, track[3] if len(track) > 3 else "")
             self.web_table.setItem(i, 0, item_num)
             
             # 1: Title
@@ -159,16 +186,53 @@ class WebMatcherDialog(QDialog):
             # 2: Artist
             self.web_table.setItem(i, 2, QTableWidgetItem(track[2]))
             
-            # 3: Lyrics
-            lyrics = track[3] if len(track) > 3 else ""
-            self.web_table.setItem(i, 3, QTableWidgetItem(lyrics))
-            
-            # 4: Comment (Original)
+            # 3: Comment (Original)
             comment = track[4] if len(track) > 4 else ""
-            self.web_table.setItem(i, 4, QTableWidgetItem(comment))
+            self.web_table.setItem(i, 3, QTableWidgetItem(comment))
             
         self.btn_apply.setEnabled(True)
 
+        if self.chk_lyrics.isChecked():
+            self.fetch_lyrics(range(self.web_table.rowCount()))
+
+    # --- LYRICS (on demand) ---
+    def on_lyrics_toggled(self, checked):
+        if checked and self.web_table.rowCount():
+            self.fetch_lyrics(range(self.web_table.rowCount()))
+
+    def fetch_selected_lyrics(self):
+        rows = sorted(set(index.row() for index in self.web_table.selectedIndexes()))
+        for row in rows:
+            self.web_table.item(row, 0).setData(LYRICS_REQUESTED_ROLE, True)
+        self.fetch_lyrics(rows)
+
+    def fetch_lyrics(self, rows):
+        refs = []
+        for row in rows:
+            item = self.web_table.item(row, 0)
+            if item and item.data(Qt.ItemDataRole.UserRole):
+                refs.append(item.data(Qt.ItemDataRole.UserRole))
+        if not refs: return
+
+        self.btn_apply.setText(tr("fetching_lyrics"))
+        self.btn_apply.setEnabled(False)
+
+        # The track pages download in the background; Apply waits for them
+        def done(found):
+            logging.debug(f"Lyrics found for {found}/{len(refs)} tracks.")
+            self.btn_apply.setText(tr("apply_btn"))
+            self.btn_apply.setEnabled(True)
+
+        def failed(e):
+            logging.error(f"Lyrics prefetch failed: {e}")
+            done(0)
+
+        # Own token: a folder change must not leave Apply disabled
+        job = self.parent().jobs.submit(USER, lyrics_store.prefetch, refs,
+                                        on_done=done, on_error=failed, token=CancelToken())
+        if job is None:
+            done(lyrics_store.prefetch(refs))
+
     def confirm_matches(self):
         reordered_files = []
         for i in range(self.file_list.count()):
@@ -181,8 +245,12 @@ class WebMatcherDialog(QDialog):
             t_num = self.web_table.item(i, 0).text()
             t_title = self.web_table.item(i, 1).text()
             t_artist = self.web_table.item(i, 2).text()
-            t_lyrics = self.web_table.item(i, 3).text()
-            t_comment = self.web_table.item(i, 4).text()
+            item_num = self.web_table.item(i, 0)
+            # Lyrics refs only for rows where lyrics were asked for
+            t_lyrics = ""
+            if self.chk_lyrics.isChecked() or item_num.data(LYRICS_REQUESTED_ROLE):
+                t_lyrics = item_num.data(Qt.ItemDataRole.UserRole) or ""
+            t_comment = self.web_table.item(i, 3).text()
             
             final_track_data.append([t_num, t_title, t_artist, t_lyrics, t_comment])
             
@@ -191,8 +259,12 @@ class WebMatcherDialog(QDialog):
             'artist': self.chk_artist.isChecked(),
             'track': self.chk_track.isChecked(),
             'rename': self.chk_rename.isChecked(),
-            'lyrics': self.chk_lyrics.isChecked()
+            'lyrics': any(track[3] for track in final_track_data)
         }
+        # The cover is still downloading in the background; the main window
+        # stages it once it is there
+        if self.chk_cover.isChecked() and self.album_url:
+            options['cover_album_url'] = self.album_url
             
         self.matches_confirmed.emit(reordered_files, final_track_data, self.scraped_album, options)
         self.accept()
\ No newline at end of file
@@ -0,0 +1,47 @@
+# parade_csv.py
+import csv
+
+
+def parse_parade_csv(f_name):
+    """
+    Reads a parade list (CSV/TXT, any delimiter) into [track, title, artist]
+    rows. The header row is found by its "stoetnummer" and "akv" columns
+    ("thema" is the title); without one the first row is skipped and the
+    columns are guessed. Returns (rows, guessed), guessed being True when
+    the file had too few columns to guess with any confidence.
+    """
+    with open(f_name, mode='r', encoding='utf-8-sig') as f:
+        dialect = csv.Sniffer().sniff(f.read(1024))
+        f.seek(0)
+        rows = list(csv.reader(f, dialect))
+
+    header_idx = -1
+    guessed = False
+    col_map = {"track": -1, "artist": -1, "title": -1}
+
+    for i, row in enumerate(rows):
+        row_lower = [c.lower().strip() for c in row]
+        if "stoetnummer" in row_lower and "akv" in row_lower:
+            header_idx = i
+            try:
+                col_map["track"] = row_lower.index("stoetnummer")
+                col_map["artist"] = row_lower.index("akv")
+                col_map["title"] = row_lower.index("thema")
+            except ValueError:
+                pass
+            break
+
+    if header_idx == -1:
+        header_idx = 0
+        if len(rows[0]) >= 3:
+            col_map = {"track": 0, "artist": 1, "title": 4}
+        else:
+            guessed = True
+            col_map = {"track": 0, "artist": 1, "title": 2}
+
+    parade = []
+    for row in rows[header_idx+1:]:
+        def get_col(idx):
+            return row[idx] if idx >= 0 and idx < len(row) else ""
+        parade.append([str(get_col(col_map["track"])), str(get_col(col_map["title"])), str(get_col(col_map["artist"]))])
+    return parade, guessed
@@ -0,0 +1,108 @@
+# pending_store.py
+
+# Fields that are usually identical across a whole album; their values are
+# interned so 1000 staged files share one string instead of 1000 copies.
+SHARED_FIELDS = ('album', 'year', 'genre', 'albumartist', 'composer', 'discnumber', '_artwork_path')
+
+
+class PendingChanges:
+    """
+    Columnar store for staged edits: one {path: value} column per field
+    instead of one dict per file. Keys starting with '_' are flags
+    (_rename, _lyrics, _artwork_path) and are not written as tags.
+    """
+
+    def __init__(self):
+        self._columns = {}
+        self._dirty = {}  # ordered set of paths with at least one change
+        self._pool = {}
+
+    # =========================================================
+    # CONTAINER PROTOCOL
+    # =========================================================
+    def __len__(self):
+        return len(self._dirty)
+
+    def __bool__(self):
+        return bool(self._dirty)
+
+    def __contains__(self, path):
+        return path in self._dirty
+
+    def __iter__(self):
+        return iter(self._dirty)
+
+    def paths(self):
+        return list(self._dirty)
+
+    def clear(self):
+        self._columns.clear()
+        self._dirty.clear()
+        self._pool.clear()
+
+    def discard(self, path):
+        if path not in self._dirty: return
+        del self._dirty[path]
+        for column in self._columns.values():
+            column.pop(path, None)
+
+    # =========================================================
+    # WRITES
+    # =========================================================
+    def set(self, path, field, value):
+        self._column(field)[path] = self._intern(field, value)
+        self._dirty[path] = None
+
+    def set_many(self, paths, field, value):
+        """Same value for every path, e.g. album/year or a manual multi-edit."""
+        value = self._intern(field, value)
+        column = self._column(field)
+        dirty = self._dirty
+        for path in paths:
+            column[path] = value
+            dirty[path] = None
+
+    def set_column(self, field, values):
+        """Per-file values for one field, given as {path: value}."""
+        if not values: return
+        column = self._column(field)
+        if field in SHARED_FIELDS:
+            values = {path: self._intern(field, val) for path, val in values.items()}
+        column.update(values)
+        self._dirty.update(dict.fromkeys(values))
+
+    # =========================================================
+    # READS
+    # =========================================================
+    def get(self, path, field, default=None):
+        column = self._columns.get(field)
+        if column is None: return default
+        return column.get(path, default)
+
+    def has(self, path, field):
+        column = self._columns.get(field)
+        return column is not None and path in column
+
+    def changes_for(self, path, include_flags=True):
+        """Rebuilds the {field: value} view of one file, e.g. for saving."""
+        changes = {}
+        if path not in self._dirty: return changes
+        for field, column in self._columns.items():
+            if not include_flags and field.startswith('_'): continue
+            if path in column:
+                changes[field] = column[path]
+        return changes
+
+    # =========================================================
+    # INTERNALS
+    # =========================================================
+    def _column(self, field):
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = {}
+        return column
+
+    def _intern(self, field, value):
+        if field in SHARED_FIELDS and isinstance(value, str):
+            return self._pool.setdefault(value, value)
+        return value
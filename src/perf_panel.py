@@ -0,0 +1,77 @@
+import os
+import time
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QLabel)
+from PyQt6.QtCore import Qt
+from perf_trace import tracer
+from app_translations import tr
+
+COLUMNS = ["perf_col_operation", "perf_col_count", "perf_col_errors", "perf_col_mean",
+           "perf_col_p50", "perf_col_p95", "perf_col_max", "perf_col_total"]
+
+
+class PerformancePanel(QDialog):
+    def __init__(self, export_dir, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(tr("perf_title"))
+        self.resize(900, 450)
+        self.export_dir = export_dir
+        self.init_ui()
+        self.refresh()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.lbl_info = QLabel(tr("perf_hint"))
+        layout.addWidget(self.lbl_info)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([tr(key) for key in COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for col in range(1, len(COLUMNS)):
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.table, 1)
+
+        btn_box = QHBoxLayout()
+        btn_refresh = QPushButton(tr("perf_refresh"))
+        btn_refresh.clicked.connect(self.refresh)
+        btn_reset = QPushButton(tr("perf_reset"))
+        btn_reset.clicked.connect(self.reset)
+        btn_export = QPushButton(tr("perf_export"))
+        btn_export.clicked.connect(self.export)
+        btn_close = QPushButton(tr("close_btn"))
+        btn_close.clicked.connect(self.accept)
+
+        btn_box.addWidget(btn_refresh)
+        btn_box.addWidget(btn_reset)
+        btn_box.addStretch()
+        btn_box.addWidget(btn_export)
+        btn_box.addWidget(btn_close)
+        layout.addLayout(btn_box)
+
+    def refresh(self):
+        snapshot = tracer.snapshot()
+        self.table.setRowCount(len(snapshot))
+        for row, (name, stats) in enumerate(snapshot.items()):
+            values = [name, stats["count"], stats["errors"], stats["mean_ms"],
+                      stats["p50_ms"], stats["p95_ms"], stats["max_ms"], stats["total_ms"]]
+            for col, val in enumerate(values):
+                text = f"{val:.1f}" if isinstance(val, float) else str(val)
+                item = QTableWidgetItem(text)
+                if col > 0:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, col, item)
+
+    def reset(self):
+        tracer.reset()
+        self.refresh()
+
+    def export(self):
+        default_name = os.path.join(self.export_dir, time.strftime("performance-%Y%m%d-%H%M%S.json"))
+        path, _ = QFileDialog.getSaveFileName(self, tr("perf_export"), default_name, "JSON (*.json)")
+        if path:
+            tracer.export_json(path)
@@ -0,0 +1,127 @@
+# perf_trace.py
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Log-spaced bucket upper bounds in ms: 0.05 ms ... ~13 min
+BUCKET_BOUNDS_MS = [0.05 * (2 ** i) for i in range(24)]
+
+
+class LatencyHistogram:
+    """Fixed log-bucket histogram; percentiles are bucket upper bounds."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def record(self, ms, ok=True):
+        self.count += 1
+        if not ok: self.errors += 1
+        self.total_ms += ms
+        if self.min_ms is None or ms < self.min_ms: self.min_ms = ms
+        if ms > self.max_ms: self.max_ms = ms
+
+        for i, bound in enumerate(BUCKET_BOUNDS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, p):
+        if not self.count: return 0.0
+        target = p / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                bound = BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min_ms or 0.0, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {f"<={b:g}": n for b, n in zip(BUCKET_BOUNDS_MS, self.buckets) if n},
+        }
+
+
+class Tracer:
+    """
+    Collects timing spans per operation name. Thread-safe, so scraper
+    threads and the GUI thread can record into the same histograms.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._listeners = []
+
+    @contextmanager
+    def span(self, name, **attrs):
+        t0 = time.perf_counter()
+        ok = True
+        try:
+            yield attrs
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.record(name, (time.perf_counter() - t0) * 1000, ok, attrs)
+
+    def traced(self, name):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, ms, ok=True, attrs=None):
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = LatencyHistogram()
+            hist.record(ms, ok)
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try: listener(name, ms, ok, attrs or {})
+            except Exception: pass
+
+    def add_listener(self, listener):
+        """listener(name, duration_ms, ok, attrs) is called after every span."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: hist.to_dict() for name, hist in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def export_json(self, path):
+        data = {"exported": time.strftime("%Y-%m-%d %H:%M:%S"), "operations": self.snapshot()}
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, indent=2)
+
+
+# One tracer for the whole app
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
@@ -0,0 +1,92 @@
+# profiler_capture.py
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class ProfilerCapture:
+    """
+    One-shot cProfile + tracemalloc recording.
+
+    arm() prepares a capture; the next operation wrapped in capture(name)
+    is recorded and writes, into the output folder:
+        profile-<name>-<time>.pstats       (open with pstats / snakeviz)
+        profile-<name>-<time>.tracemalloc  (tracemalloc.Snapshot.load)
+        profile-<name>-<time>.txt          (top functions and allocations)
+    """
+
+    def __init__(self):
+        self.armed = False
+        self.output_dir = None
+        self.on_finished = None
+        self._active = False
+
+    def arm(self, output_dir):
+        self.output_dir = output_dir
+        self.armed = True
+
+    def disarm(self):
+        self.armed = False
+
+    @contextmanager
+    def capture(self, name):
+        if not self.armed or self._active:
+            yield
+            return
+
+        self.armed = False
+        self._active = True
+        own_tracemalloc = not tracemalloc.is_tracing()
+        if own_tracemalloc:
+            tracemalloc.start(25)
+        tracemalloc.reset_peak()
+
+        profiler = cProfile.Profile()
+        t0 = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - t0
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if own_tracemalloc:
+                tracemalloc.stop()
+            self._active = False
+
+            base = self._write(name, profiler, snapshot, duration, peak)
+            if self.on_finished:
+                self.on_finished(name, base)
+
+    def _write(self, name, profiler, snapshot, duration, peak):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile-{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        try:
+            profiler.dump_stats(base + ".pstats")
+            snapshot.dump(base + ".tracemalloc")
+
+            out = io.StringIO()
+            out.write(f"Operation: {name}\nWall time: {duration * 1000:.1f} ms\n")
+            out.write(f"Peak traced memory: {peak / (1024 * 1024):.2f} MiB\n\n")
+            out.write("=== Top functions (cumulative) ===\n")
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+            out.write("\n=== Top allocations (by line) ===\n")
+            for stat in snapshot.statistics("lineno")[:25]:
+                out.write(f"{stat}\n")
+
+            with open(base + ".txt", 'w', encoding='utf-8') as fh:
+                fh.write(out.getvalue())
+            logging.info(f"Profile written: {base}.pstats")
+        except Exception as e:
+            logging.error(f"Could not write profile for {name}: {e}")
+        return base
+
+
+# One capture shared by the main window and the dialogs
+profiler = ProfilerCapture()
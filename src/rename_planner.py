@@ -0,0 +1,155 @@
+# rename_planner.py
+import os
+import re
+import string
+import uuid
+
+DEFAULT_TEMPLATE = "{tt} - {artist} - {title}{ext}"
+
+# Template field -> (tag key, fallback when the tag is empty)
+TEMPLATE_FIELDS = {
+    "tt": ("tracknumber", "00"),
+    "track": ("tracknumber", "0"),
+    "title": ("title", "Unknown"),
+    "artist": ("artist", "Unknown"),
+    "album": ("album", "Unknown"),
+    "albumartist": ("albumartist", "Unknown"),
+    "year": ("year", ""),
+    "genre": ("genre", ""),
+    "disc": ("discnumber", ""),
+    "ext": (None, ""),
+    "name": (None, ""),
+}
+
+
+def sanitize_filename(name):
+    return re.sub(r'[<>:"/\\|?*]', '', name).strip()
+
+
+class FilenameTemplate:
+    """
+    Filename pattern such as "{tt} - {artist} - {title}{ext}", parsed once.
+
+    Fields: tt (2-digit track), track, title, artist, album, albumartist,
+    year, genre, disc, ext (with dot) and name (current name without ext).
+    Raises ValueError for unknown fields or broken braces.
+    """
+
+    def __init__(self, pattern=DEFAULT_TEMPLATE):
+        self.pattern = pattern
+        self.parts = []
+        for literal, field, spec, conversion in string.Formatter().parse(pattern):
+            if field is not None and field not in TEMPLATE_FIELDS:
+                raise ValueError(f"Unknown field in filename template: {{{field}}}")
+            if spec or conversion:
+                raise ValueError(f"Format options are not supported: {{{field}}}")
+            self.parts.append((literal, field))
+
+    def render(self, file_path, values):
+        """File name (no folder) for file_path from a {tag_key: value} dict."""
+        stem, ext = os.path.splitext(os.path.basename(file_path))
+        out = []
+        for literal, field in self.parts:
+            out.append(literal)
+            if field is None: continue
+            if field == "ext":
+                out.append(ext)
+            elif field == "name":
+                out.append(stem)
+            elif field == "tt":
+                try: out.append(f"{int(str(values.get('tracknumber') or '').split('/')[0]):02d}")
+                except ValueError: out.append("00")
+            else:
+                tag_key, fallback = TEMPLATE_FIELDS[field]
+                out.append(sanitize_filename(str(values.get(tag_key) or "")) or fallback)
+        return "".join(out)
+
+
+class RenamePlan:
+    """
+    All renames of one batch, resolved against each other and the disk.
+
+    targets maps source -> final path (sources that keep their name are
+    left out). Two sources wanting the same name, or a name taken by a file
+    that is not moving, get a " (2)", " (3)"... suffix; those are listed in
+    collisions. temp maps source -> a hidden temporary name in the same
+    folder: the save runs source -> temp for every file, then temp -> target,
+    so swaps and longer cycles never overwrite anything.
+    """
+
+    def __init__(self, targets, temp, collisions, cycles):
+        self.targets = targets
+        self.temp = temp
+        self.collisions = collisions
+        self.cycles = cycles
+
+    def __len__(self):
+        return len(self.targets)
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _same_file(a, b):
+    # A case-only rename on a case-insensitive disk finds the source itself at the target
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def plan_renames(wanted):
+    """RenamePlan for a {source path: wanted file name or full path} dict."""
+    sources = {_key(src) for src in wanted}
+    wanted_paths = {}
+    taken = set()
+    for src, name in wanted.items():
+        target = os.path.join(os.path.dirname(src), name) if not os.path.dirname(name) else name
+        if os.path.abspath(target) == os.path.abspath(src):
+            # Keeps its name, so it still occupies it
+            taken.add(_key(src))
+        else:
+            wanted_paths[src] = target
+
+    targets = {}
+    collisions = []
+    for src, target in wanted_paths.items():
+        stem, ext = os.path.splitext(target)
+        candidate, n = target, 1
+        # Free means: not claimed in this batch, and not on disk unless that file moves away
+        # (or is the source itself)
+        while _key(candidate) in taken or (os.path.exists(candidate) and _key(candidate) not in sources
+                                           and not _same_file(candidate, src)):
+            n += 1
+            candidate = f"{stem} ({n}){ext}"
+        if candidate != target:
+            collisions.append((src, target, candidate))
+        taken.add(_key(candidate))
+        targets[src] = candidate
+
+    batch = uuid.uuid4().hex[:8]
+    temp = {}
+    for i, src in enumerate(targets):
+        ext = os.path.splitext(src)[1]
+        temp[src] = os.path.join(os.path.dirname(src), f".eirekes-{batch}-{i}{ext}.tmp")
+
+    return RenamePlan(targets, temp, collisions, _find_cycles(targets))
+
+
+def _find_cycles(targets):
+    """Groups of sources that rename onto each other in a loop (e.g. swapped tracks)."""
+    next_of = {_key(src): _key(dst) for src, dst in targets.items()}
+    original = {_key(src): src for src in targets}
+    cycles, seen = [], set()
+    for start in next_of:
+        if start in seen: continue
+        chain, node = [], start
+        while node in next_of and node not in seen and node not in chain:
+            chain.append(node)
+            node = next_of[node]
+        seen.update(chain)
+        if node in chain and chain.index(node) < len(chain) - 1:
+            # (a file onto itself is a case-only rename, not a cycle)
+            cycles.append([original[k] for k in chain[chain.index(node):]])
+    return cycles
@@ -0,0 +1,306 @@
+# rpc_server.py
+"""
+Local automation API: JSON-RPC 2.0 over HTTP, bound to 127.0.0.1 only.
+
+    python main.py --serve --port 8765
+
+POST / with one request object or a batch array (the calls of a batch run
+concurrently). Methods and params:
+
+    load_folder    {folder}                          -> {files, resumed}
+    fetch_album    {url, cover=false}                -> {album, tracks, cover}
+    stage_matches  {folder, tracks, album=[], options={}, files=<folder order>, append=false}
+                                                     -> {staged, names}
+    get_metadata   {folder, paths=<all files>}       -> {path: {tag: value}}
+    save           {folder, replaygain=false}        -> {saved, errors, replaygain_skipped}
+
+tracks rows are [Num, Title, Artist, LyricsRef, Comment] as returned by
+fetch_album; staging and saving behave exactly like the window (same
+TaggingSession code). Every folder has its own session and save journal;
+calls on one folder run one after another, different folders in parallel.
+File and network work runs on a thread pool, the event loop only parses.
+"""
+import asyncio
+import hashlib
+import ipaddress
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from perf_trace import tracer
+from save_journal import SaveJournal
+from tagging_core import TaggingSession
+
+DEFAULT_PORT = 8765
+MAX_BODY = 16 * 1024 * 1024
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+FOLDER_NOT_LOADED = -32001
+
+STATUS_TEXT = {200: "OK", 204: "No Content", 400: "Bad Request", 403: "Forbidden",
+               405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class AutomationServer:
+    def __init__(self, log_dir, rename_pattern, max_workers=8):
+        self.journal_dir = os.path.join(log_dir, "rpc")
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.rename_pattern = rename_pattern
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rpc-io")
+        self.sessions = {}      # folder -> TaggingSession
+        self.locks = {}         # folder -> asyncio.Lock
+        self.methods = {
+            "load_folder": self.load_folder,
+            "fetch_album": self.fetch_album,
+            "stage_matches": self.stage_matches,
+            "get_metadata": self.get_metadata,
+            "save": self.save,
+        }
+
+    async def run_io(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    # =========================================================
+    # SESSIONS
+    # =========================================================
+    def lock_for(self, folder):
+        return self.locks.setdefault(folder, asyncio.Lock())
+
+    def session_for(self, params):
+        folder = os.path.abspath(self.param(params, "folder", str))
+        session = self.sessions.get(folder)
+        if session is None:
+            raise RpcError(FOLDER_NOT_LOADED, f"Folder not loaded: {folder}")
+        return folder, session
+
+    def new_session(self, folder):
+        name = hashlib.sha1(folder.encode('utf-8')).hexdigest()[:12]
+        return TaggingSession(os.path.join(self.journal_dir, f"{name}.jsonl"),
+                              os.path.join(self.journal_dir, f"{name}-last.jsonl"),
+                              self.rename_pattern)
+
+    @staticmethod
+    def param(params, name, kind, default=None, required=True):
+        if name not in params:
+            if required and default is None:
+                raise RpcError(INVALID_PARAMS, f"Missing param: {name}")
+            return default
+        if not isinstance(params[name], kind):
+            raise RpcError(INVALID_PARAMS, f"Wrong type for param: {name}")
+        return params[name]
+
+    # =========================================================
+    # METHODS
+    # =========================================================
+    async def load_folder(self, params):
+        folder = os.path.abspath(self.param(params, "folder", str))
+        if not os.path.isdir(folder):
+            raise RpcError(INVALID_PARAMS, f"Not a folder: {folder}")
+        async with self.lock_for(folder):
+            session = self.sessions.get(folder) or self.new_session(folder)
+            # No one to ask here: a batch cut off by a crash is always finished
+            journal = await self.run_io(SaveJournal.load, session.journal_file)
+            resumed = 0
+            if journal and not journal.finished and journal.unfinished_count():
+                resumed, _ = await self.run_io(session.resume_journal, journal)
+            files = await self.run_io(session.load_folder, folder)
+            self.sessions[folder] = session
+        return {"files": files, "resumed": resumed}
+
+    async def fetch_album(self, params):
+        from scraper import get_album_scraper
+        url = self.param(params, "url", str)
+        scraper = get_album_scraper()
+        album, tracks = await self.run_io(scraper.fetch_data, url)
+        cover = None
+        if album and self.param(params, "cover", bool, False, required=False):
+            cover = await self.run_io(scraper.get_cover, url)
+        return {"album": album, "tracks": tracks, "cover": cover}
+
+    async def stage_matches(self, params):
+        folder, session = self.session_for(params)
+        tracks = self.param(params, "tracks", list)
+        album = self.param(params, "album", list, [], required=False)
+        options = {'title': True, 'artist': True, 'track': True, 'rename': True, 'lyrics': False}
+        options.update(self.param(params, "options", dict, {}, required=False))
+        append = self.param(params, "append", bool, False, required=False)
+        async with self.lock_for(folder):
+            files = self.param(params, "files", list, session.files, required=False)
+            unknown = [p for p in files if p not in session.files]
+            if unknown:
+                raise RpcError(INVALID_PARAMS, f"Not in folder: {unknown[0]}")
+            if options.get('rename'):
+                # New names need the disk tags of every renamed file
+                await self.read_missing(session, files)
+            names = await self.run_io(session.stage_matches, files, tracks, album, options, append)
+        return {"staged": len(session.pending_changes), "names": names}
+
+    async def get_metadata(self, params):
+        folder, session = self.session_for(params)
+        async with self.lock_for(folder):
+            paths = self.param(params, "paths", list, session.files, required=False)
+            unknown = [p for p in paths if p not in session.files]
+            if unknown:
+                raise RpcError(INVALID_PARAMS, f"Not in folder: {unknown[0]}")
+            await self.read_missing(session, paths)
+            return {path: session.get_effective_metadata(path) for path in paths}
+
+    async def save(self, params):
+        folder, session = self.session_for(params)
+        replaygain = self.param(params, "replaygain", bool, False, required=False)
+        async with self.lock_for(folder):
+            result = await self.run_io(session.save, replaygain)
+            # Names changed on disk; the next call sees the folder as it is now
+            await self.run_io(session.load_folder, folder)
+        return {"saved": result["saved"], "errors": result["errors"],
+                "replaygain_skipped": result["replaygain_skipped"]}
+
+    async def read_missing(self, session, paths):
+        # Uncached files of the folder are read in parallel on the pool
+        missing = [p for p in paths if p not in session.disk_meta]
+        results = await asyncio.gather(*(self.run_io(session.read_tags, p) for p in missing))
+        for path, data in zip(missing, results):
+            session.disk_meta[path] = data
+
+    # =========================================================
+    # JSON-RPC
+    # =========================================================
+    async def handle_payload(self, body):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return self.error(None, PARSE_ERROR, "Parse error")
+        if isinstance(data, list):
+            if not data:
+                return self.error(None, INVALID_REQUEST, "Empty batch")
+            replies = await asyncio.gather(*(self.dispatch(req) for req in data))
+            return [r for r in replies if r is not None] or None
+        return await self.dispatch(data)
+
+    async def dispatch(self, req):
+        if not isinstance(req, dict) or req.get("jsonrpc") != "2.0" or not isinstance(req.get("method"), str):
+            return self.error(req.get("id") if isinstance(req, dict) else None, INVALID_REQUEST, "Invalid request")
+        req_id = req.get("id")
+        notification = "id" not in req
+        method = req["method"]
+        params = req.get("params", {})
+
+        handler = self.methods.get(method)
+        started = time.perf_counter()
+        ok = False
+        try:
+            if handler is None:
+                raise RpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "Params must be an object")
+            reply = {"jsonrpc": "2.0", "id": req_id, "result": await handler(params)}
+            ok = True
+        except RpcError as e:
+            reply = self.error(req_id, e.code, str(e))
+        except Exception as e:
+            logging.exception(f"RPC {method} failed")
+            reply = self.error(req_id, SERVER_ERROR, str(e))
+        if handler:
+            tracer.record(f"rpc.{method}", (time.perf_counter() - started) * 1000, ok)
+        return None if notification else reply
+
+    @staticmethod
+    def error(req_id, code, message):
+        return {"jsonrpc": "2.0", "id": req_id, "error": {"code": code, "message": message}}
+
+    # =========================================================
+    # HTTP
+    # =========================================================
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        try:
+            if not peer or not ipaddress.ip_address(peer[0]).is_loopback:
+                return
+            while True:
+                request_line = await reader.readline()
+                if not request_line: break
+                http_method = request_line.decode('latin-1').split(' ', 1)[0]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''): break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, None, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                if http_method != 'POST':
+                    await self.respond(writer, 405, None, keep_alive)
+                elif 'origin' in headers:
+                    # Web pages must not be able to drive the tagger
+                    await self.respond(writer, 403, None, keep_alive)
+                else:
+                    payload = await self.handle_payload(body)
+                    await self.respond(writer, 200 if payload is not None else 204, payload, keep_alive)
+                if not keep_alive: break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else b''
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if body:
+            head.append("Content-Type: application/json")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+
+async def run_server(server, port):
+    listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", port)
+    logging.info(f"Automation API listening on 127.0.0.1:{port}")
+    print(f"Eirekes Manager automation API on http://127.0.0.1:{port}/ (Ctrl+C to stop)")
+    async with listener:
+        await listener.serve_forever()
+
+
+_qt_app = None
+
+
+def serve(port=DEFAULT_PORT, max_workers=8):
+    from PyQt6.QtCore import QCoreApplication, QSettings
+    from app_logging import setup_logging
+    from rename_planner import DEFAULT_TEMPLATE
+    # Image plugins (artwork encoding) need an application object, not a GUI;
+    # held at module level so it lives as long as the process
+    global _qt_app
+    _qt_app = QCoreApplication.instance() or QCoreApplication(["eirekes-rpc"])
+
+    log_dir = os.path.join(os.path.expanduser("~"), "EirekesManagerLogs")
+    os.makedirs(log_dir, exist_ok=True)
+    setup_logging(log_dir)
+    settings = QSettings("OilsjterseLiekes", "MetadataMaster")
+    server = AutomationServer(log_dir, settings.value("rename_template", DEFAULT_TEMPLATE), max_workers)
+    try:
+        asyncio.run(run_server(server, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.pool.shutdown(wait=True)
+        logging.info("Automation API stopped")
+    return 0
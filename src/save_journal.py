@@ -0,0 +1,164 @@
+# save_journal.py
+import json
+import os
+import time
+import uuid
+
+STEP_TAGS = "tags"
+STEP_RENAME = "rename"
+STEP_LYRICS = "lyrics"
+# First half of a two-phase rename: the file sits under its temporary name
+STEP_RENAME_TMP = "rename_tmp"
+
+
+class SaveJournal:
+    """
+    Append-only write-ahead journal for one batch save.
+
+    The first line holds the full plan (tags, original tag values, rename
+    source/target, lyrics sidecar). Every finished step appends one small
+    record, so after a crash the batch can be resumed or rolled back.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.batch_id = None
+        self.created = None
+        self.entries = []
+        self.finished = False
+        self._done = set()
+        self._fh = None
+        self._torn_tail = False
+
+    # =========================================================
+    # CREATE / LOAD
+    # =========================================================
+    @classmethod
+    def begin(cls, path, entries):
+        journal = cls(path)
+        journal.batch_id = uuid.uuid4().hex
+        journal.created = time.time()
+        journal.entries = entries
+
+        journal._fh = open(path, 'w', encoding='utf-8')
+        journal._write({
+            "type": "plan",
+            "batch": journal.batch_id,
+            "created": journal.created,
+            "entries": entries
+        })
+        # The plan is the one record we cannot lose, force it to disk
+        os.fsync(journal._fh.fileno())
+        return journal
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return None
+
+        journal = cls(path)
+        with open(path, 'r', encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Half-written last line from a crash
+                    journal._torn_tail = not line.endswith("\n")
+                    continue
+
+                kind = record.get("type")
+                if kind == "plan":
+                    journal.batch_id = record.get("batch")
+                    journal.created = record.get("created")
+                    journal.entries = record.get("entries", [])
+                elif kind == "done":
+                    journal._done.add((record["i"], record["step"]))
+                elif kind == "undone":
+                    journal._done.discard((record["i"], record["step"]))
+                elif kind == "end":
+                    journal.finished = True
+
+        if journal.batch_id is None:
+            return None
+        return journal
+
+    # =========================================================
+    # STEP STATE
+    # =========================================================
+    def steps_for(self, index):
+        entry = self.entries[index]
+        steps = []
+        if entry.get("tags") or entry.get("artwork") or entry.get("replaygain"):
+            steps.append(STEP_TAGS)
+        if entry.get("rename_to") and entry["rename_to"] != entry["path"]:
+            steps.append(STEP_RENAME)
+        if entry.get("lyrics"):
+            steps.append(STEP_LYRICS)
+        return steps
+
+    def is_done(self, index, step):
+        return (index, step) in self._done
+
+    def mark_done(self, index, step):
+        self._done.add((index, step))
+        self._append({"type": "done", "i": index, "step": step})
+
+    def mark_undone(self, index, step):
+        self._done.discard((index, step))
+        self._append({"type": "undone", "i": index, "step": step})
+
+    def unfinished_count(self):
+        count = 0
+        for i in range(len(self.entries)):
+            if any(not self.is_done(i, step) for step in self.steps_for(i)):
+                count += 1
+        return count
+
+    def final_path(self, index):
+        entry = self.entries[index]
+        if self.is_done(index, STEP_RENAME):
+            return entry["rename_to"]
+        if self.is_done(index, STEP_RENAME_TMP):
+            return entry["rename_tmp"]
+        return entry["path"]
+
+    # =========================================================
+    # CLOSE
+    # =========================================================
+    def finish(self, archive_path=None):
+        """Marks the batch complete and keeps it around for a later undo."""
+        self._append({"type": "end"})
+        self.finished = True
+        self.close()
+        if archive_path:
+            os.replace(self.path, archive_path)
+            self.path = archive_path
+
+    def discard(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    # =========================================================
+    # INTERNALS
+    # =========================================================
+    def _append(self, record):
+        if not self._fh:
+            self._fh = open(self.path, 'a', encoding='utf-8')
+            if self._torn_tail:
+                self._fh.write("\n")
+                self._torn_tail = False
+        self._write(record)
+
+    def _write(self, record):
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # Flushing is enough to survive an app crash; fsync per step would make
+        # large batches crawl on slow disks.
+        self._fh.flush()
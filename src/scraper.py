@@ -1,28 +1,71 @@
+import copy
+import logging
 import requests
 import re
-from lyrics_scraper import LyricsScraper
+from concurrent.futures import ThreadPoolExecutor
+from lyrics_scraper import LyricsScraper, BASE_URL, site_origin
+from cover_cache import cover_cache
+from perf_trace import span, traced
+from lyrics_store import lyrics_store
+from wp_source import WpSource
 
 class AlbumScraper:
     def __init__(self):
-        self.lyrics_scraper = LyricsScraper()
+        self.session = requests.Session()
+        self.lyrics_scraper = LyricsScraper(self.session)
+        # Bulk JSON from the site's REST API first, HTML scraping as fallback
+        self.wp_source = WpSource(self.session, self.lyrics_scraper)
+        self._album_cache = {}
+        # Covers download in the background while the table is built and lyrics load
+        self._cover_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cover")
+        self._cover_futures = {}
 
     # =========================================================
     # PUBLIC ENTRY POINT
     # =========================================================
-    def fetch_data(self, album_url):
+    def fetch_data(self, album_url, use_cache=True):
+        if use_cache and album_url in self._album_cache:
+            # Callers edit the lists they get back, so hand out copies
+            return copy.deepcopy(self._album_cache[album_url])
+
+        album_data, tracks = self.fetch_data_uncached(album_url)
+        if tracks:
+            self._album_cache[album_url] = copy.deepcopy((album_data, tracks))
+        return album_data, tracks
+
+    def fetch_data_uncached(self, album_url):
         print(f"--- DEBUG: Starting fetch_data for {album_url} ---")
-        album_data, tracks = self.fetch_album_metadata(album_url)
+        html_content = None
+        # One wp-json request returns the album post (same table) and its cover
+        wp_album = self.wp_source.fetch_album(album_url)
+        if wp_album:
+            album_data, tracks = self.fetch_album_metadata(album_url, wp_album["html"])
+            if tracks:
+                html_content = wp_album["html"]
+                self.start_cover_download(album_url, html_content, wp_album["cover_url"])
+            else:
+                logging.debug("No track table in the API content, scraping the page")
+
+        if html_content is None:
+            # One download of the album page feeds both the table and the track links
+            html_content = self.fetch_album_page(album_url)
+            if html_content is None:
+                return [], []
+            self.start_cover_download(album_url, html_content)
+            album_data, tracks = self.fetch_album_metadata(album_url, html_content)
 
         if not tracks:
             print("--- DEBUG: No tracks found in metadata ---")
             return album_data, tracks
 
-        # Fetch track URLs/Lyrics map
+        # Track pages are NOT downloaded here; lyrics are registered lazily
+        # and only fetched when the matcher asks for them.
         try:
-            lyrics_map = self.lyrics_scraper.get_lyrics_map_from_album(album_url)
+            track_index = self.lyrics_scraper.build_track_index(html_content, site_origin(album_url))
         except Exception as e:
-            print(f"DEBUG: Error fetching lyrics map: {e}")
-            lyrics_map = {}
+            print(f"DEBUG: Error indexing track links: {e}")
+            track_index = {}
+        track_urls = list(dict.fromkeys(track_index.values()))
 
         for track in tracks:
             comment = ""
@@ -64,17 +107,23 @@ class AlbumScraper:
             if len(track) > 1:
                 original_title = track[1]
                 track_title = self.lyrics_scraper.normalize_title(original_title)
-                lyrics = lyrics_map.get(track_title, "")
+                # Only a ref travels with the track, the text stays in the store
+                loader = self.lyrics_scraper.lyrics_loader(album_url, track_title, track_index.get(track_title))
+                if self.wp_source.available(album_url):
+                    # All lyrics of the album in one API request, track pages as fallback
+                    loader = self.wp_source.lyrics_loader(album_url, track_urls, track_title,
+                                                          track_index.get(track_title), loader)
+                lyrics = lyrics_store.register(f"{album_url}#{track_title}", loader)
             else:
                 lyrics = ""
 
-            # --- Force Structure: [Num, Title, Artist, Lyrics, Comment] ---
+            # --- Force Structure: [Num, Title, Artist, LyricsRef, Comment] ---
             # 1. Ensure we have at least 3 elements (Num, Title, Artist)
             track[:] = track[:3]
             while len(track) < 3:
                 track.append("")
             
-            # 2. Add Lyrics and Comment
+            # 2. Add Lyrics ref and Comment
             track.append(lyrics)
             track.append(comment)
 
@@ -83,8 +132,11 @@ class AlbumScraper:
     # =========================================================
     # ALBUM METADATA
     # =========================================================
-    def fetch_album_metadata(self, url):
-        raw_data = self.extract_and_clean_td_content(url)
+    def fetch_album_metadata(self, url, html_content=None):
+        if html_content is not None:
+            raw_data = self.parse_td_content(html_content)
+        else:
+            raw_data = self.extract_and_clean_td_content(url)
         if not raw_data:
             return [], []
 
@@ -96,44 +148,93 @@ class AlbumScraper:
 
         return self.process_string(cleaned_data)
 
+    # =========================================================
+    # COVER ART
+    # =========================================================
+    def extract_cover_url(self, html_content):
+        # og:image is the album cover on the site; the featured image is the fallback
+        for tag in re.findall(r'<meta\b[^>]*>', html_content, flags=re.IGNORECASE):
+            if re.search(r'property=["\']og:image["\']', tag, flags=re.IGNORECASE):
+                m = re.search(r'content=["\']([^"\']+)["\']', tag)
+                if m: return self.absolute_url(m.group(1))
+
+        for tag in re.findall(r'<img\b[^>]*>', html_content, flags=re.IGNORECASE):
+            if "wp-post-image" in tag:
+                m = re.search(r'\ssrc=["\']([^"\']+)["\']', tag)
+                if m: return self.absolute_url(m.group(1))
+        return None
+
+    def absolute_url(self, url):
+        url = url.replace("&amp;", "&")
+        if url.startswith("//"): return "https:" + url
+        if url.startswith("/"): return BASE_URL + url
+        return url
+
+    def start_cover_download(self, album_url, html_content, cover_url=None):
+        if album_url in self._cover_futures: return
+        cover_url = cover_url or self.extract_cover_url(html_content)
+        if not cover_url:
+            logging.debug("No cover image on album page")
+            return
+        self._cover_futures[album_url] = self._cover_pool.submit(cover_cache.fetch, cover_url, self.session)
+
+    def get_cover(self, album_url, timeout=20):
+        """Local path of the album cover (waits for the download), or None."""
+        future = self._cover_futures.get(album_url)
+        if future is None: return None
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            logging.error(f"Cover Error: {e}")
+            return None
+
     # =========================================================
     # HTML SCRAPING
     # =========================================================
-    def extract_and_clean_td_content(self, url):
+    def fetch_album_page(self, url):
         try:
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            html_content = response.text
+            with span("scrape.request", url=url):
+                response = self.session.get(url, timeout=15)
+                response.raise_for_status()
+            return response.text
 
-            cleaned_content = []
-            start_index = 0
+        except Exception as e:
+            print(f"Scrape Error: {e}")
+            return None
 
-            while True:
-                start_index = html_content.find("<td", start_index)
-                if start_index == -1:
-                    break
+    def extract_and_clean_td_content(self, url):
+        html_content = self.fetch_album_page(url)
+        if html_content is None:
+            return None
+        return self.parse_td_content(html_content)
 
-                end_index = html_content.find("</td>", start_index)
-                if end_index == -1:
-                    break
+    @traced("scrape.parse")
+    def parse_td_content(self, html_content):
+        cleaned_content = []
+        start_index = 0
 
-                td_content = html_content[start_index:end_index + 5]
-                
-                # FIX: 
-                # 1. Replace block tags (<br>, <p>, <div>) with NEWLINE to force splitting
-                td_content = re.sub(r'<(br|p|div)[^>]*>', '\n', td_content, flags=re.IGNORECASE)
-                # 2. Replace inline tags (<strong>, <span>) with SPACE to keep "Label: Value" together
-                td_content = re.sub(r'<[^>]+>', ' ', td_content)
-                
-                cleaned_content.append(td_content.strip())
+        while True:
+            start_index = html_content.find("<td", start_index)
+            if start_index == -1:
+                break
 
-                start_index = end_index + 5
+            end_index = html_content.find("</td>", start_index)
+            if end_index == -1:
+                break
 
-            return cleaned_content
+            td_content = html_content[start_index:end_index + 5]
+            
+            # FIX: 
+            # 1. Replace block tags (<br>, <p>, <div>) with NEWLINE to force splitting
+            td_content = re.sub(r'<(br|p|div)[^>]*>', '\n', td_content, flags=re.IGNORECASE)
+            # 2. Replace inline tags (<strong>, <span>) with SPACE to keep "Label: Value" together
+            td_content = re.sub(r'<[^>]+>', ' ', td_content)
+            
+            cleaned_content.append(td_content.strip())
 
-        except Exception as e:
-            print(f"Scrape Error: {e}")
-            return None
+            start_index = end_index + 5
+
+        return cleaned_content
 
     # =========================================================
     # TEXT CLEANUP
@@ -212,4 +313,17 @@ class AlbumScraper:
         # Remove incomplete rows
         array_2d = [track for track in array_2d if len(track) > 1]
 
-        return array_1d, array_2d
\ No newline at end of file
+        return array_1d, array_2d
+
+
+# =========================================================
+# SHARED INSTANCE
+# =========================================================
+_shared_scraper = None
+
+def get_album_scraper():
+    """Long-lived scraper shared by every matcher dialog (warm session + cache)."""
+    global _shared_scraper
+    if _shared_scraper is None:
+        _shared_scraper = AlbumScraper()
+    return _shared_scraper
@@ -0,0 +1,102 @@
+# search_index.py
+import bisect
+import unicodedata
+
+
+def normalize(text):
+    """Lowercase without accents, so 'Vér' is found with 'ver'."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    In-memory index for the file filter, updated one file at a time.
+
+    Every file has one searchable text (file name plus whatever tag values
+    are known). Terms of three or more characters are looked up through a
+    trigram -> paths map and then checked as substrings; shorter terms use
+    a sorted word list for prefix matches. A query matches a file when
+    every term does.
+    """
+
+    def __init__(self):
+        self._text = {}        # path -> normalized text
+        self._grams = {}       # trigram -> set of paths
+        self._words = {}       # word -> set of paths
+        self._vocab = []       # sorted words, for prefix ranges
+
+    def __len__(self):
+        return len(self._text)
+
+    def clear(self):
+        self._text.clear()
+        self._grams.clear()
+        self._words.clear()
+        self._vocab = []
+
+    def update(self, path, fields):
+        text = normalize(" ".join(f for f in fields if f))
+        if self._text.get(path) == text: return
+        self.remove(path)
+        self._text[path] = text
+
+        for gram in trigrams(text):
+            self._grams.setdefault(gram, set()).add(path)
+        for word in set(text.split()):
+            paths = self._words.get(word)
+            if paths is None:
+                paths = self._words[word] = set()
+                bisect.insort(self._vocab, word)
+            paths.add(path)
+
+    def remove(self, path):
+        text = self._text.pop(path, None)
+        if text is None: return
+
+        for gram in trigrams(text):
+            paths = self._grams.get(gram)
+            if paths is not None:
+                paths.discard(path)
+                if not paths: del self._grams[gram]
+        for word in set(text.split()):
+            paths = self._words.get(word)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self._words[word]
+                    del self._vocab[bisect.bisect_left(self._vocab, word)]
+
+    def search(self, query):
+        """Set of matching paths, or None when the query is empty (no filter)."""
+        terms = normalize(query).split()
+        if not terms: return None
+
+        # Longest term first: it has the smallest candidate set
+        result = None
+        for term in sorted(terms, key=len, reverse=True):
+            matches = self._match_term(term, result)
+            result = matches if result is None else result & matches
+            if not result: return set()
+        return result
+
+    def _match_term(self, term, candidates=None):
+        if len(term) < 3:
+            matches = set()
+            start = bisect.bisect_left(self._vocab, term)
+            for word in self._vocab[start:]:
+                if not word.startswith(term): break
+                matches |= self._words[word]
+            return matches
+
+        if candidates is None:
+            postings = [self._grams.get(g) for g in trigrams(term)]
+            if not all(postings): return set()
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        # Trigrams can all be present without the term itself being there
+        return {p for p in candidates if term in self._text.get(p, "")}
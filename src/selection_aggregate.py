@@ -0,0 +1,63 @@
+# selection_aggregate.py
+from collections import Counter
+
+
+class SelectionAggregate:
+    """
+    Running "common value / <Multiple Values>" state for the current
+    multi-selection. Keeps a value counter per field so adding or removing
+    one file only touches that file's values.
+    """
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self._members = {}
+        self._counts = {field: Counter() for field in self.fields}
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, path):
+        return path in self._members
+
+    def paths(self):
+        return list(self._members)
+
+    def clear(self):
+        self._members.clear()
+        for counter in self._counts.values():
+            counter.clear()
+
+    # =========================================================
+    # MEMBERSHIP
+    # =========================================================
+    def add(self, path, values):
+        if path in self._members: self.remove(path)
+        snapshot = {field: values.get(field, "") for field in self.fields}
+        self._members[path] = snapshot
+        for field, val in snapshot.items():
+            self._counts[field][val] += 1
+
+    def remove(self, path):
+        snapshot = self._members.pop(path, None)
+        if snapshot is None: return
+        for field, val in snapshot.items():
+            counter = self._counts[field]
+            counter[val] -= 1
+            if counter[val] <= 0: del counter[val]
+
+    def set_field(self, field, value):
+        """A manual edit gave every selected file the same value."""
+        for snapshot in self._members.values():
+            snapshot[field] = value
+        self._counts[field] = Counter({value: len(self._members)}) if self._members else Counter()
+
+    # =========================================================
+    # RESULT
+    # =========================================================
+    def common_value(self, field):
+        """The shared value, "" for an empty selection, None when values differ."""
+        counter = self._counts[field]
+        if not counter: return ""
+        if len(counter) == 1: return next(iter(counter))
+        return None
@@ -0,0 +1,94 @@
+# stall_watchdog.py
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from PyQt6.QtCore import QObject, QTimer
+from perf_trace import tracer
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StallWatchdog(QObject):
+    """
+    Detects a frozen GUI event loop.
+
+    A QTimer on the GUI thread stamps a heartbeat every `interval_ms`. A
+    background thread checks that heartbeat; when it is older than
+    `threshold_ms` it grabs the main thread's Python stack right then, and
+    once the loop ticks again it logs the stall duration with that stack.
+    Must be created on the GUI thread.
+    """
+
+    def __init__(self, threshold_ms=500, interval_ms=100, parent=None):
+        super().__init__(parent)
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms
+        self._main_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stall = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self):
+        if self._thread: return
+        self._last_tick = time.monotonic()
+        self._timer.start()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._timer.stop()
+
+    # =========================================================
+    # GUI THREAD
+    # =========================================================
+    def _tick(self):
+        self._last_tick = time.monotonic()
+
+    # =========================================================
+    # WATCHER THREAD
+    # =========================================================
+    def _watch(self):
+        threshold = self.threshold_ms / 1000.0
+        poll = min(self.interval_ms, self.threshold_ms) / 2000.0
+
+        while not self._stop.wait(poll):
+            last_tick = self._last_tick
+
+            if self._stall is None:
+                if time.monotonic() - last_tick > threshold:
+                    self._stall = (last_tick, self._capture_main_stack())
+                    logging.warning(f"UI stall: event loop silent for more than {self.threshold_ms} ms")
+            else:
+                started, stack = self._stall
+                if last_tick > started:
+                    # The heartbeat is due every interval, anything beyond that was blocked
+                    duration_ms = max(0.0, (last_tick - started) * 1000 - self.interval_ms)
+                    self._report(duration_ms, stack)
+                    self._stall = None
+
+    def _capture_main_stack(self):
+        frame = sys._current_frames().get(self._main_id)
+        if frame is None: return []
+        return traceback.extract_stack(frame)
+
+    def _report(self, duration_ms, stack):
+        # Innermost frame in our own code, else the innermost frame at all
+        app_frames = [f for f in stack if os.path.abspath(f.filename).startswith(APP_DIR)]
+        frames = app_frames or stack
+        where = ""
+        if frames:
+            frame = frames[-1]
+            where = f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+
+        stack_text = "".join(traceback.format_list(stack))
+        logging.warning(f"UI stall of {duration_ms:.0f} ms at {where}\n{stack_text}")
+        tracer.record("ui.stall", duration_ms, True, {"where": where, "stack": stack_text})
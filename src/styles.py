@@ -37,18 +37,18 @@ QPushButton:hover { background-color: #4da6ff; color: white; border: 1px solid #
 QPushButton:pressed { background-color: #0056b3; }
 QPushButton:disabled { background-color: #2a2a2a; color: #555; border: 1px solid #333; }
 
-QListWidget { 
+QListWidget, QListView { 
     background-color: #1e1e1e; 
     border: 1px solid #444; 
     border-radius: 4px; 
     outline: none;
 }
-QListWidget::item { 
+QListWidget::item, QListView::item { 
     height: 28px; 
     padding-left: 5px; 
     border-bottom: 1px solid #2a2a2a; 
 }
-QListWidget::item:selected { 
+QListWidget::item:selected, QListView::item:selected { 
     background-color: #007bff; 
     color: white; 
 }
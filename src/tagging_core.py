@@ -0,0 +1,570 @@
+# tagging_core.py
+import os
+import logging
+from pending_store import PendingChanges
+from save_journal import SaveJournal, STEP_TAGS, STEP_RENAME, STEP_RENAME_TMP, STEP_LYRICS
+from rename_planner import FilenameTemplate, DEFAULT_TEMPLATE, plan_renames
+from perf_trace import span
+from fast_tags import read_fast_tags
+from lyrics_store import lyrics_store
+from app_logging import log_operation
+from app_translations import tr
+
+# Editor label -> tag key
+TAG_MAP = {
+    "Title": "title", "Artist": "artist", "Album": "album",
+    "Year": "year", "Track": "tracknumber", "Genre": "genre",
+    "Album Artist": "albumartist", "Composer": "composer",
+    "Discnumber": "discnumber", "Comment": "comment"
+}
+AUDIO_EXTENSIONS = ('.mp3', '.m4a', '.flac', '.wav')
+
+
+def list_audio_files(folder):
+    files = sorted([f for f in os.listdir(folder) if f.lower().endswith(AUDIO_EXTENSIONS)])
+    return [os.path.join(folder, f) for f in files]
+
+
+class TaggingSession:
+    """
+    Everything between "open a folder" and "save" without any widgets.
+
+    Holds the staged changes and the disk tag cache of one folder, stages
+    matcher results with the same rules as the GUI, and runs the journaled
+    save pipeline. The main window drives one session; the automation
+    server and the watch daemon each run their own.
+    """
+
+    def __init__(self, journal_file, last_journal_file, rename_pattern=DEFAULT_TEMPLATE):
+        self.journal_file = journal_file
+        self.last_journal_file = last_journal_file
+        self.pending_changes = PendingChanges()
+        self.disk_meta = {}
+        self.folder = None
+        self.files = []
+        self.encoded_artwork = {}
+        # Called with the path whenever tags were read from disk
+        self.on_disk_read = None
+        self.set_rename_template(rename_pattern)
+
+    # =========================================================
+    # FOLDER / METADATA
+    # =========================================================
+    def load_folder(self, folder):
+        self.pending_changes.clear()
+        self.disk_meta.clear()
+        self.folder = folder
+        try:
+            self.files = list_audio_files(folder)
+        except OSError:
+            self.files = []
+        return self.files
+
+    def read_disk_metadata(self, path):
+        data = self.disk_meta.get(path)
+        if data is None:
+            data = self.read_tags(path)
+            self.disk_meta[path] = data
+            if self.on_disk_read: self.on_disk_read(path)
+        return data
+
+    def read_tags(self, path, f=None):
+        # Thread-safe: touches no widgets and no shared state
+        if f is None:
+            # Header-only read; files it can't read the same way go to music_tag
+            with span("tags.read_fast", path=path):
+                data = read_fast_tags(path)
+            if data is not None: return data
+        data = {}
+        try:
+            import music_tag
+            if not f:
+                with span("tags.read", path=path):
+                    f = music_tag.load_file(path)
+            for tag_key in TAG_MAP.values():
+                val = f[tag_key]
+                data[tag_key] = str(val) if val else ""
+        except: pass 
+        return data
+
+    def get_effective_metadata(self, path):
+        disk_data = dict(self.read_disk_metadata(path))
+        disk_data.update(self.pending_changes.changes_for(path, include_flags=False))
+        return disk_data
+
+    def known_metadata(self, path):
+        # Disk values only if already read; staged values win
+        values = dict(self.disk_meta.get(path, {}))
+        values.update(self.pending_changes.changes_for(path, include_flags=False))
+        return values
+
+    def read_cover_bytes(self, path, f=None):
+        """Embedded cover bytes (or None); safe to call from worker threads."""
+        import music_tag
+        if not f:
+            with span("tags.read", path=path):
+                f = music_tag.load_file(path)
+        art = f['artwork']
+        return art.first.data if art else None
+
+    # =========================================================
+    # STAGING
+    # =========================================================
+    def stage_matches(self, reordered_files, track_data, album_data, options, append=False):
+        """
+        Stages matcher results: track_data rows are [Num, Title, Artist,
+        LyricsRef, Comment] in file order. Returns {path: predicted name}
+        for renamed files.
+        """
+        logging.info(f"Staging matches (Append={append})...")
+        if not append:
+            self.pending_changes.clear()
+
+        pending = self.pending_changes
+        if album_data:
+            pending.set_many(reordered_files, 'album', album_data[0])
+            pending.set_many(reordered_files, 'year', album_data[2])
+        pending.set_many(reordered_files, 'genre', "Carnaval")
+        if options.get('rename'): pending.set_many(reordered_files, '_rename', True)
+        if options.get('artwork_path'):
+            pending.set_many(reordered_files, '_artwork_path', options['artwork_path'])
+
+        # Collect each field as one column, then hand it to the store in bulk
+        columns = {'comment': {}, 'tracknumber': {}, 'title': {}, 'artist': {}, '_lyrics': {}}
+        for i, file_path in enumerate(reordered_files):
+            track_info = track_data[i] if i < len(track_data) else []
+
+            web_comment = track_info[4] if len(track_info) > 4 else ""
+            columns['comment'][file_path] = web_comment if web_comment else ""
+
+            if options.get('track'):
+                columns['tracknumber'][file_path] = track_info[0] if len(track_info) > 0 and track_info[0] else str(i+1)
+            if options.get('title') and len(track_info) > 1: 
+                columns['title'][file_path] = track_info[1]
+            if options.get('artist') and len(track_info) > 2: 
+                columns['artist'][file_path] = track_info[2]
+            if options.get('lyrics') and len(track_info) > 3:
+                columns['_lyrics'][file_path] = track_info[3]
+
+        for field, values in columns.items():
+            pending.set_column(field, values)
+
+        staged_names = {}
+        if options.get('rename'):
+            # Same planner as the save, so the preview shows collision suffixes too
+            plan = self.plan_file_renames(reordered_files)
+            for file_path in reordered_files:
+                staged_names[file_path] = os.path.basename(plan.targets.get(file_path, file_path))
+        return staged_names
+
+    # =========================================================
+    # SAVE
+    # =========================================================
+    def save(self, replaygain=False, progress=None):
+        """
+        Saves every staged change through the journal and unstages those paths.
+        Returns {"saved", "errors", "paths", "final_paths", "replaygain_skipped"};
+        final_paths maps every saved path to its name after the renames.
+        """
+        errors = []
+        paths_to_process = self.pending_changes.paths()
+        result = {"saved": 0, "errors": errors, "paths": paths_to_process, "final_paths": {}, "replaygain_skipped": False}
+        if not paths_to_process: return result
+
+        logging.info("Starting Batch Save...")
+        # Plan everything up front and write it to the journal before touching
+        # a single file, so a crash halfway can be resumed or rolled back.
+        with span("save.batch", files=len(paths_to_process)) as batch:
+            entries = self.plan_save(paths_to_process, errors)
+            if replaygain and not self.plan_replaygain(entries, progress):
+                result["replaygain_skipped"] = True
+            journal = SaveJournal.begin(self.journal_file, entries)
+            result["saved"] = self.run_journal(journal, errors)
+            journal.finish(self.last_journal_file)
+            self.rekey_loudness(journal)
+            result["final_paths"] = {entry['path']: journal.final_path(i) for i, entry in enumerate(journal.entries)}
+            batch["saved"] = result["saved"]
+            batch["errors"] = len(errors)
+
+        # Only what this batch took; anything staged since stays staged
+        for path in paths_to_process:
+            self.pending_changes.discard(path)
+        if not self.pending_changes: self.pending_changes.clear()
+        return result
+
+    def plan_save(self, paths, errors):
+        import music_tag
+        entries = []
+        rename_paths = []
+        for file_path in paths:
+            if not os.path.exists(file_path): continue
+            
+            if not os.access(file_path, os.W_OK):
+                self.log_save_error(errors, "save.plan", file_path, f"Locked/Read-only: {os.path.basename(file_path)}")
+                continue
+
+            changes = self.pending_changes.changes_for(file_path)
+
+            # Snapshot the current tag values so the batch can be rolled back
+            original = {}
+            try:
+                with span("tags.read", path=file_path):
+                    f = music_tag.load_file(file_path)
+                for tag_key in TAG_MAP.values():
+                    val = f[tag_key]
+                    original[tag_key] = str(val) if val else ""
+            except Exception as e:
+                self.log_save_error(errors, "save.plan", file_path, f"Tag/Art Error ({os.path.basename(file_path)}): {str(e)}")
+                continue
+
+            # The snapshot doubles as the disk values for the new file name
+            self.disk_meta[file_path] = original
+            if changes.get('_rename'):
+                rename_paths.append(file_path)
+
+            entries.append({
+                "path": file_path,
+                "tags": {k: v for k, v in changes.items() if not k.startswith('_')},
+                "original": original,
+                "artwork": changes.get('_artwork_path'),
+                # The only place the lyrics text is pulled out of the store
+                "lyrics": lyrics_store.get(changes.get('_lyrics')) or None
+            })
+
+        # All target names at once: collisions and swaps are resolved against each other
+        plan = self.plan_file_renames(rename_paths)
+        for src, wanted, used in plan.collisions:
+            logging.warning(f"Rename collision: {os.path.basename(src)} -> {os.path.basename(used)} ({os.path.basename(wanted)} is taken)")
+        if plan.cycles:
+            logging.info(f"Rename plan contains {len(plan.cycles)} cycle(s), using temporary names")
+
+        for entry in entries:
+            entry['rename_to'] = plan.targets.get(entry['path'])
+            entry['rename_tmp'] = plan.temp.get(entry['path'])
+            lyrics_path = os.path.splitext(entry['rename_to'] or entry['path'])[0] + ".txt"
+            entry['lyrics_path'] = lyrics_path
+            entry['lyrics_existed'] = os.path.exists(lyrics_path)
+            entry['lyrics_previous'] = None
+            if entry['lyrics'] and entry['lyrics_existed']:
+                # Kept in the journal so a rollback can put the old text back
+                try:
+                    with open(lyrics_path, 'r', encoding='utf-8', errors='replace') as fh:
+                        entry['lyrics_previous'] = fh.read()
+                except OSError as e:
+                    logging.warning(f"Could not back up {os.path.basename(lyrics_path)}: {e}")
+        return entries
+
+    # --- RENAME PLANNING ---
+    def set_rename_template(self, pattern):
+        try:
+            self.rename_template = FilenameTemplate(pattern)
+        except ValueError as e:
+            logging.error(f"Invalid rename_template '{pattern}': {e}")
+            self.rename_template = FilenameTemplate(DEFAULT_TEMPLATE)
+
+    def plan_file_renames(self, paths):
+        wanted = {path: self.rename_template.render(path, self.known_metadata(path)) for path in paths}
+        return plan_renames(wanted)
+
+    def plan_replaygain(self, entries, progress=None):
+        """
+        Adds ReplayGain tag values to the planned entries (track + per-folder
+        album). Returns False when numpy or ffmpeg is missing.
+        """
+        import loudness
+        if not entries: return True
+        if not loudness.available():
+            return False
+
+        paths = [entry['path'] for entry in entries]
+        with span("loudness.analyze", files=len(paths)):
+            results = loudness.loudness_analyzer.analyze(paths, progress=progress)
+
+        # An album is every analysed file in one folder with the same album tag
+        entry_of = {entry['path']: entry for entry in entries}
+        albums = {}
+        for entry in entries:
+            if entry['path'] not in results: continue
+            album = entry['tags'].get('album', entry['original'].get('album', ""))
+            albums.setdefault((os.path.dirname(entry['path']), album), []).append(entry['path'])
+
+        for (_, album), album_paths in albums.items():
+            album_lufs, album_peak = (None, None)
+            if album:
+                album_lufs, album_peak = loudness.loudness_analyzer.album_values([results[p] for p in album_paths])
+            for path in album_paths:
+                values = loudness.replaygain_values(results[path], album_lufs, album_peak)
+                if values:
+                    entry_of[path]['replaygain'] = values
+        return True
+
+    def rekey_loudness(self, journal):
+        # Tag writes and renames change size/mtime but not the audio
+        if not any(entry.get('replaygain') for entry in journal.entries): return
+        from loudness import loudness_analyzer
+        for i, entry in enumerate(journal.entries):
+            if entry.get('replaygain'):
+                loudness_analyzer.rekey(entry['path'], journal.final_path(i))
+        loudness_analyzer.save()
+
+    def run_journal(self, journal, errors):
+        """Executes every step of the journal that is not marked done yet."""
+        # An album cover is encoded once per batch, not once per file
+        self.encoded_artwork = {}
+        indices = range(len(journal.entries))
+
+        # --- 1. SAVE TAGS (Metadata & Artwork) ---
+        for i in indices:
+            if STEP_TAGS in journal.steps_for(i) and not journal.is_done(i, STEP_TAGS):
+                current_path = journal.final_path(i)
+                try:
+                    self.write_tags(current_path, journal.entries[i])
+                    journal.mark_done(i, STEP_TAGS)
+                    logging.info(tr("saved_log").format(os.path.basename(current_path)))
+                except Exception as e:
+                    self.log_save_error(errors, "save.tags", current_path, f"Tag/Art Error ({os.path.basename(current_path)}): {str(e)}")
+
+        # --- 2. RENAME (every file to its temporary name first, then to its target) ---
+        renames = [i for i in indices if STEP_RENAME in journal.steps_for(i) and not journal.is_done(i, STEP_RENAME)]
+        with span("file.rename_batch", files=len(renames)):
+            for i in renames:
+                if journal.entries[i].get('rename_tmp') and not journal.is_done(i, STEP_RENAME_TMP):
+                    self.rename_step(journal, i, journal.entries[i]['path'], journal.entries[i]['rename_tmp'], STEP_RENAME_TMP, errors)
+            for i in renames:
+                # Journals without temp names rename directly
+                if journal.is_done(i, STEP_RENAME_TMP) or not journal.entries[i].get('rename_tmp'):
+                    if self.rename_step(journal, i, journal.final_path(i), journal.entries[i]['rename_to'], STEP_RENAME, errors):
+                        logging.info(tr("renamed_log").format(os.path.basename(journal.entries[i]['rename_to'])))
+                    else:
+                        self.restore_from_temp(journal, i)
+
+        # --- 3. LYRICS ---
+        for i in indices:
+            if STEP_LYRICS in journal.steps_for(i) and not journal.is_done(i, STEP_LYRICS):
+                current_path = journal.final_path(i)
+                try:
+                    lrc_path = os.path.splitext(current_path)[0] + ".txt"
+                    with open(lrc_path, 'w', encoding='utf-8') as lrc_file:
+                        lrc_file.write(journal.entries[i]['lyrics'])
+                    journal.mark_done(i, STEP_LYRICS)
+                    logging.info(tr("lyrics_log").format(lrc_path))
+                except Exception as e:
+                    self.log_save_error(errors, "save.lyrics", current_path, f"Lyrics Error ({os.path.basename(current_path)}): {str(e)}")
+
+        return len(journal.entries)
+
+    def rename_step(self, journal, i, src, dst, step, errors):
+        """One move of a two-phase rename; never overwrites an existing file."""
+        try:
+            if os.path.exists(src):
+                if os.path.exists(dst):
+                    raise FileExistsError(f"{os.path.basename(dst)} already exists")
+                with span("file.rename", path=src):
+                    os.rename(src, dst)
+            elif not os.path.exists(dst):
+                raise FileNotFoundError(src)
+            # else: moved right before a crash, only the record was lost
+            journal.mark_done(i, step)
+            return True
+        except Exception as e:
+            self.log_save_error(errors, "save.rename", src, f"Rename Error ({os.path.basename(src)}): {str(e)}")
+            return False
+
+    def restore_from_temp(self, journal, i):
+        # A file must not stay behind under its hidden temporary name
+        entry = journal.entries[i]
+        if not journal.is_done(i, STEP_RENAME_TMP): return
+        if os.path.exists(entry['rename_tmp']) and not os.path.exists(entry['path']):
+            try:
+                os.rename(entry['rename_tmp'], entry['path'])
+                journal.mark_undone(i, STEP_RENAME_TMP)
+            except OSError as e:
+                logging.error(f"Could not restore {os.path.basename(entry['path'])}: {e}")
+
+    def write_tags(self, current_path, entry):
+        import music_tag
+        from mutagen.mp4 import MP4, MP4Cover
+        file_ext = os.path.splitext(current_path)[1].lower()
+
+        # A. Eerst tekst tags opslaan met music_tag (werkt goed voor alles)
+        with span("tags.read", path=current_path):
+            f = music_tag.load_file(current_path)
+        file_dirty = False
+        
+        for tag, new_val in entry['tags'].items():
+            if tag in ['tracknumber', 'year', 'discnumber', 'comment']:
+                if new_val == "": 
+                    if f[tag] is not None and str(f[tag]) != "":
+                        f[tag] = None
+                        file_dirty = True
+                    continue
+            
+            current_val = str(f[tag]) if f[tag] else ""
+            if current_val != new_val:
+                f[tag] = new_val
+                file_dirty = True
+        
+        if file_dirty:
+            with span("tags.write", path=current_path):
+                f.save()
+
+        # B. Artwork Specifieke Afhandeling
+        art_path = entry.get('artwork')
+        if art_path and os.path.exists(art_path):
+            
+            # 1. Converteer afbeelding naar cleane JPEG bytes
+            img_data = self.encode_artwork(art_path)
+            if img_data:
+
+                # 2. Opslaan afhankelijk van bestandsformaat
+                if file_ext in ['.m4a', '.mp4']:
+                    # FIX: Gebruik DIRECT Mutagen voor M4A om 'atom' error te voorkomen
+                    with span("tags.read", path=current_path):
+                        m4a_file = MP4(current_path)
+                    # Verwijder oude cover(s) en zet nieuwe met expliciete JPEG vlag
+                    m4a_file['covr'] = [MP4Cover(img_data, imageformat=MP4Cover.FORMAT_JPEG)]
+                    with span("tags.write", path=current_path):
+                        m4a_file.save()
+                
+                else:
+                    # Voor MP3/FLAC werkt music_tag meestal wel prima, 
+                    # maar we herladen het bestand om zeker te zijn na de vorige save
+                    with span("tags.read", path=current_path):
+                        f_art = music_tag.load_file(current_path)
+                    try: del f_art['artwork']
+                    except: pass
+                    f_art['artwork'] = img_data
+                    with span("tags.write", path=current_path):
+                        f_art.save()
+
+        # C. ReplayGain (music_tag has no fields for these)
+        if entry.get('replaygain'):
+            self.write_replaygain(current_path, entry['replaygain'])
+
+    def write_replaygain(self, current_path, values):
+        file_ext = os.path.splitext(current_path)[1].lower()
+        with span("tags.write", path=current_path):
+            if file_ext in ['.m4a', '.mp4']:
+                from mutagen.mp4 import MP4, MP4FreeForm
+                audio = MP4(current_path)
+                for key, val in values.items():
+                    audio[f"----:com.apple.iTunes:{key}"] = [MP4FreeForm(val.encode('utf-8'))]
+                audio.save()
+            elif file_ext == '.flac':
+                from mutagen.flac import FLAC
+                audio = FLAC(current_path)
+                for key, val in values.items():
+                    audio[key.upper()] = val
+                audio.save()
+            else:
+                # MP3 and WAV both carry an ID3 tag
+                import mutagen
+                from mutagen.id3 import TXXX
+                audio = mutagen.File(current_path)
+                if audio.tags is None: audio.add_tags()
+                for key, val in values.items():
+                    audio.tags.setall(f"TXXX:{key.upper()}", [TXXX(encoding=3, desc=key.upper(), text=[val])])
+                audio.save()
+
+    def encode_artwork(self, art_path):
+        from PyQt6.QtCore import QBuffer, QIODevice, QByteArray
+        from PyQt6.QtGui import QImage
+        if art_path in self.encoded_artwork:
+            return self.encoded_artwork[art_path]
+
+        with span("artwork.encode", path=art_path):
+            image = QImage(art_path)
+            if image.isNull():
+                data = None
+            else:
+                ba = QByteArray()
+                buf = QBuffer(ba)
+                buf.open(QIODevice.OpenModeFlag.WriteOnly)
+                image.save(buf, "JPEG", quality=85)
+                data = bytes(ba)
+        self.encoded_artwork[art_path] = data
+        return data
+
+    def log_save_error(self, errors, op, path, err_msg):
+        logging.error(err_msg)
+        log_operation(op, path, outcome="error", error=err_msg)
+        errors.append(err_msg)
+
+    # =========================================================
+    # JOURNAL RECOVERY
+    # =========================================================
+    def resume_journal(self, journal):
+        """Finishes an interrupted batch; returns (files processed, errors)."""
+        logging.info("Resuming unfinished batch save...")
+        errors = []
+        count = self.run_journal(journal, errors)
+        journal.finish(self.last_journal_file)
+        return count, errors
+
+    def rollback_journal(self, journal):
+        """
+        Undoes the finished steps of a batch in reverse order (artwork and
+        ReplayGain are not restored). Returns the error messages.
+        """
+        import music_tag
+        logging.info(f"Rolling back batch {journal.batch_id}...")
+        errors = []
+        indices = list(reversed(range(len(journal.entries))))
+
+        for i in indices:
+            entry = journal.entries[i]
+            if journal.is_done(i, STEP_LYRICS):
+                try:
+                    lrc_path = os.path.splitext(journal.final_path(i))[0] + ".txt"
+                    previous = entry.get('lyrics_previous') if lrc_path == entry.get('lyrics_path') else None
+                    if previous is not None:
+                        with open(lrc_path, 'w', encoding='utf-8') as lrc_file:
+                            lrc_file.write(previous)
+                    elif not entry.get('lyrics_existed'):
+                        os.remove(lrc_path)
+                    journal.mark_undone(i, STEP_LYRICS)
+                except OSError as e:
+                    errors.append(f"Lyrics Rollback Error ({os.path.basename(entry['path'])}): {str(e)}")
+
+        # Renames go back in two phases as well, so swapped names can be undone
+        for i in indices:
+            entry = journal.entries[i]
+            if journal.is_done(i, STEP_RENAME):
+                back_to = entry['rename_tmp'] if journal.is_done(i, STEP_RENAME_TMP) else entry['path']
+                try:
+                    with span("file.rename", path=entry['rename_to']):
+                        os.rename(entry['rename_to'], back_to)
+                    journal.mark_undone(i, STEP_RENAME)
+                except OSError as e:
+                    errors.append(f"Rename Rollback Error ({os.path.basename(entry['path'])}): {str(e)}")
+        for i in indices:
+            entry = journal.entries[i]
+            if journal.is_done(i, STEP_RENAME_TMP) and not journal.is_done(i, STEP_RENAME):
+                try:
+                    with span("file.rename", path=entry['rename_tmp']):
+                        os.rename(entry['rename_tmp'], entry['path'])
+                    journal.mark_undone(i, STEP_RENAME_TMP)
+                except OSError as e:
+                    errors.append(f"Rename Rollback Error ({os.path.basename(entry['path'])}): {str(e)}")
+
+        for i in indices:
+            entry = journal.entries[i]
+            if journal.is_done(i, STEP_TAGS):
+                try:
+                    with span("tags.read", path=journal.final_path(i)):
+                        f = music_tag.load_file(journal.final_path(i))
+                    for tag in entry['tags']:
+                        old_val = entry['original'].get(tag, "")
+                        if old_val == "" and tag in ['tracknumber', 'year', 'discnumber', 'comment']:
+                            f[tag] = None
+                        else:
+                            f[tag] = old_val
+                    with span("tags.write", path=journal.final_path(i)):
+                        f.save()
+                    journal.mark_undone(i, STEP_TAGS)
+                except Exception as e:
+                    errors.append(f"Tag Rollback Error ({os.path.basename(entry['path'])}): {str(e)}")
+
+        for err_msg in errors: logging.error(err_msg)
+        journal.discard()
+        return errors
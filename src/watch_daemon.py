@@ -0,0 +1,451 @@
+# watch_daemon.py
+"""
+Watch-folder daemon: tags and renames new recordings as they land.
+
+    python main.py --watch watch.json
+
+watch.json:
+
+    {
+      "debounce": 5,                 seconds without writes before a file is taken
+      "workers": 4,                  files processed at the same time
+      "replaygain": false,
+      "process_existing": false,     also handle files already there at start
+      "folders": [
+        {"path": "/incoming/stoet", "album_url": "https://...", "cover": true},
+        {"path": "/incoming/lijst", "csv": "/lists/stoet2026.csv",
+         "album": "Stoet 2026", "year": "2026", "cover": "/lists/affiche.jpg"}
+      ]
+    }
+
+A file is matched to the parade entry (album page or CSV list, same column
+detection as the CSV matcher) whose number is the first number in its file
+name; files without a matching number are logged and left alone. Matched
+files go through the normal staging and journaled save. Folders are watched
+with inotify on Linux and polled elsewhere.
+"""
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import queue
+import re
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from parade_csv import parse_parade_csv
+from save_journal import SaveJournal
+from tagging_core import TaggingSession, AUDIO_EXTENSIONS
+
+STATE_FILE = os.path.join(os.path.expanduser("~"), "EirekesManagerCache", "watch_state.json")
+DEFAULT_DEBOUNCE = 5.0
+DEFAULT_WORKERS = 4
+POLL_INTERVAL = 2.0
+DEFAULT_OPTIONS = {'title': True, 'artist': True, 'track': True, 'rename': True, 'lyrics': False}
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_audio_file(name):
+    return not name.startswith('.') and name.lower().endswith(AUDIO_EXTENSIONS)
+
+
+def file_number(path):
+    match = re.search(r'\d+', os.path.splitext(os.path.basename(path))[0])
+    return int(match.group()) if match else None
+
+
+def load_config(config_path):
+    with open(config_path, 'r', encoding='utf-8') as fh:
+        config = json.load(fh)
+    folders = {}
+    for entry in config.get("folders", []):
+        folder = os.path.abspath(os.path.expanduser(entry["path"]))
+        if not entry.get("album_url") and not entry.get("csv"):
+            raise ValueError(f"{folder}: needs an album_url or a csv")
+        if not os.path.isdir(folder):
+            raise ValueError(f"{folder}: not a folder")
+        folders[folder] = entry
+    if not folders:
+        raise ValueError("No folders configured")
+    config["folders"] = folders
+    return config
+
+
+# =========================================================
+# WATCHERS
+# =========================================================
+class InotifyWatcher:
+    """inotify through ctypes; reports files closed after writing or moved in."""
+
+    def __init__(self, folders):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.folders = list(folders)
+        self.wd_folder = {}
+        for folder in self.folders:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                err = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(err, f"inotify_add_watch failed for {folder}")
+            self.wd_folder[wd] = folder
+
+    def poll(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready: return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: hand over everything, the state filters it
+                paths.extend(scan_folders(self.folders))
+            elif wd in self.wd_folder and name:
+                paths.append(os.path.join(self.wd_folder[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback without inotify: lists the folders every POLL_INTERVAL seconds."""
+
+    def __init__(self, folders):
+        self.folders = list(folders)
+        self.seen = self.snapshot()
+        self.next_scan = time.monotonic() + POLL_INTERVAL
+
+    def snapshot(self):
+        seen = {}
+        for path in scan_folders(self.folders):
+            try:
+                st = os.stat(path)
+                seen[path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                pass
+        return seen
+
+    def poll(self, timeout):
+        time.sleep(max(0.0, min(timeout, self.next_scan - time.monotonic())))
+        if time.monotonic() < self.next_scan: return []
+        self.next_scan = time.monotonic() + POLL_INTERVAL
+        current = self.snapshot()
+        changed = [path for path, stat in current.items() if self.seen.get(path) != stat]
+        self.seen = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def scan_folders(folders):
+    paths = []
+    for folder in folders:
+        try:
+            paths.extend(os.path.join(folder, name) for name in os.listdir(folder) if is_audio_file(name))
+        except OSError:
+            pass
+    return paths
+
+
+def make_watcher(folders):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folders)
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify unavailable ({e}), polling instead")
+    return PollingWatcher(folders)
+
+
+class Debouncer:
+    """A file is ready once it saw no events for `delay` seconds and its size held still."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.pending = {}       # path -> (last event, size)
+
+    @staticmethod
+    def size_of(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    def touch(self, path):
+        self.pending[path] = (time.monotonic(), self.size_of(path))
+
+    def ready(self):
+        now = time.monotonic()
+        done = []
+        for path, (last, size) in list(self.pending.items()):
+            if now - last < self.delay: continue
+            current = self.size_of(path)
+            if current is None:
+                del self.pending[path]
+            elif current != size:
+                # Still growing (slow copy without close events)
+                self.pending[path] = (now, current)
+            else:
+                del self.pending[path]
+                done.append(path)
+        return done
+
+
+# =========================================================
+# PARADE SOURCES
+# =========================================================
+class ParadeSource:
+    """Matcher rows ([Num, Title, Artist, LyricsRef, Comment]) of one watched folder."""
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.lock = threading.Lock()
+        self.album = None
+        self.by_number = {}
+        self.loaded_from = None
+        self.cover = None
+
+    def match(self, path):
+        number = file_number(path)
+        if number is None: return None
+        with self.lock:
+            if self.stale() or number not in self.by_number:
+                # The list may have been updated during the weekend
+                self.load()
+            return self.by_number.get(number)
+
+    def stale(self):
+        if self.loaded_from is None: return True
+        if self.entry.get("csv"):
+            try:
+                return os.stat(self.entry["csv"]).st_mtime_ns != self.loaded_from
+            except OSError:
+                return False
+        return False
+
+    def load(self):
+        entry = self.entry
+        if entry.get("csv"):
+            rows, _ = parse_parade_csv(entry["csv"])
+            tracks = [[track, title, artist, "", ""] for track, title, artist in rows]
+            self.album = [entry.get("album", ""), "", entry.get("year", "")] if entry.get("album") else None
+            self.cover = entry.get("cover") if isinstance(entry.get("cover"), str) else None
+            self.loaded_from = os.stat(entry["csv"]).st_mtime_ns
+        else:
+            from scraper import get_album_scraper
+            scraper = get_album_scraper()
+            album, tracks = scraper.fetch_data(entry["album_url"], use_cache=self.loaded_from is None)
+            self.album = album or None
+            if entry.get("cover") and album:
+                self.cover = scraper.get_cover(entry["album_url"])
+            self.loaded_from = entry["album_url"]
+
+        self.by_number = {}
+        for track in tracks:
+            try:
+                self.by_number.setdefault(int(str(track[0]).strip()), track)
+            except (ValueError, IndexError):
+                continue
+        logging.info(f"Watch: {len(self.by_number)} parade entries for {entry['path']}")
+
+
+# =========================================================
+# DAEMON
+# =========================================================
+class WatchDaemon:
+    def __init__(self, config, log_dir, rename_pattern):
+        self.config = config
+        self.folders = config["folders"]
+        self.sources = {folder: ParadeSource(entry) for folder, entry in self.folders.items()}
+        self.folder_locks = {folder: threading.Lock() for folder in self.folders}
+        self.debouncer = Debouncer(float(config.get("debounce", DEFAULT_DEBOUNCE)))
+        self.workers = int(config.get("workers", DEFAULT_WORKERS))
+        self.replaygain = bool(config.get("replaygain", False))
+        self.rename_pattern = rename_pattern
+        self.stop_event = threading.Event()
+
+        # One save journal per worker slot, so concurrent saves never share one
+        self.journal_dir = os.path.join(log_dir, "watch")
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.slots = queue.Queue()
+        for slot in range(self.workers):
+            self.slots.put(slot)
+
+        # Files already handled (path -> [size, mtime_ns]); our own tag
+        # writes and renames must not trigger another round
+        self.state_lock = threading.Lock()
+        self.handled = self.load_state()
+        self.in_flight = set()
+
+    # --- STATE ---
+    def load_state(self):
+        try:
+            with open(STATE_FILE, 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        with self.state_lock:
+            try:
+                os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+                tmp_path = STATE_FILE + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as fh:
+                    json.dump(self.handled, fh)
+                os.replace(tmp_path, STATE_FILE)
+            except OSError:
+                pass
+
+    def is_handled(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return True
+        with self.state_lock:
+            if path in self.in_flight: return True
+            return self.handled.get(path) == [st.st_size, st.st_mtime_ns]
+
+    def mark_handled(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        with self.state_lock:
+            self.handled[path] = [st.st_size, st.st_mtime_ns]
+
+    # --- PROCESSING ---
+    def session_for(self, slot):
+        return TaggingSession(os.path.join(self.journal_dir, f"slot{slot}.jsonl"),
+                              os.path.join(self.journal_dir, f"slot{slot}-last.jsonl"),
+                              self.rename_pattern)
+
+    def resume_unfinished(self):
+        # A crash mid-save leaves the slot journal behind; finish it first
+        for slot in range(self.workers):
+            session = self.session_for(slot)
+            journal = SaveJournal.load(session.journal_file)
+            if journal and not journal.finished and journal.unfinished_count():
+                count, errors = session.resume_journal(journal)
+                logging.warning(f"Watch: resumed unfinished save of {count} file(s), {len(errors)} error(s)")
+
+    def process(self, path):
+        folder = os.path.dirname(path)
+        slot = self.slots.get()
+        try:
+            track = self.sources[folder].match(path)
+            if track is None:
+                logging.warning(f"Watch: no parade entry for {os.path.basename(path)}, left untouched")
+                self.mark_handled(path)
+                return
+
+            entry = self.folders[folder]
+            options = dict(DEFAULT_OPTIONS)
+            options.update(entry.get("options", {}))
+            source = self.sources[folder]
+            if source.cover:
+                options['artwork_path'] = source.cover
+
+            # Renames are planned against the folder on disk: one save per folder at a time
+            with self.folder_locks[folder]:
+                session = self.session_for(slot)
+                session.stage_matches([path], [track], source.album, options)
+                result = session.save(self.replaygain)
+            for err_msg in result["errors"]:
+                logging.error(f"Watch: {err_msg}")
+            final_path = result["final_paths"].get(path, path)
+            self.mark_handled(final_path)
+            logging.info(f"Watch: {os.path.basename(path)} -> {os.path.basename(final_path)}")
+            print(f"Tagged {os.path.basename(path)} -> {os.path.basename(final_path)}")
+        except Exception as e:
+            logging.exception(f"Watch: failed on {path}: {e}")
+            self.mark_handled(path)
+        finally:
+            with self.state_lock:
+                self.in_flight.discard(path)
+            self.slots.put(slot)
+            self.save_state()
+
+    def submit(self, pool, path):
+        with self.state_lock:
+            self.in_flight.add(path)
+        pool.submit(self.process, path)
+
+    def run(self):
+        self.resume_unfinished()
+        watcher = make_watcher(self.folders)
+        logging.info(f"Watch: {type(watcher).__name__} on {len(self.folders)} folder(s)")
+        print(f"Watching {len(self.folders)} folder(s) (Ctrl+C to stop)")
+
+        if self.config.get("process_existing"):
+            for path in scan_folders(self.folders):
+                if not self.is_handled(path): self.debouncer.touch(path)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="watch") as pool:
+            try:
+                while not self.stop_event.is_set():
+                    for path in watcher.poll(0.5):
+                        if is_audio_file(os.path.basename(path)) and not self.is_handled(path):
+                            self.debouncer.touch(path)
+                    for path in self.debouncer.ready():
+                        if not self.is_handled(path):
+                            self.submit(pool, path)
+            finally:
+                watcher.close()
+        self.save_state()
+
+    def stop(self, *_):
+        self.stop_event.set()
+
+
+_qt_app = None
+
+
+def run_daemon(config_path):
+    import signal
+    from PyQt6.QtCore import QCoreApplication, QSettings
+    from app_logging import setup_logging
+    from rename_planner import DEFAULT_TEMPLATE
+    # Image plugins (artwork encoding) need an application object, not a GUI;
+    # held at module level so it lives as long as the process
+    global _qt_app
+    _qt_app = QCoreApplication.instance() or QCoreApplication(["eirekes-watch"])
+
+    log_dir = os.path.join(os.path.expanduser("~"), "EirekesManagerLogs")
+    os.makedirs(log_dir, exist_ok=True)
+    setup_logging(log_dir)
+    try:
+        config = load_config(config_path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Invalid watch config {config_path}: {e}")
+        return 2
+
+    settings = QSettings("OilsjterseLiekes", "MetadataMaster")
+    daemon = WatchDaemon(config, log_dir, settings.value("rename_template", DEFAULT_TEMPLATE))
+    signal.signal(signal.SIGTERM, daemon.stop)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+    logging.info("Watch daemon stopped")
+    return 0
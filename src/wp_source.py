@@ -0,0 +1,167 @@
+# wp_source.py
+import logging
+import threading
+from urllib.parse import urlsplit
+from perf_trace import span
+
+API_PATH = "/wp-json/wp/v2/"
+TRACK_TYPE = "tracks"
+PER_PAGE = 100      # the API maximum
+
+
+def slug_of(url):
+    segments = [s for s in urlsplit(url).path.split("/") if s]
+    return segments[-1] if segments else ""
+
+
+class WpSource:
+    """
+    Albums and lyrics from the site's WordPress REST API (wp-json).
+
+    One request returns the album post: its rendered content holds the same
+    track table and /tracks/ links the HTML scraper parses, plus the
+    featured image as cover. The lyrics of every track of an album come
+    from one paginated request (100 tracks per page) the first time any of
+    them is asked for. Every call returns None/{} on failure so the caller
+    falls back to HTML scraping; a host that has no API at all, or none of
+    whose rest bases ever had an album, is remembered and not asked again.
+    """
+
+    def __init__(self, session, lyrics_scraper):
+        self.session = session
+        self.lyrics_scraper = lyrics_scraper
+        self._disabled = set()          # hosts without a usable API
+        self._album_bases = {}          # host -> rest base the last album was found under
+        self._album_misses = set()      # hosts where no rest base had the album
+        self._album_lyrics = {}         # album url -> {slug / normalized title: lyrics}
+        self._lock = threading.Lock()
+
+    def available(self, url):
+        return urlsplit(url).netloc not in self._disabled
+
+    def api_root(self, url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}{API_PATH}"
+
+    # =========================================================
+    # REQUESTS
+    # =========================================================
+    def get_json(self, url, params):
+        """(data, total pages) or None."""
+        host = urlsplit(url).netloc
+        if host in self._disabled: return None
+        try:
+            with span("scrape.request", url=url):
+                response = self.session.get(url, params=params, timeout=15)
+        except Exception as e:
+            logging.warning(f"WP API Error: {e}")
+            return None
+
+        try:
+            data = response.json()
+        except ValueError:
+            # Not a WordPress API at all: stop asking this host
+            logging.debug(f"No wp-json API on {host}, using HTML scraping")
+            self._disabled.add(host)
+            return None
+        if response.status_code != 200:
+            return None
+        try:
+            pages = int(response.headers.get("X-WP-TotalPages", 1))
+        except ValueError:
+            pages = 1
+        return data, pages
+
+    def get_all(self, url, params):
+        """Every item of a collection, following X-WP-TotalPages."""
+        items = []
+        page, pages = 1, 1
+        while page <= pages:
+            result = self.get_json(url, dict(params, page=page, per_page=PER_PAGE))
+            if result is None or not isinstance(result[0], list):
+                return items if page > 1 else None
+            items.extend(result[0])
+            pages = result[1]
+            page += 1
+        return items
+
+    # =========================================================
+    # ALBUMS
+    # =========================================================
+    def fetch_album(self, album_url):
+        """{"html": rendered content, "cover_url": ...} for an album URL, or None."""
+        host = urlsplit(album_url).netloc
+        if not self.available(album_url) or host in self._album_misses: return None
+        segments = [s for s in urlsplit(album_url).path.split("/") if s]
+        if not segments: return None
+
+        # /<post type>/<slug>/ for custom types, otherwise a page or a post
+        bases = ([segments[0]] if len(segments) > 1 else []) + ["pages", "posts"]
+        if host in self._album_bases:
+            bases.insert(0, self._album_bases[host])
+        root = self.api_root(album_url)
+        for base in dict.fromkeys(bases):
+            result = self.get_json(root + base, {"slug": segments[-1], "_embed": "wp:featuredmedia"})
+            if result is None:
+                if not self.available(album_url): return None
+                continue
+            posts = result[0]
+            if isinstance(posts, list) and posts:
+                self._album_bases[host] = base
+                post = posts[0]
+                return {"html": post.get("content", {}).get("rendered", ""), "cover_url": self.featured_image(post)}
+        if host not in self._album_bases:
+            # Albums are not exposed under any base we know: stop probing this host
+            logging.debug(f"No wp-json album type on {host}, using HTML scraping")
+            self._album_misses.add(host)
+        return None
+
+    def featured_image(self, post):
+        media = post.get("_embedded", {}).get("wp:featuredmedia") or [{}]
+        return media[0].get("source_url") if isinstance(media[0], dict) else None
+
+    # =========================================================
+    # LYRICS
+    # =========================================================
+    def album_lyrics(self, album_url, track_urls):
+        # Loaders of one album asking at the same time wait for one fetch
+        with self._lock:
+            if album_url not in self._album_lyrics:
+                self._album_lyrics[album_url] = self.fetch_track_lyrics(album_url, track_urls)
+            return self._album_lyrics[album_url]
+
+    def fetch_track_lyrics(self, album_url, track_urls):
+        slugs = [slug for slug in dict.fromkeys(slug_of(url) for url in track_urls) if slug]
+        lyrics = {}
+        if not slugs or not self.available(album_url): return lyrics
+
+        url = self.api_root(album_url) + TRACK_TYPE
+        for i in range(0, len(slugs), PER_PAGE):
+            posts = self.get_all(url, {"slug": ",".join(slugs[i:i + PER_PAGE]), "_fields": "slug,title,content"})
+            for post in posts or []:
+                text = self.lyrics_from_content(post.get("content", {}).get("rendered", ""))
+                if not text: continue
+                lyrics[post.get("slug", "")] = text
+                title = self.lyrics_scraper.normalize_title(post.get("title", {}).get("rendered", ""))
+                if title: lyrics.setdefault(title, text)
+        logging.debug(f"wp-json lyrics for {len(set(lyrics.values()))}/{len(slugs)} tracks.")
+        return lyrics
+
+    def lyrics_from_content(self, html_text):
+        from bs4 import BeautifulSoup
+        with span("scrape.parse"):
+            soup = BeautifulSoup(html_text, "html.parser")
+        body = soup.find("div", class_="tekst") or soup
+        lyrics = body.get_text("\n", strip=True).strip()
+        # Same rule as the track page scraper: too short is not lyrics
+        if len(lyrics.splitlines()) < 5:
+            return None
+        return lyrics
+
+    def lyrics_loader(self, album_url, track_urls, title_key, track_url, fallback):
+        """Deferred lookup in the album's bulk lyrics; fallback() scrapes the HTML."""
+        def load():
+            found = self.album_lyrics(album_url, track_urls)
+            text = (found.get(slug_of(track_url)) if track_url else None) or found.get(title_key)
+            return text or fallback()
+        return load
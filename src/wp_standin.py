@@ -0,0 +1,221 @@
+# wp_standin.py
+"""
+Local stand-in for oilsjterseliekes.be, for trying the scrapers offline.
+
+Serves generated albums the way the real site does: album pages with the
+track table, /tracks/ pages with lyrics, and the WordPress REST routes
+wp_source.py uses (/wp-json/wp/v2/<type>?slug=..., paginated with
+X-WP-TotalPages). Every request is counted per kind.
+
+    python wp_standin.py --albums 3 --tracks 40            serve on 127.0.0.1:8099
+    python wp_standin.py --no-api                          site without wp-json
+    python wp_standin.py --check                           fetch an album with and
+                                                           without the API and compare
+"""
+import argparse
+import html
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+DEFAULT_PORT = 8099
+ALBUM_TYPE = "albums"
+
+
+def make_site(albums, tracks_per_album):
+    site = {"albums": {}, "tracks": {}}
+    for a in range(1, albums + 1):
+        slug = f"stoet-{2000 + a}"
+        track_slugs = []
+        for t in range(1, tracks_per_album + 1):
+            track_slug = f"liedje-{a}-{t}"
+            track_slugs.append(track_slug)
+            site["tracks"][track_slug] = {
+                "title": f"Liedje {a}.{t} ’t Ajuin",
+                "artist": f"Groep {t % 7}",
+                "original": f"Origineel {t}",
+                "lyrics": "\n".join(f"Regel {line} van liedje {a}.{t}" for line in range(1, 9))
+            }
+        site["albums"][slug] = {"title": f"Stoet {2000 + a}", "year": str(2000 + a), "tracks": track_slugs}
+    return site
+
+
+# =========================================================
+# RENDERING
+# =========================================================
+def album_content(site, album):
+    cells = [album["title"], "Diverse", album["year"], "Oilsjt", "CD"]
+    rows = [f"<td>{html.escape(c)}</td>" for c in cells]
+    for num, slug in enumerate(album["tracks"], 1):
+        track = site["tracks"][slug]
+        rows.append(f"<td>{num}</td>")
+        rows.append(f'<td><a href="/tracks/{slug}/">{html.escape(track["title"])}</a></td>')
+        rows.append(f"<td>{html.escape(track['artist'])}<br>Origineel nummer: {html.escape(track['original'])}</td>")
+    return "<table><tr>" + "</tr><tr>".join(rows) + "</tr></table>"
+
+
+def track_content(track):
+    return '<div class="tekst"><p>' + "<br>".join(html.escape(l) for l in track["lyrics"].splitlines()) + "</p></div>"
+
+
+def page(title, body, base):
+    return (f'<html><head><title>{html.escape(title)}</title>'
+            f'<meta property="og:image" content="{base}/cover.jpg"></head>'
+            f'<body><h1>{html.escape(title)}</h1>{body}</body></html>')
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    site = None
+    api = True
+    cover = None
+    counts = Counter()
+    lock = threading.Lock()
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def count(self, kind):
+        with self.lock:
+            self.counts[kind] += 1
+
+    def send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        data = body if isinstance(body, bytes) else body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, val in (headers or {}).items():
+            self.send_header(key, val)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        segments = [s for s in parts.path.split("/") if s]
+        base = f"http://{self.headers.get('Host', '127.0.0.1')}"
+
+        if segments[:3] == ["wp-json", "wp", "v2"] and len(segments) == 4:
+            self.count(f"api.{segments[3]}")
+            if not self.api:
+                return self.send(404, page("Niet gevonden", "", base))
+            return self.api_collection(segments[3], parse_qs(parts.query), base)
+
+        if len(segments) == 2 and segments[0] == ALBUM_TYPE and segments[1] in self.site["albums"]:
+            self.count("html.album")
+            album = self.site["albums"][segments[1]]
+            return self.send(200, page(album["title"], album_content(self.site, album), base))
+        if len(segments) == 2 and segments[0] == "tracks" and segments[1] in self.site["tracks"]:
+            self.count("html.track")
+            track = self.site["tracks"][segments[1]]
+            return self.send(200, page(track["title"], track_content(track), base))
+        if segments == ["cover.jpg"] and self.cover:
+            self.count("cover")
+            return self.send(200, self.cover, "image/jpeg")
+        self.count("other")
+        self.send(404, page("Niet gevonden", "", base))
+
+    def api_collection(self, post_type, query, base):
+        slugs = [s for value in query.get("slug", []) for s in value.split(",") if s]
+        per_page = min(int(query.get("per_page", ["10"])[0]), 100)
+        page_no = int(query.get("page", ["1"])[0])
+
+        if post_type == ALBUM_TYPE:
+            items = [self.album_post(slug, base) for slug in slugs if slug in self.site["albums"]]
+        elif post_type == "tracks":
+            items = [self.track_post(slug) for slug in slugs if slug in self.site["tracks"]]
+        elif post_type in ("pages", "posts"):
+            items = []
+        else:
+            body = {"code": "rest_no_route", "message": "No route was found matching the URL and request method.", "data": {"status": 404}}
+            return self.send(404, json.dumps(body), "application/json")
+
+        pages = max(1, -(-len(items) // per_page))
+        if page_no > pages:
+            body = {"code": "rest_post_invalid_page_number", "data": {"status": 400}}
+            return self.send(400, json.dumps(body), "application/json")
+        chunk = items[(page_no - 1) * per_page:page_no * per_page]
+        headers = {"X-WP-Total": str(len(items)), "X-WP-TotalPages": str(pages)}
+        self.send(200, json.dumps(chunk), "application/json", headers)
+
+    def album_post(self, slug, base):
+        album = self.site["albums"][slug]
+        return {"slug": slug, "title": {"rendered": html.escape(album["title"])},
+                "content": {"rendered": album_content(self.site, album)},
+                "_embedded": {"wp:featuredmedia": [{"source_url": f"{base}/cover.jpg"}]}}
+
+    def track_post(self, slug):
+        track = self.site["tracks"][slug]
+        return {"slug": slug, "title": {"rendered": html.escape(track["title"])},
+                "content": {"rendered": track_content(track)}}
+
+
+def start_server(site, port, api=True, cover=None):
+    StandinHandler.site = site
+    StandinHandler.api = api
+    StandinHandler.cover = cover
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandinHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# =========================================================
+# CHECK: API vs HTML
+# =========================================================
+def fetch_album(album_url):
+    """One fresh scraper run; forces every lyric so the request counts are complete."""
+    from scraper import AlbumScraper
+    from lyrics_store import lyrics_store
+    album_data, tracks = AlbumScraper().fetch_data(album_url, use_cache=False)
+    lyrics = [lyrics_store.get(track[3]) for track in tracks]
+    return album_data, [track[:3] + [track[4]] for track in tracks], lyrics
+
+
+def run_check(site, port):
+    server = start_server(site, port)
+    album_url = f"http://127.0.0.1:{port}/{ALBUM_TYPE}/{next(iter(site['albums']))}/"
+    results = {}
+    for api in (True, False):
+        StandinHandler.api = api
+        StandinHandler.counts.clear()
+        # A different query per run keeps the lyrics refs apart in the shared store
+        results[api] = fetch_album(f"{album_url}?run={'api' if api else 'html'}")
+        print(f"--- {'wp-json' if api else 'HTML only'} ---")
+        for kind, count in sorted(StandinHandler.counts.items()):
+            print(f"{kind:14} {count:5}")
+    server.shutdown()
+
+    same = results[True] == results[False]
+    found = sum(1 for text in results[True][2] if text)
+    print(f"Tracks: {len(results[True][1])}, lyrics: {found}, identical results: {same}")
+    return 0 if same and found else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the lyrics site")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--albums", type=int, default=3)
+    parser.add_argument("--tracks", type=int, default=40)
+    parser.add_argument("--no-api", action="store_true", help="Answer wp-json like a site without the REST API")
+    parser.add_argument("--cover", help="JPEG served as every album's cover")
+    parser.add_argument("--check", action="store_true", help="Compare an album fetch with and without the API, then exit")
+    args = parser.parse_args()
+
+    site = make_site(args.albums, args.tracks)
+    if args.check:
+        sys.exit(run_check(site, args.port))
+
+    cover = None
+    if args.cover and os.path.exists(args.cover):
+        with open(args.cover, 'rb') as fh:
+            cover = fh.read()
+    server = start_server(site, args.port, api=not args.no_api, cover=cover)
+    print(f"Stand-in site on http://127.0.0.1:{args.port}/ (Ctrl+C to stop)")
+    for slug in site["albums"]:
+        print(f"  http://127.0.0.1:{args.port}/{ALBUM_TYPE}/{slug}/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()